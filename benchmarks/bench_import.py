@@ -0,0 +1,56 @@
+"""
+Benchmarks how long importing pyflight takes
+in a fresh interpreter, and whether the
+transports are loaded before they are used.
+
+    python -m benchmarks.bench_import --save before.json
+    python -m benchmarks.bench_import --compare before.json
+"""
+import json
+import subprocess
+import sys
+
+from benchmarks.common import main
+
+CASES = {
+    'pyflight': 'import pyflight',
+    'parse_only': 'from pyflight.result import Result',
+    # What the first request adds, for reference.
+    'with_transports': 'import pyflight, aiohttp, requests',
+}
+
+TRANSPORTS = ('aiohttp', 'requests')
+
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+{}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, len(sys.modules),
+                  sum(name in sys.modules for name in {!r})]))
+'''
+
+
+def measure(statement: str) -> list:
+    output = subprocess.check_output(
+        [sys.executable, '-c', SCRIPT.format(statement, TRANSPORTS)]
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def run(args) -> dict:
+    cases = {}
+    for name, statement in CASES.items():
+        runs = [measure(statement) for _ in range(args.repeat)]
+        _, modules, transports = runs[0]
+        cases[name] = {
+            'seconds': min(elapsed for elapsed, _, _ in runs),
+            'modules': modules,
+            'transports_loaded': transports,
+        }
+
+    return cases
+
+
+if __name__ == '__main__':
+    main(__doc__, run)
@@ -0,0 +1,76 @@
+"""
+Benchmarks how parsing responses into
+a Result, and converting it back with
+as_dict(), scales with the size of the
+response, using synthetic responses.
+The parse_summary timings only build
+the fields of pyflight.fields.SUMMARY.
+
+    python -m benchmarks.bench_parse --save before.json
+    python -m benchmarks.bench_parse --compare before.json
+
+With --profile, the cost of each model is reported as well.
+"""
+import argparse
+import json
+import tracemalloc
+
+from benchmarks.common import best_time, main
+from pyflight.fields import SUMMARY
+from pyflight.profiling import ParseProfiler
+from pyflight.result import Result
+from pyflight.synthetic import generate_response
+
+CASES = {
+    'small': dict(trips=10),
+    'round_trip': dict(trips=100, slices=2),
+    'max_solutions': dict(trips=500, slices=2, pricings=2),
+    'deep': dict(trips=50, slices=2, segments=3, legs=2, pricings=3,
+                 bag_descriptors=3, taxes=4),
+}
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(args) -> dict:
+    cases = {}
+    for name, options in CASES.items():
+        data = generate_response(**options)
+        body = json.dumps(data).encode()
+        result = Result(data)
+
+        cases[name] = {
+            'bytes': len(body),
+            'decode': best_time(lambda: json.loads(body), args.repeat),
+            'parse': best_time(lambda: Result(data), args.repeat),
+            'as_dict': best_time(result.as_dict, args.repeat),
+            'parse_peak_bytes': peak_memory(lambda: Result(data)),
+            'parse_summary': best_time(lambda: Result(data, SUMMARY),
+                                       args.repeat),
+            'parse_summary_peak_bytes': peak_memory(
+                lambda: Result(data, SUMMARY)
+            ),
+        }
+
+        if args.profile:
+            with ParseProfiler() as profiler:
+                Result(data)
+            print(name)
+            print(profiler.report())
+            print()
+
+    return cases
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser()
+    PARSER.add_argument('--profile', action='store_true',
+                        help='report the cost of each model')
+    main(__doc__, run, PARSER)
@@ -0,0 +1,65 @@
+"""
+Benchmarks the transports against each other
+by sending searches to a local mock server,
+or to memory, with the load generator.
+
+    python -m benchmarks.bench_transport --save before.json
+    python -m benchmarks.bench_transport --compare before.json
+
+The httpx transport is only measured if httpx is installed.
+"""
+import argparse
+import importlib.util
+
+from benchmarks.common import main
+from pyflight.bench import make_requests, run as load
+from pyflight.mock_server import MockServer
+from pyflight.requester import set_transport
+from pyflight.transports import TRANSPORTS
+
+# The transport and mode of each case.
+CASES = {
+    'aiohttp': ('aiohttp', 'async'),
+    'requests': ('requests', 'sync'),
+    'background': ('aiohttp', 'background'),
+    'httpx_async': ('httpx', 'async'),
+    'httpx_sync': ('httpx', 'sync'),
+    'memory_async': ('memory', 'async'),
+    'memory_sync': ('memory', 'sync'),
+}
+
+
+def run(args) -> dict:
+    has_httpx = importlib.util.find_spec('httpx') is not None
+    cases = {}
+    with MockServer() as server:
+        for name, (transport, mode) in CASES.items():
+            if transport == 'httpx' and not has_httpx:
+                continue
+
+            def configure(client, transport=transport):
+                set_transport(TRANSPORTS[transport](), client=client)
+
+            best = None
+            for _ in range(args.repeat):
+                report = load(
+                    server.base_url, make_requests(args.requests),
+                    args.concurrency, mode, configure=configure
+                )
+                if best is None or report['throughput'] > best['throughput']:
+                    best = report
+
+            cases[name] = {
+                'throughput': best['throughput'],
+                'p50': best['latency']['p50'],
+                'p99': best['latency']['p99'],
+            }
+
+    return cases
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser()
+    PARSER.add_argument('--requests', type=int, default=200)
+    PARSER.add_argument('--concurrency', type=int, default=10)
+    main(__doc__, run, PARSER)
@@ -0,0 +1,116 @@
+"""
+Helpers shared by the benchmarks: timing,
+saving results as JSON and comparing
+them against the results of another
+revision.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+from typing import Callable, Dict
+
+# Measurements where a higher value is better, all others are
+# times or sizes, where a lower value is better.
+HIGHER_IS_BETTER = ('throughput',)
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """Call ``func`` ``repeat`` times and return the fastest
+    call in seconds, which is the least disturbed by noise."""
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def revision() -> str:
+    """Get the git revision of the working tree, if any."""
+
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old: dict, new: dict) -> str:
+    """Format a table of the changes between two saved runs."""
+
+    lines = ['{:<34} {:>14} {:>14} {:>9}'.format(
+        'case / measurement', old['revision'], new['revision'], 'change'
+    )]
+    for case, measurements in new['cases'].items():
+        previous = old['cases'].get(case, {})
+        for name, value in measurements.items():
+            before = previous.get(name)
+            if before:
+                change = (value - before) / before * 100
+                if name in HIGHER_IS_BETTER:
+                    change = -change
+                change = '{:+.1f}%'.format(change)
+            else:
+                change = ''
+            lines.append('{:<34} {:>14.6g} {:>14.6g} {:>9}'.format(
+                '{} / {}'.format(case, name),
+                before if before is not None else float('nan'),
+                value, change
+            ))
+
+    lines.append('Positive changes are regressions.')
+    return '\n'.join(lines)
+
+
+def main(description: str,
+         run: Callable[[argparse.Namespace], Dict[str, Dict[str, float]]],
+         parser: argparse.ArgumentParser = None):
+    """Run a benchmark from the command line.
+
+    Parameters
+    ----------
+        description : str
+            The description of the benchmark shown by ``--help``.
+        run : Callable[[argparse.Namespace], Dict[str, Dict[str, float]]]
+            Runs the benchmark with the parsed arguments and returns
+            the measurements of each case by name.
+        parser : argparse.ArgumentParser
+            A parser with additional arguments of the benchmark.
+    """
+
+    parser = parser or argparse.ArgumentParser()
+    parser.description = description
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='how often to repeat each timing')
+    parser.add_argument('--save', metavar='FILE',
+                        help='save the results as JSON')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare against results saved before')
+    args = parser.parse_args()
+
+    results = {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'cases': run(args)
+    }
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            print(compare(json.load(baseline), results))
+    else:
+        for case, measurements in results['cases'].items():
+            print(case)
+            for name, value in measurements.items():
+                print('    {:<20} {:.6g}'.format(name, value))
+
+    if args.save:
+        with open(args.save, 'w') as output:
+            json.dump(results, output, indent=2)
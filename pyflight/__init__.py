@@ -3,6 +3,34 @@ This File exposes the Functions offered by the package to ease its usage.
 """
 
 from pyflight.requester import (
-    set_api_key, send_async, send_sync, Request, Slice
+    set_api_key, send_async, send_sync, send_many_async, Request, Slice,
+    enable_hedging, disable_hedging, enable_circuit_breakers,
+    disable_circuit_breakers, set_parse_executor, set_base_url, add_hook,
+    remove_hook, enable_metrics, disable_metrics, use_cassette, eject_cassette,
+    send_many_sync, enable_background_loop, disable_background_loop,
+    set_transport, enable_batching, disable_batching
+)
+from pyflight.api import APIException, Requester
+from pyflight.background import BackgroundLoop
+from pyflight.batch import Batcher
+from pyflight.canonical import FrozenRequest
+from pyflight.cassette import Cassette, CassetteMiss
+from pyflight.circuit_breaker import CircuitBreaker, CircuitOpenError
+from pyflight.fare_calendar import FareCalendar
+from pyflight.fields import fields_selector
+from pyflight.hedging import Hedger
+from pyflight.hooks import Hooks, RequestEvent
+from pyflight.limiter import AdaptiveLimiter
+from pyflight.metrics import Metrics
+from pyflight.mock_server import MockServer
+from pyflight.pipeline import Pipeline, Stage
+from pyflight.profiling import ParseProfiler
+from pyflight.result import Result, ResultDiff, ResultSnapshot
+from pyflight.scheduler import (
+    Scheduler, Priority, JobDropped, DeadlineExceeded, JobPreempted
+)
+from pyflight.search_space import SearchSpace, flexible_dates
+from pyflight.transports import (
+    Transport, AiohttpTransport, RequestsTransport, HttpxTransport,
+    MemoryTransport
 )
-from pyflight.api import APIException
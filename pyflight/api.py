@@ -2,9 +2,21 @@
 Handles all Requests that are sent to the API.
 """
 import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional, Union
 
-import aiohttp
-import requests
+from . import hooks
+from .circuit_breaker import CircuitBreaker
+from .fields import url_fields
+from .transports import AiohttpTransport, RequestsTransport
+
+BASE_URL = 'https://www.googleapis.com/qpxExpress/v1/trips/search?key='
+
+# Passed to the transport for requests that are not traced. Never modified.
+_NO_HOOKS = hooks.Hooks()
 
 
 class APIException(Exception):
@@ -51,71 +63,288 @@ class APIException(Exception):
         return '{}: {} ({})'.format(self.code, self.message, self.reason)
 
 
+def _raise_for_status(status: int, body: bytes):
+    """Raise the :class:`APIException` described by the
+    body of a response, unless its status is ``200``."""
+
+    if status != 200:
+        resp = json.loads(body)
+        raise APIException(
+            code=status,
+            message=resp['error']['message'],
+            reason=resp['error']['errors'][0]['reason']
+        )
+
+
 class Requester(object):
     """
     Class to execute requests with.
+
+    Attributes
+    ----------
+    base_url : str
+        The URL searches are sent to, ending with the
+        query parameter the API key is appended to.
+    hooks : :class:`Hooks`
+        The listeners of the timings of each request.
+    metrics : Optional[:class:`Metrics`]
+        The metrics registry fed by ``hooks``, if enabled.
+    cassette : Optional[:class:`Cassette`]
+        If set, responses are recorded to or replayed from it.
+    background : Optional[:class:`BackgroundLoop`]
+        If set, :meth:`pyflight.send_sync` sends requests
+        asynchronously on this loop instead of with ``requests``.
+    batcher : Optional[:class:`Batcher`]
+        If set, asynchronous searches are packed
+        into batch requests by it.
+    limiter : Optional[:class:`AdaptiveLimiter`]
+        The limiter last given to :meth:`pyflight.send_many_async`,
+        whose limit is exported by the ``metrics``.
+
+    transport : :class:`Transport`
+        Sends the requests of :meth:`post_request`,
+        by default an :class:`AiohttpTransport`.
+    sync_transport : :class:`Transport`
+        Sends the requests of :meth:`post_request_sync`,
+        by default a :class:`RequestsTransport`.
+
+    A Requester can be used from any number of event loops, including
+    ones running in other threads and uvloop's. Each loop gets its own
+    :class:`aiohttp.ClientSession`, so connections are pooled per loop.
     """
 
-    def __init__(self):
+    def __init__(self, base_url: str = BASE_URL):
         """Initialization of the Requester.
-        Gets a dedicated Event Loop from asyncio
-        to be used for making Requests.
+        Nothing is bound or loaded until the first request,
+        so creating a Requester is cheap.
+
+        Arguments
+            base_url : str
+                The URL searches are sent to, for example that of
+                a :class:`MockServer`. Defaults to the QPX Express API.
         """
 
-        self.loop = asyncio.get_event_loop()
+        self.transport = AiohttpTransport()
+        self.sync_transport = RequestsTransport()
+        self.base_url = base_url
         self.api_key = None
+        self.hedger = None
+        self.circuit_breaker_settings = None
+        self.circuit_breaker_listeners = []
+        self.circuit_breakers = {}
+        self._circuit_breaker_lock = threading.Lock()
+        self.parse_executor = None  # type: Optional[Executor]
+        # The pool set_parse_executor created, which it shuts down.
+        self._created_parse_executor = None  # type: Optional[Executor]
+        self.parse_threshold = 0
+        self.hooks = hooks.Hooks()
+        self.metrics = None
+        self.cassette = None
+        self.background = None
+        self.batcher = None
+        self.limiter = None
+
+    async def close(self):
+        """Close the connections of the transport on the running event
+        loop, if any. New ones are opened for the next request."""
+
+        await self.transport.close()
 
-    async def post_request(self, url: str, payload: dict) -> dict:
+    def circuit_breaker(self, url: str) -> Optional[CircuitBreaker]:
+        """Get the :class:`CircuitBreaker` for the endpoint of a URL.
+
+        Arguments
+            url : str
+                The URL to get the circuit breaker for.
+                The query string is not part of the endpoint.
+
+        Returns
+            Optional[CircuitBreaker]: The circuit breaker for the endpoint,
+            created on first use, or ``None`` if
+            ``circuit_breaker_settings`` is ``None``.
+        """
+
+        settings = self.circuit_breaker_settings
+        if settings is None:
+            return None
+
+        endpoint = url.split('?', 1)[0]
+        with self._circuit_breaker_lock:
+            breaker = self.circuit_breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint, **settings)
+                for listener in self.circuit_breaker_listeners:
+                    breaker.add_listener(listener)
+                self.circuit_breakers[endpoint] = breaker
+
+        return breaker
+
+    async def post_request(self, url: str, payload: Union[dict, bytes],
+                           parse: Optional[Callable[[bytes], Any]] = None):
         """Send a POST request to the specified URL with the given payload.
 
+        If ``hedger`` is set to a :class:`Hedger`,
+        slow requests are hedged by it. If circuit breakers
+        are enabled, each attempt goes through the
+        :class:`CircuitBreaker` of the endpoint.
+
         Arguments
             url : str
                 The URL to which the POST Request should be sent
-            payload: dict
-                The Payload to be sent along with the POST request
+            payload: Union[dict, bytes]
+                The Payload to be sent along with the POST request,
+                either as a dictionary or as serialized JSON
+            parse : Optional[Callable[[bytes], Any]]
+                Turns the body of the response into the return value,
+                see :meth:`parse_response`. Defaults to decoding the JSON.
 
         Returns
-            dict: The Response of the Website
+            dict: The Response of the Website, or whatever ``parse``
+            returned for it
         """
-        # pylint: disable=invalid-name
 
-        async with aiohttp.ClientSession(loop=self.loop) as cs:
-            async with cs.post(url + self.api_key, data=payload) as r:
-                if r.status != 200:
-                    resp = await r.json()
-                    raise APIException(
-                        code=r.status,
-                        message=resp['error']['message'],
-                        reason=resp['error']['errors'][0]['reason']
-                    )
+        if self.hedger is not None:
+            body = await self.hedger.run(
+                lambda: self._post_request(url, payload)
+            )
+        else:
+            body = await self._post_request(url, payload)
 
-                return await r.json()
+        return await self.parse_response(body, parse)
 
-    def post_request_sync(self, url: str, payload: dict) -> dict:
+    async def parse_response(self, body: bytes,
+                             parse: Optional[Callable[[bytes], Any]] = None):
+        """Parse the body of a successful response.
+
+        Bodies of at least ``parse_threshold`` bytes are parsed in the
+        ``parse_executor``, if one is set, so that parsing large
+        responses does not block the event loop. Smaller bodies,
+        for which handing them to the executor costs more than
+        it saves, are parsed right away.
+
+        Arguments
+            body : bytes
+                The body of the response.
+            parse : Optional[Callable[[bytes], Any]]
+                Turns the body into the return value. Must be picklable
+                if ``parse_executor`` is a process pool, for example
+                a function defined at module level.
+                Defaults to :func:`json.loads`.
+
+        Returns
+            Any: What ``parse`` returned
+        """
+
+        trace = hooks.current() if self.hooks else None
+        phase = hooks.PARSE if parse else hooks.DECODE
+        parse = parse or json.loads
+        start = time.monotonic()
+        executor = self.parse_executor
+        if executor is None or len(body) < self.parse_threshold:
+            value = parse(body)
+        else:
+            value = await asyncio.get_event_loop().run_in_executor(
+                executor, parse, body
+            )
+
+        if trace is not None:
+            trace.emit(phase, start, size=len(body))
+        return value
+
+    async def _post_request(self, url: str,
+                            payload: Union[dict, bytes]) -> bytes:
+        breaker = self.circuit_breaker(url)
+        if breaker is None:
+            return await self._post(url, payload)
+
+        start = breaker.allow()
+        try:
+            response = await self._post(url, payload)
+        except BaseException as error:
+            breaker.record(start, error)
+            raise
+
+        breaker.record(start)
+        return response
+
+    async def _post(self, url: str, payload: Union[dict, bytes]) -> bytes:
+        if self.cassette is None:
+            status, body = await self._fetch(url, payload)
+        else:
+            status, body = await self.cassette.fetch(
+                payload, lambda: self._fetch(url, payload), url_fields(url)
+            )
+
+        _raise_for_status(status, body)
+        return body
+
+    async def _fetch(self, url: str, payload: Union[dict, bytes]):
+        if self.batcher is not None:
+            if isinstance(payload, dict):
+                payload = json.dumps(payload).encode()
+            # The batch itself is not traced, as it belongs to no
+            # single search; the batcher reports to each of them.
+            return await self.batcher.fetch(
+                url + self.api_key, payload,
+                lambda endpoint, body, content_type: self.transport.post(
+                    endpoint, body, _NO_HOOKS, content_type
+                )
+            )
+
+        return await self.transport.post(
+            url + self.api_key, payload, self.hooks
+        )
+
+    def post_request_sync(self, url: str,
+                          payload: Union[dict, bytes]) -> dict:
         """Send a synchronous POST request to the specified URL with the given payload.
 
         Arguments
             url : str
                 The URL to which the POST Request should be sent
-            payload: dict
-                The Payload to be sent along with the POST request
+            payload: Union[dict, bytes]
+                The Payload to be sent along with the POST request,
+                either as a dictionary or as serialized JSON
 
         Returns
             dict: The Response of the Website
         """
-        # pylint: disable=invalid-name
 
-        r = requests.post(url + self.api_key, json=payload)
+        breaker = self.circuit_breaker(url)
+        if breaker is None:
+            return self._post_sync(url, payload)
+
+        start = breaker.allow()
+        try:
+            response = self._post_sync(url, payload)
+        except BaseException as error:
+            breaker.record(start, error)
+            raise
+
+        breaker.record(start)
+        return response
 
-        if r.status_code != 200:
-            resp = r.json()
-            raise APIException(
-                code=r.status_code,
-                message=resp['error']['message'],
-                reason=resp['error']['errors'][0]['reason']
+    def _post_sync(self, url: str, payload: Union[dict, bytes]) -> dict:
+        if self.cassette is None:
+            status, body = self._fetch_sync(url, payload)
+        else:
+            status, body = self.cassette.fetch_sync(
+                payload, lambda: self._fetch_sync(url, payload),
+                url_fields(url)
             )
 
-        return r.json()
+        _raise_for_status(status, body)
+        trace = hooks.current() if self.hooks else None
+        start = time.monotonic()
+        response = json.loads(body)
+        if trace is not None:
+            trace.emit(hooks.DECODE, start, size=len(body))
+        return response
+
+    def _fetch_sync(self, url: str, payload: Union[dict, bytes]):
+        return self.sync_transport.post_sync(
+            url + self.api_key, payload, self.hooks
+        )
 
 
 requester = Requester()  # pylint: disable=invalid-name
@@ -0,0 +1,167 @@
+"""
+Contains the BackgroundLoop class, which
+runs an event loop in a daemon thread so
+that blocking code can send requests
+through the pooled asynchronous session.
+"""
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Coroutine, Optional
+
+
+class BackgroundLoop(object):
+    """An event loop running in a thread of its own.
+
+    Coroutines submitted from any thread run on the loop, and their
+    results are returned as :class:`concurrent.futures.Future`. Used
+    by :meth:`pyflight.enable_background_loop`, it lets blocking code
+    share one pool of connections and have many requests in flight at
+    once, instead of sending one request per thread with ``requests``.
+
+    The thread is started on first use. It is a daemon thread, and the
+    loop is closed when the interpreter exits, if not before.
+
+    Attributes
+    ----------
+        name : str
+            The name of the thread.
+    """
+
+    def __init__(self, name: str = 'pyflight-background'):
+        """Create a new BackgroundLoop. Its thread is not started yet.
+
+        Parameters
+        ----------
+            name : str
+                The name of the thread.
+        """
+
+        self.name = name
+        self._loop = None  # type: Optional[asyncio.AbstractEventLoop]
+        self._thread = None  # type: Optional[threading.Thread]
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether the thread is started and not closed yet."""
+
+        return self._thread is not None
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._thread is None:
+                started = threading.Event()
+                loop = asyncio.new_event_loop()
+
+                def serve():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(started.set)
+                    loop.run_forever()
+
+                self._loop = loop
+                self._thread = threading.Thread(
+                    target=serve, name=self.name, daemon=True
+                )
+                self._thread.start()
+                started.wait()
+                atexit.register(self.close)
+
+            return self._loop
+
+    def submit(self, coroutine: Coroutine,
+               semaphore: Optional[asyncio.Semaphore] = None) -> Future:
+        """Run a coroutine on the loop, starting it first if needed.
+
+        Parameters
+        ----------
+            coroutine : Coroutine
+                The coroutine to run.
+            semaphore : Optional[asyncio.Semaphore]
+                If given, the coroutine only runs while holding it.
+                It must belong to the loop, see :meth:`semaphore`.
+
+        Returns
+        -------
+        :class:`concurrent.futures.Future`
+            The future of the result of the coroutine. Cancelling
+            it cancels the coroutine.
+        """
+
+        loop = self._start()
+        if semaphore is not None:
+            coroutine = _limited(coroutine, semaphore)
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    def semaphore(self, value: int) -> asyncio.Semaphore:
+        """Create a semaphore for :meth:`submit` on the loop,
+        as before Python 3.10, it is bound to the loop it is
+        created on, which must be the one waiting for it."""
+
+        return self.run(_semaphore(value))
+
+    def run(self, coroutine: Coroutine):
+        """Run a coroutine on the loop and block until it is done.
+
+        Raises
+        ------
+        RuntimeError
+            If called from the thread of the loop,
+            which would block forever.
+        """
+
+        if threading.current_thread() is self._thread:
+            raise RuntimeError(
+                'Cannot block on the background loop from its own thread'
+            )
+        return self.submit(coroutine).result()
+
+    def close(self):
+        """Cancel the coroutines still running on the loop and close
+        the sessions used on it, then stop the loop and its thread.
+        Calling :meth:`submit` starts a new one."""
+
+        with self._lock:
+            if self._thread is None:
+                return
+
+            loop, thread = self._loop, self._thread
+            # Cancelling the tasks resolves the futures of submit(), and
+            # shutting down the asynchronous generators then closes the
+            # sessions of the requesters.
+            asyncio.run_coroutine_threadsafe(_cancel_tasks(), loop).result()
+            asyncio.run_coroutine_threadsafe(
+                loop.shutdown_asyncgens(), loop
+            ).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            self._loop = self._thread = None
+            atexit.unregister(self.close)
+
+
+async def _cancel_tasks():
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _semaphore(value: int) -> asyncio.Semaphore:
+    return asyncio.Semaphore(value)
+
+
+async def _limited(coroutine: Coroutine, semaphore: asyncio.Semaphore):
+    try:
+        await semaphore.acquire()
+    except BaseException:
+        # Cancelled while waiting, so the coroutine never starts.
+        coroutine.close()
+        raise
+
+    try:
+        return await coroutine
+    finally:
+        semaphore.release()
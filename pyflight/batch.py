@@ -0,0 +1,344 @@
+"""
+Contains the Batcher class, which packs
+concurrent searches into multipart/mixed
+batch requests, and the functions to
+encode and decode their bodies.
+"""
+import asyncio
+import itertools
+import json
+import re
+import time
+from typing import (
+    Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+)
+from urllib.parse import urlsplit, urlunsplit
+
+from . import hooks
+from .mock_server import BATCH_PATH, error_body
+
+Response = Tuple[int, bytes]
+
+_boundaries = itertools.count(1)
+_HEADER_END = re.compile(rb'\r?\n\r?\n')
+_CONTENT_ID = re.compile(r'<(?:response-)?([^>]*)>')
+
+
+def batch_url(url: str) -> Tuple[str, str]:
+    """Get the batch endpoint for the URL of a search.
+
+    Parameters
+    ----------
+        url : str
+            The URL of the search, including the API key, like
+            ``https://www.googleapis.com/qpxExpress/v1/trips/search?key=x``.
+
+    Returns
+    -------
+    Tuple[str, str]
+        The URL of the batch endpoint with the API key of the search,
+        and the path and query of the search to use within the batch.
+        Other query parameters, like a ``fields`` selector, only apply
+        to the search within the batch.
+    """
+
+    parts = urlsplit(url)
+    path = parts.path + ('?' + parts.query if parts.query else '')
+    query = '&'.join(
+        parameter for parameter in parts.query.split('&')
+        if parameter.startswith('key=')
+    )
+    endpoint = urlunsplit(parts._replace(path=BATCH_PATH, query=query))
+    return endpoint, path
+
+
+def encode_batch(path: str, bodies: Sequence[bytes],
+                 boundary: Optional[str] = None) -> Tuple[str, bytes]:
+    """Encode JSON bodies as a batch of POST requests to ``path``.
+
+    Returns
+    -------
+    Tuple[str, bytes]
+        The content type of the batch, which includes the boundary,
+        and its body. The ``Content-ID`` of each part is ``item``
+        followed by its index in ``bodies``.
+    """
+
+    boundary = boundary or 'batch_pyflight_{}'.format(next(_boundaries))
+    delimiter = b'--' + boundary.encode()
+    request_line = 'POST {} HTTP/1.1\r\n'.format(path).encode()
+
+    parts = []
+    for index, body in enumerate(bodies):
+        parts.append(b''.join((
+            delimiter, b'\r\n',
+            b'Content-Type: application/http\r\n',
+            'Content-ID: <item{}>\r\n\r\n'.format(index).encode(),
+            request_line,
+            b'Content-Type: application/json\r\n',
+            'Content-Length: {}\r\n\r\n'.format(len(body)).encode(),
+            body, b'\r\n'
+        )))
+    parts.append(delimiter + b'--\r\n')
+
+    return 'multipart/mixed; boundary=' + boundary, b''.join(parts)
+
+
+def encode_batch_response(responses: Sequence[Tuple[str, int, bytes]],
+                          boundary: Optional[str] = None) \
+        -> Tuple[str, bytes]:
+    """Encode the ``Content-ID``, status code and JSON body of each
+    response to the parts of a batch, like the batch endpoint does.
+
+    Returns
+    -------
+    Tuple[str, bytes]
+        The content type of the response and its body.
+    """
+
+    boundary = boundary or 'batch_pyflight_{}'.format(next(_boundaries))
+    delimiter = b'--' + boundary.encode()
+
+    parts = []
+    for content_id, status, body in responses:
+        parts.append(b''.join((
+            delimiter, b'\r\n',
+            b'Content-Type: application/http\r\n',
+            'Content-ID: <response-{}>\r\n\r\n'.format(content_id).encode(),
+            'HTTP/1.1 {} {}\r\n'.format(
+                status, 'OK' if status == 200 else 'Error'
+            ).encode(),
+            b'Content-Type: application/json; charset=UTF-8\r\n',
+            'Content-Length: {}\r\n\r\n'.format(len(body)).encode(),
+            body, b'\r\n'
+        )))
+    parts.append(delimiter + b'--\r\n')
+
+    return 'multipart/mixed; boundary=' + boundary, b''.join(parts)
+
+
+def _header_fields(lines: List[str]) -> Dict[str, str]:
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def parse_parts(body: bytes, boundary: Optional[str] = None) \
+        -> List[Tuple[Dict[str, str], str, Dict[str, str], bytes]]:
+    """Split the body of a batch into its HTTP messages.
+
+    Parameters
+    ----------
+        body : bytes
+            The ``multipart/mixed`` body.
+        boundary : Optional[str]
+            The boundary of the parts. Defaults to
+            the first delimiter found in the body.
+
+    Returns
+    -------
+    List[Tuple[Dict[str, str], str, Dict[str, str], bytes]]
+        For each part, its headers, the request or status line of
+        the HTTP message it holds, the headers and the body of that
+        message. Header names are lowercase.
+    """
+
+    if boundary is None:
+        match = re.search(rb'^--(\S+)\r?$', body, re.MULTILINE)
+        if match is None:
+            return []
+        boundary = match.group(1).decode('latin-1')
+
+    delimiter = b'--' + boundary.encode('latin-1')
+    messages = []
+    # The first chunk is the preamble, the last one follows the
+    # closing delimiter and starts with '--'.
+    for chunk in body.split(delimiter)[1:]:
+        if chunk.startswith(b'--'):
+            break
+
+        sections = _HEADER_END.split(chunk.strip(b'\r\n'), 2)
+        lines = sections[1].decode('latin-1').splitlines() \
+            if len(sections) > 1 else []
+        if not lines:
+            continue
+        part_headers = _header_fields(
+            sections[0].decode('latin-1').splitlines()
+        )
+        first_line, headers = lines[0], _header_fields(lines[1:])
+        content = sections[2] if len(sections) > 2 else b''
+        messages.append((part_headers, first_line, headers, content))
+
+    return messages
+
+
+def decode_batch(body: bytes, count: int) -> List[Response]:
+    """Decode the response of a batch of ``count`` requests
+    encoded by :func:`encode_batch`.
+
+    Returns
+    -------
+    List[Tuple[int, bytes]]
+        The status code and body of the response to each request, in
+        the order of the requests. Responses are matched by their
+        ``Content-ID``, or by their order if they have none. Requests
+        without a response, or whose response cannot be parsed,
+        get a ``502`` error.
+    """
+
+    responses = [None] * count  # type: List[Optional[Response]]
+    for position, (part_headers, status_line, _, content) in \
+            enumerate(parse_parts(body)):
+        match = _CONTENT_ID.search(part_headers.get('content-id', ''))
+        try:
+            index = position
+            if match is not None and match.group(1).startswith('item'):
+                index = int(match.group(1)[len('item'):])
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            continue
+        if 0 <= index < count:
+            responses[index] = status, content
+
+    missing = json.dumps(error_body(
+        502, 'global', 'batchItemMissing', 'Missing From Batch Response'
+    )).encode()
+    return [
+        response if response is not None else (502, missing)
+        for response in responses
+    ]
+
+
+class Batcher(object):
+    """Packs searches sent at about the same time into batch requests.
+
+    Searches to the same URL are collected for up to ``window`` seconds,
+    or until there are ``max_size`` of them, and then sent as a single
+    ``multipart/mixed`` request to the batch endpoint. Each search still
+    gets its own response or error, so callers do not notice batching
+    other than through fewer HTTP round trips.
+
+    Use it with :meth:`pyflight.enable_batching`.
+
+    Attributes
+    ----------
+        max_size : int
+            The most searches sent in one batch.
+        window : float
+            The seconds to wait for more searches before sending a batch.
+        batches : int
+            The amount of batch requests sent.
+        batched : int
+            The amount of searches sent in them.
+    """
+
+    def __init__(self, max_size: int = 20, window: float = 0.005):
+        """Create a new Batcher.
+
+        Parameters
+        ----------
+            max_size : int
+                The most searches to send in one batch.
+            window : float
+                The seconds to wait for more searches.
+        """
+
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+
+        self.max_size = max_size
+        self.window = window
+        self.batches = 0
+        self.batched = 0
+        # The searches waiting to be sent, by event loop and URL.
+        self._pending = {}  # type: Dict[tuple, list]
+        # Running tasks are only weakly referenced by their loop.
+        self._tasks = set()
+
+    async def fetch(self, url: str, payload: bytes,
+                    send: Callable[[str, bytes, str], Awaitable[Response]]) \
+            -> Response:
+        """Send a search as part of the next batch to its URL.
+
+        Parameters
+        ----------
+            url : str
+                The URL of the search, including the API key.
+            payload : bytes
+                The body of the search, as serialized JSON.
+            send : Callable[[str, bytes, str], Awaitable[Tuple[int, bytes]]]
+                Sends a batch with its URL, body and content type,
+                and returns the status code and body of the response.
+
+        Returns
+        -------
+        Tuple[int, bytes]
+            The status code and the body of the response to the search.
+        """
+
+        loop = asyncio.get_running_loop()
+        key = loop, url
+        future = loop.create_future()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = []
+            loop.call_later(self.window, self._flush, key, pending, send)
+        pending.append((payload, future))
+        if len(pending) >= self.max_size:
+            self._flush(key, pending, send)
+
+        trace = hooks.current()
+        start = time.monotonic()
+        status, body = await future
+        if trace is not None:
+            trace.emit(hooks.DOWNLOAD, start, size=len(body))
+        return status, body
+
+    def _flush(self, key: tuple, pending: list, send):
+        # The timer of a batch that was full before it fired finds
+        # its batch gone, or replaced by a newer one.
+        if self._pending.get(key) is not pending:
+            return
+        del self._pending[key]
+        task = asyncio.ensure_future(self._send(key[1], pending, send))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, url: str, pending: list, send):
+        self.batches += 1
+        self.batched += len(pending)
+        endpoint, path = batch_url(url)
+        content_type, body = encode_batch(
+            path, [payload for payload, _ in pending]
+        )
+        try:
+            status, response = await send(endpoint, body, content_type)
+            if status == 200:
+                responses = decode_batch(response, len(pending))
+            else:
+                # The whole batch was rejected, so is each search.
+                responses = [(status, response)] * len(pending)
+        except BaseException as error:  # pylint: disable=broad-except
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            if isinstance(error, asyncio.CancelledError) \
+                    or not isinstance(error, Exception):
+                raise
+            return
+
+        for (_, future), item in zip(pending, responses):
+            if not future.done():
+                future.set_result(item)
+
+    def stats(self) -> dict:
+        """Get the amount of ``batches`` sent, the amount of searches
+        ``batched`` in them and their ``mean_size``."""
+
+        return {
+            'batches': self.batches,
+            'batched': self.batched,
+            'mean_size': self.batched / self.batches if self.batches else None
+        }
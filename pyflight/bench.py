@@ -0,0 +1,301 @@
+"""
+A load generator that drives many searches
+through the requester and reports throughput,
+latency, errors, connection reuse and the
+time spent parsing.
+
+Run it with ``python -m pyflight.bench``.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from .api import Requester
+from .hooks import DECODE, PARSE
+from .metrics import Metrics
+from .mock_server import MockServer
+from .requester import (
+    Request, Slice, disable_background_loop, enable_background_loop,
+    send_many_async, send_sync, set_transport, use_cassette
+)
+from .transports import TRANSPORTS
+
+MODES = 'async', 'sync', 'background'
+
+# The date of the first search, fixed so that
+# runs replaying a cassette find their responses.
+FIRST_DATE = datetime.date(2018, 1, 1)
+
+
+def make_requests(count: int, distinct: int = 10,
+                  solutions: int = 5) -> Iterator[Request]:
+    """Create ``count`` searches, cycling through ``distinct``
+    departure dates, each asking for ``solutions`` trips."""
+
+    for number in range(count):
+        request = Request()
+        request.adult_count = 1
+        request.solution_count = solutions
+        date = FIRST_DATE + datetime.timedelta(days=number % distinct)
+        request.add_slice(Slice('SFO', 'LAX', date.isoformat()))
+        yield request
+
+
+def _new_client(base_url: str, api_key: str,
+                configure: Optional[Callable[[Requester], None]],
+                metrics: Metrics) -> Requester:
+    client = Requester(base_url)
+    client.api_key = api_key
+    client.hooks.add(metrics)
+    if configure is not None:
+        configure(client)
+    return client
+
+
+def run(base_url: str, bodies: Iterable, concurrency: int = 10,
+        mode: str = 'async', api_key: str = 'bench',
+        configure: Optional[Callable[[Requester], None]] = None) -> dict:
+    """Send searches and measure how the requester copes.
+
+    Parameters
+    ----------
+        base_url : str
+            The URL to send the searches to, see :class:`Requester`.
+        bodies : Iterable[Union[dict, Request, FrozenRequest]]
+            The searches to send, for example from :func:`make_requests`.
+        concurrency : int
+            The amount of searches in flight at once, either as tasks
+            on one event loop or as threads calling :meth:`send_sync`.
+        mode : str
+            ``'async'`` to use :meth:`send_many_async`,
+            ``'sync'`` to use :meth:`send_sync` from a thread pool, or
+            ``'background'`` to do the same with the background loop.
+        api_key : str
+            The API key to send.
+        configure : Optional[Callable[[Requester], None]]
+            Called with the new :class:`Requester` before sending,
+            to set up a cassette, hedging or a parse executor.
+
+    Returns
+    -------
+    dict
+        The report, see :func:`format_report`.
+    """
+
+    if mode not in MODES:
+        raise ValueError('mode must be one of {}'.format(', '.join(MODES)))
+
+    metrics = Metrics()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    if mode == 'async':
+        async def send_all():
+            client = _new_client(base_url, api_key, configure, metrics)
+            async for _ in send_many_async(bodies, concurrency,
+                                           client=client):
+                pass
+
+        asyncio.run(send_all())
+    else:
+        client = _new_client(base_url, api_key, configure, metrics)
+        if mode == 'background':
+            enable_background_loop(client)
+
+        def send(body):
+            try:
+                send_sync(body, client=client)
+            except Exception:  # pylint: disable=broad-except
+                # Counted by the metrics already.
+                pass
+
+        try:
+            with ThreadPoolExecutor(concurrency) as pool:
+                list(pool.map(send, bodies))
+        finally:
+            disable_background_loop(client)
+            client.sync_transport.close_sync()
+
+    elapsed = time.perf_counter() - start
+    return _report(metrics, mode, concurrency, elapsed,
+                   time.process_time() - cpu_start)
+
+
+def _report(metrics: Metrics, mode: str, concurrency: int, elapsed: float,
+            cpu: float) -> dict:
+    snapshot = metrics.snapshot()
+    counters = snapshot['counters']
+
+    requests = 0
+    errors = {}
+    for series in counters.get('requests_total', []):
+        requests += series['value']
+        labels = series['labels']
+        if labels['status'] != '200':
+            name = ' '.join(filter(None, (labels['status'], labels['reason'])))
+            errors[name] = series['value']
+
+    connections = {'new': 0, 'reused': 0}
+    for series in counters.get('connections_total', []):
+        key = 'reused' if series['labels']['reused'] == 'true' else 'new'
+        connections[key] += series['value']
+
+    latency = metrics.histogram('request_duration_seconds')
+    parsing = 0.0
+    for phase in (DECODE, PARSE):
+        histogram = metrics.histogram('phase_duration_seconds', phase=phase)
+        if histogram is not None:
+            parsing += histogram.sum
+
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        'requests': requests,
+        'elapsed': elapsed,
+        'throughput': requests / elapsed if elapsed else 0.0,
+        'latency': latency.as_dict() if latency is not None else None,
+        'errors': errors,
+        'connections': connections,
+        'parse_seconds': parsing,
+        'cpu_seconds': cpu
+    }
+
+
+def format_report(report: dict) -> str:
+    """Format a report returned by :func:`run` for humans.
+
+    The report holds the ``requests`` sent, their ``throughput`` per
+    second, a summary of their ``latency`` in seconds, the ``errors``
+    by status code and :attr:`APIException.reason`, the ``connections``
+    that were ``new`` or ``reused``, the ``parse_seconds`` spent
+    decoding and parsing responses and the ``cpu_seconds`` used by the
+    whole process. Parsing runs on the thread that sent the request
+    unless a parse executor is set, so its time is CPU time there. With
+    a parse executor, it includes the time spent waiting for a worker.
+    """
+
+    lines = [
+        '{} requests, {} mode, concurrency {}'.format(
+            report['requests'], report['mode'], report['concurrency']
+        ),
+        'throughput   {:>10.1f} requests/s'.format(report['throughput']),
+    ]
+
+    latency = report['latency']
+    if latency is not None:
+        lines.append('latency      ' + '  '.join(
+            '{} {:.1f}ms'.format(name, latency[name] * 1000)
+            for name in ('p50', 'p90', 'p99', 'max')
+        ))
+
+    connections = report['connections']
+    lines.append('connections  {} new, {} reused'.format(
+        connections['new'], connections['reused']
+    ))
+    lines.append('parsing      {:>10.3f}s, {:.3f}s CPU in total'.format(
+        report['parse_seconds'], report['cpu_seconds']
+    ))
+
+    if report['errors']:
+        lines.append('errors')
+        for name, count in sorted(report['errors'].items()):
+            lines.append('  {:<36} {:>8}'.format(name, count))
+    else:
+        lines.append('errors       none')
+
+    return '\n'.join(lines)
+
+
+def main(args: Optional[List[str]] = None):
+    """Run the load generator from the command line."""
+
+    parser = argparse.ArgumentParser(
+        description='Send many searches and report how the requester copes.'
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--base-url',
+                        help='the URL to send searches to, ending with '
+                             'the query parameter of the API key')
+    target.add_argument('--mock', action='store_true',
+                        help='send searches to a local mock server')
+    parser.add_argument('--key', default='bench', help='the API key')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--mode', choices=MODES, default='async')
+    parser.add_argument('--distinct', type=int, default=10,
+                        help='the amount of different searches')
+    parser.add_argument('--solutions', type=int, default=5,
+                        help='the trips to ask for in each search')
+    parser.add_argument('--cassette', metavar='DIRECTORY',
+                        help='record responses to or replay them from '
+                             'a cassette')
+    parser.add_argument('--cassette-mode', default='replay',
+                        choices=('record', 'replay', 'auto'))
+    parser.add_argument('--parse-executor', choices=('thread', 'process'))
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS),
+                        help='the library to send requests with')
+    parser.add_argument('--uvloop', action='store_true',
+                        help='run the event loops with uvloop')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='mean latency of the mock server in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='share of errors of the mock server')
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as JSON')
+    args = parser.parse_args(args)
+
+    if args.uvloop:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    executor = None
+    if args.parse_executor == 'thread':
+        executor = ThreadPoolExecutor()
+    elif args.parse_executor == 'process':
+        executor = ProcessPoolExecutor()
+
+    def configure(client: Requester):
+        if args.transport:
+            set_transport(args.transport, client=client)
+        if args.cassette:
+            use_cassette(args.cassette, args.cassette_mode, client=client)
+        if executor is not None:
+            client.parse_executor = executor
+
+    server = None
+    base_url = args.base_url
+    replaying = args.cassette and args.cassette_mode == 'replay'
+    if args.mock or (base_url is None and not replaying):
+        latency = None
+        if args.latency:
+            latency = lambda rng: rng.expovariate(1 / args.latency)  # noqa
+        server = MockServer(latency=latency, error_rate=args.error_rate)
+        base_url = server.start_thread()
+    elif base_url is None:
+        # Only replaying, nothing is sent.
+        base_url = 'http://127.0.0.1:9/?key='
+
+    try:
+        report = run(
+            base_url,
+            make_requests(args.requests, args.distinct, args.solutions),
+            args.concurrency, args.mode, args.key, configure
+        )
+    finally:
+        if server is not None:
+            server.stop_thread()
+        if executor is not None:
+            executor.shutdown()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Contains the FrozenRequest class, an
+immutable and hashable form of a request
+body with a canonical serialization.
+"""
+import hashlib
+import json
+import re
+from typing import TYPE_CHECKING, Any, Union
+
+if TYPE_CHECKING:
+    from .requester import Request
+
+CARRIER_KEYS = 'permittedCarrier', 'prohibitedCarrier'
+SNAKE_CASE_REGEX = re.compile(r'_([a-z])')
+
+
+def _camel_case(key: str) -> str:
+    return SNAKE_CASE_REGEX.sub(lambda m: m.group(1).upper(), key)
+
+
+def canonicalize(value: Any, key: str = '') -> Any:
+    """Get the canonical form of a request body or a part of it.
+
+    Keys are converted to the ``camelCase`` used by the API, carrier lists
+    are sorted and de-duplicated, and ``kind`` keys as well as keys whose
+    value is ``None``, ``False``, an empty list or an empty dictionary are
+    dropped, just like passenger counts of ``0``, since the API treats
+    them the same as missing keys.
+    Request bodies that the API would treat the same therefore
+    have the same canonical form.
+
+    Parameters
+    ----------
+        value : Any
+            The request body as a dictionary, or any value in it.
+        key : str
+            The key under which ``value`` is stored, if any.
+
+    Returns
+    -------
+    Any
+        The canonical form of the given value.
+    """
+
+    if isinstance(value, dict):
+        canonical = {}
+        for name, item in value.items():
+            name = _camel_case(name)
+            if name == 'kind':
+                continue
+            item = canonicalize(item, name)
+            if item is None or item is False or item == [] or item == {} \
+                    or item == 0 and name.endswith('Count'):
+                canonical.pop(name, None)
+                continue
+            canonical[name] = item
+        return canonical
+
+    if isinstance(value, (list, tuple)):
+        if key in CARRIER_KEYS:
+            return sorted(set(value))
+        return [canonicalize(v) for v in value]
+
+    return value
+
+
+# Dictionaries are frozen into frozensets of their items and lists into
+# tuples, so that each can be thawed back into what it was.
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return frozenset((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, frozenset):
+        return {k: _thaw(v) for k, v in value}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class FrozenRequest(object):
+    r"""An immutable, hashable request body in canonical form.
+
+    Two :class:`FrozenRequest`\s compare equal and have the same ``digest``
+    whenever the API would treat their bodies the same, see
+    :func:`canonicalize`. This makes them usable as keys for caching,
+    de-duplication or coalescing of identical requests. The serialized
+    JSON and the digest are only computed once.
+
+    Copies with a single change, such as :meth:`with_date`, share all
+    unchanged parts with the original instead of copying the whole body.
+
+    A :class:`FrozenRequest` can be sent with
+    :meth:`pyflight.send_async` and :meth:`pyflight.send_sync`,
+    which will then send its cached ``json_bytes``.
+
+    This class supports various *magic methods*:
+
+    ``x == y``
+        Checks if two :class:`FrozenRequest`\s have the same canonical body.
+
+    ``hash(x)``
+        Hashes the canonical body, so that :class:`FrozenRequest`\s
+        can be used as dictionary keys or in sets.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        frozen = my_request.freeze()
+        cache[frozen] = pyflight.send_sync(frozen)
+
+        next_day = frozen.with_date('2017-09-20')
+        if next_day not in cache:
+            ...
+    """
+
+    __slots__ = ('_options', '_slices', '_json', '_digest', '_hash')
+
+    def __init__(self, body: Union[dict, 'Request']):
+        """Create a new FrozenRequest.
+
+        Parameters
+        ----------
+            body : Union[dict, :class:`Request`]
+                The request body to freeze, as a dictionary following
+                the structure expected by the API or as a :class:`Request`.
+        """
+
+        if not isinstance(body, dict):
+            body = body.as_dict()
+
+        request = dict(canonicalize(body).get('request', {}))
+        request.setdefault('solutions', 1)
+        slices = request.pop('slice', [])
+
+        self._set(_freeze(request), tuple(_freeze(s) for s in slices))
+
+    def _set(self, options: frozenset, slices: tuple):
+        self._options = options
+        self._slices = slices
+        self._json = None
+        self._digest = None
+        self._hash = None
+
+    @classmethod
+    def _from_parts(cls, options: frozenset,
+                    slices: tuple) -> 'FrozenRequest':
+        frozen = cls.__new__(cls)
+        frozen._set(options, slices)
+        return frozen
+
+    def __eq__(self, other):
+        """Compare the canonical bodies of two :class:`FrozenRequest`\\s."""
+
+        if not isinstance(other, FrozenRequest):
+            return NotImplemented
+
+        return self._options == other._options \
+            and self._slices == other._slices
+
+    def __hash__(self):
+        """Hash the canonical body of this :class:`FrozenRequest`."""
+
+        if self._hash is None:
+            self._hash = hash((self._options, self._slices))
+
+        return self._hash
+
+    def __repr__(self):
+        return '<FrozenRequest {}>'.format(self.digest[:16])
+
+    def __reduce__(self):
+        return FrozenRequest._from_parts, (self._options, self._slices)
+
+    @property
+    def slices(self) -> list:
+        """The canonical slices of this request, as new dictionaries."""
+
+        return [_thaw(s) for s in self._slices]
+
+    @property
+    def json_bytes(self) -> bytes:
+        """The canonical body serialized as compact JSON with sorted keys."""
+
+        if self._json is None:
+            self._json = json.dumps(
+                self.as_dict(), sort_keys=True, separators=(',', ':')
+            ).encode()
+
+        return self._json
+
+    @property
+    def digest(self) -> str:
+        """A stable SHA-256 hex digest of ``json_bytes``, which stays
+        the same across processes and Python versions."""
+
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.json_bytes).hexdigest()
+
+        return self._digest
+
+    def as_dict(self) -> dict:
+        """Get the canonical body of this request as a new dictionary."""
+
+        request = _thaw(self._options)
+        request['slice'] = self.slices
+        return {'request': request}
+
+    def replace(self, **options: Any) -> 'FrozenRequest':
+        """Get a copy of this request with some of its options changed,
+        for example ``frozen.replace(solutions=10, sale_country='DE')``.
+
+        Passenger counts are set with :meth:`with_passengers` instead.
+        Keys may be given in ``snake_case`` and are converted to the keys
+        of the API. Setting an option to ``None`` removes it.
+        """
+
+        request = _thaw(self._options)
+        request.update(options)
+        return FrozenRequest._from_parts(
+            _freeze(canonicalize(request)), self._slices
+        )
+
+    def with_passengers(self, **counts: int) -> 'FrozenRequest':
+        """Get a copy of this request with some of its passenger counts
+        changed, for example ``frozen.with_passengers(adult_count=2)``."""
+
+        passengers = _thaw(dict(self._options).get('passengers', frozenset()))
+        passengers.update(counts)
+        return self.replace(passengers=passengers)
+
+    def with_slice(self, index: int, **changes: Any) -> 'FrozenRequest':
+        """Get a copy of this request in which the slice at ``index`` has
+        the given changes applied, for example
+        ``frozen.with_slice(1, date='2017-09-25', max_stops=0)``.
+
+        All other slices are shared with this request.
+        Setting a key to ``None`` removes it.
+        """
+
+        slice_ = _thaw(self._slices[index])
+        slice_.update(changes)
+
+        slices = list(self._slices)
+        slices[index] = _freeze(canonicalize(slice_))
+        return FrozenRequest._from_parts(self._options, tuple(slices))
+
+    def with_date(self, date: str, index: int = 0) -> 'FrozenRequest':
+        """Get a copy of this request with the date of
+        the slice at ``index`` (the first one by default) changed."""
+
+        return self.with_slice(index, date=date)
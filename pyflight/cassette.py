@@ -0,0 +1,308 @@
+"""
+Contains the Cassette class, which records
+responses of the API to compressed files
+named after the canonical request, and
+replays them instead of sending requests.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Awaitable, Callable, Iterator, Optional, Tuple, Union
+
+from .canonical import FrozenRequest
+from .fields import fields_selector
+
+RECORD = 'record'
+REPLAY = 'replay'
+AUTO = 'auto'
+MODES = RECORD, REPLAY, AUTO
+
+Response = Tuple[int, bytes]
+
+
+class CassetteMiss(LookupError):
+    """
+    Raised in replay mode when a :class:`Cassette`
+    holds no response for a request.
+
+    Attributes
+    ----------
+    digest : str
+        The digest of the canonical request.
+    """
+
+    def __init__(self, digest: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.digest = digest
+
+    def __str__(self):
+        return 'No recorded response for request {}'.format(self.digest)
+
+
+def _frozen(payload: Union[dict, bytes, FrozenRequest]) -> FrozenRequest:
+    if isinstance(payload, FrozenRequest):
+        return payload
+    if isinstance(payload, bytes):
+        payload = json.loads(payload)
+    return FrozenRequest(payload)
+
+
+class Cassette(object):
+    """A store of recorded responses, keyed by canonical request.
+
+    Each response is saved as a gzip-compressed JSON file named after the
+    :attr:`FrozenRequest.digest` of its request, together with its status
+    code and how long it took. Requests that only differ in ways that do
+    not change the search, like the order of keys, share one response.
+    Partial responses, asked for with a ``fields`` selector, are saved
+    apart from full responses and from those of other selectors.
+
+    In ``'record'`` mode, every request is sent and its response is saved,
+    replacing any earlier one. In ``'replay'`` mode, no request is sent:
+    saved responses are returned, and a :class:`CassetteMiss` is raised for
+    others. In ``'auto'`` mode, saved responses are replayed and others
+    are sent and recorded. Error responses are recorded and replayed too.
+
+    Use it with :meth:`pyflight.use_cassette`.
+
+    Attributes
+    ----------
+        path : str
+            The directory the responses are saved in.
+        mode : str
+            One of ``'record'``, ``'replay'`` or ``'auto'``.
+        simulate_latency : bool
+            Whether replaying a response waits as long
+            as the recorded request took.
+        latency_scale : float
+            The factor applied to the recorded latency when simulating it.
+        hits : int
+            The amount of replayed responses.
+        misses : int
+            The amount of requests with no saved response,
+            outside of ``'record'`` mode.
+        recorded : int
+            The amount of responses saved.
+    """
+
+    def __init__(self, path: str, mode: str = AUTO,
+                 simulate_latency: bool = False, latency_scale: float = 1.0):
+        """Create a new Cassette, creating its directory if needed.
+
+        Parameters
+        ----------
+            path : str
+                The directory to save the responses in.
+            mode : str
+                One of ``'record'``, ``'replay'`` or ``'auto'``.
+            simulate_latency : bool
+                Whether to wait as long as recorded when replaying.
+            latency_scale : float
+                The factor applied to the recorded latency.
+        """
+
+        if mode not in MODES:
+            raise ValueError('mode must be one of {}'.format(', '.join(MODES)))
+
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the amount of saved responses."""
+
+        return sum(1 for _ in self._files())
+
+    def _file(self, digest: str) -> str:
+        return os.path.join(self.path, digest[:2], digest + '.json.gz')
+
+    def _files(self) -> Iterator[str]:
+        for directory, _, names in os.walk(self.path):
+            for name in names:
+                if name.endswith('.json.gz'):
+                    yield os.path.join(directory, name)
+
+    @staticmethod
+    def key(payload: Union[dict, bytes, FrozenRequest],
+            fields: Optional[str] = None) -> str:
+        """Get the digest of the canonical form of a request body,
+        combined with the ``fields`` selector it is sent with, if any."""
+
+        digest = _frozen(payload).digest
+        if fields is None:
+            return digest
+        return hashlib.sha256('{}?fields={}'.format(
+            digest, fields_selector(fields)
+        ).encode('utf-8')).hexdigest()
+
+    def load(self, payload: Union[dict, bytes, FrozenRequest],
+             fields: Optional[str] = None) -> Optional[dict]:
+        """Get the entry saved for a request, ``None`` if there is none.
+
+        Returns
+        -------
+        Optional[dict]
+            The ``request`` as canonical dictionary, the ``fields``
+            selector, the ``status`` code, the ``body`` of the response
+            as string, the ``latency`` in seconds and the time it was
+            ``recorded`` at.
+        """
+
+        try:
+            with gzip.open(self._file(self.key(payload, fields)), 'rt',
+                           encoding='utf-8') as entry:
+                return json.load(entry)
+        except FileNotFoundError:
+            return None
+
+    def save(self, payload: Union[dict, bytes, FrozenRequest], status: int,
+             body: bytes, latency: float = 0.0,
+             fields: Optional[str] = None):
+        """Save a response for a request, for example one captured in
+        production to warm up the cassette.
+
+        Parameters
+        ----------
+            payload : Union[dict, bytes, FrozenRequest]
+                The body of the request.
+            status : int
+                The status code of the response.
+            body : bytes
+                The body of the response.
+            latency : float
+                How many seconds the request took.
+            fields : Optional[str]
+                The ``fields`` selector the request was sent with, if any.
+        """
+
+        frozen = _frozen(payload)
+        path = self._file(self.key(frozen, fields))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        entry = {
+            'request': frozen.as_dict(),
+            'fields': fields,
+            'status': status,
+            'body': body.decode('utf-8'),
+            'latency': latency,
+            'recorded': time.time()
+        }
+        # Write to a temporary file first, so that readers
+        # never see a partially written response.
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(handle, 'wb') as raw, \
+                    gzip.open(raw, 'wt', encoding='utf-8') as output:
+                json.dump(entry, output)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        with self._lock:
+            self.recorded += 1
+
+    def entries(self) -> Iterator[dict]:
+        """Returns a generator over all saved entries, see :meth:`load`."""
+
+        for path in self._files():
+            with gzip.open(path, 'rt', encoding='utf-8') as entry:
+                yield json.load(entry)
+
+    def _lookup(self, payload, fields: Optional[str]) \
+            -> Tuple[FrozenRequest, Optional[dict]]:
+        frozen = _frozen(payload)
+        if self.mode == RECORD:
+            return frozen, None
+
+        entry = self.load(frozen, fields)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if entry is None and self.mode == REPLAY:
+            raise CassetteMiss(self.key(frozen, fields))
+        return frozen, entry
+
+    def _delay(self, entry: dict) -> float:
+        if not self.simulate_latency:
+            return 0.0
+        return entry.get('latency', 0.0) * self.latency_scale
+
+    async def fetch(self, payload: Union[dict, bytes],
+                    send: Callable[[], Awaitable[Response]],
+                    fields: Optional[str] = None) -> Response:
+        """Get the response to a request, from the cassette or by calling
+        ``send`` and recording its result, depending on the mode.
+
+        Parameters
+        ----------
+            payload : Union[dict, bytes]
+                The body of the request.
+            send : Callable[[], Awaitable[Tuple[int, bytes]]]
+                Sends the request and returns the
+                status code and body of the response.
+            fields : Optional[str]
+                The ``fields`` selector the request is sent with, if any.
+
+        Returns
+        -------
+        Tuple[int, bytes]
+            The status code and the body of the response.
+        """
+
+        frozen, entry = self._lookup(payload, fields)
+        if entry is not None:
+            delay = self._delay(entry)
+            if delay:
+                await asyncio.sleep(delay)
+            return entry['status'], entry['body'].encode('utf-8')
+
+        start = time.monotonic()
+        status, body = await send()
+        self.save(frozen, status, body, time.monotonic() - start, fields)
+        return status, body
+
+    def fetch_sync(self, payload: Union[dict, bytes],
+                   send: Callable[[], Response],
+                   fields: Optional[str] = None) -> Response:
+        """Like :meth:`fetch`, but blocking."""
+
+        frozen, entry = self._lookup(payload, fields)
+        if entry is not None:
+            delay = self._delay(entry)
+            if delay:
+                time.sleep(delay)
+            return entry['status'], entry['body'].encode('utf-8')
+
+        start = time.monotonic()
+        status, body = send()
+        self.save(frozen, status, body, time.monotonic() - start, fields)
+        return status, body
+
+    def stats(self) -> dict:
+        """Get the amount of ``hits``, ``misses`` and ``recorded``
+        responses, and the ``hit_rate`` of all lookups."""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'recorded': self.recorded,
+                'hit_rate': self.hits / lookups if lookups else None
+            }
@@ -0,0 +1,291 @@
+"""
+Contains the CircuitBreaker class, which
+stops sending requests to an endpoint
+while it keeps failing and probes it
+for recovery with a few trial requests.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request while the
+    circuit breaker of its endpoint is open.
+
+    Attributes
+    ----------
+    endpoint : str
+        The endpoint whose circuit breaker is open.
+    retry_after : float
+        The amount of seconds until trial requests are allowed again.
+    """
+
+    def __init__(self, endpoint: str, retry_after: float, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return 'Circuit breaker for {} is open, retry in {:.1f}s'.format(
+            self.endpoint, self.retry_after
+        )
+
+
+def is_failure(error: BaseException) -> bool:
+    """Check whether an Exception raised by a request indicates a problem
+    with the endpoint rather than with the request itself.
+
+    Server errors (status codes of 500 and above), ``429 Too Many Requests``
+    and any errors other than an :class:`APIException`, such as connection
+    errors or timeouts, are failures. Other client errors are not.
+    """
+
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code >= 500 or code == 429
+
+    return True
+
+
+class _Window(object):
+    """Counts calls, failures and slow calls over the last ``duration``
+    seconds, in ``buckets`` ring buffer slots."""
+
+    __slots__ = ('width', 'epochs', 'calls', 'failures', 'slow')
+
+    def __init__(self, duration: float, buckets: int):
+        self.width = duration / buckets
+        self.epochs = [-1] * buckets
+        self.calls = [0] * buckets
+        self.failures = [0] * buckets
+        self.slow = [0] * buckets
+
+    def add(self, now: float, failed: bool, slow: bool):
+        epoch = int(now / self.width)
+        slot = epoch % len(self.epochs)
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.calls[slot] = self.failures[slot] = self.slow[slot] = 0
+
+        self.calls[slot] += 1
+        self.failures[slot] += failed
+        self.slow[slot] += slow
+
+    def totals(self, now: float):
+        oldest = int(now / self.width) - len(self.epochs)
+        calls = failures = slow = 0
+        for slot, epoch in enumerate(self.epochs):
+            if epoch > oldest:
+                calls += self.calls[slot]
+                failures += self.failures[slot]
+                slow += self.slow[slot]
+
+        return calls, failures, slow
+
+    def clear(self):
+        self.epochs = [-1] * len(self.epochs)
+
+
+class CircuitBreaker(object):
+    r"""A circuit breaker for a single endpoint.
+
+    While *closed*, requests are sent normally and their outcome is
+    counted over a rolling window. Once at least ``min_calls`` requests
+    were made in the window and either the share of failures reaches
+    ``error_rate`` or the share of requests slower than ``slow_call``
+    seconds reaches ``slow_rate``, the circuit *opens*: requests fail
+    immediately with a :class:`CircuitOpenError` for ``open_duration``
+    seconds. After that, the circuit is *half open* and lets up to
+    ``trial_calls`` requests through. If they all succeed the circuit
+    closes again, and the first failure opens it again.
+
+    Circuit breakers are enabled for all endpoints of the requester
+    with :meth:`pyflight.enable_circuit_breakers`. They can be used from
+    multiple threads at once.
+
+    Attributes
+    ----------
+        endpoint : str
+            The endpoint guarded by this circuit breaker.
+        state : str
+            One of ``'closed'``, ``'open'`` or ``'half_open'``.
+    """
+
+    def __init__(self, endpoint: str, error_rate: float = 0.5,
+                 slow_call: Optional[float] = None, slow_rate: float = 0.5,
+                 min_calls: int = 20, window: float = 10.0,
+                 open_duration: float = 30.0, trial_calls: int = 3,
+                 failure: Callable[[BaseException], bool] = is_failure):
+        """Create a new, closed CircuitBreaker.
+
+        Parameters
+        ----------
+            endpoint : str
+                The endpoint guarded by this circuit breaker.
+            error_rate : float
+                The share of failed requests, from 0 to 1,
+                at which the circuit opens.
+            slow_call : Optional[float]
+                The amount of seconds after which a request counts
+                as slow. If ``None``, latency is not considered.
+            slow_rate : float
+                The share of slow requests, from 0 to 1,
+                at which the circuit opens.
+            min_calls : int
+                The minimum amount of requests in the window
+                before the circuit may open.
+            window : float
+                The length of the rolling window, in seconds.
+            open_duration : float
+                The amount of seconds the circuit stays open.
+            trial_calls : int
+                The amount of successful trial requests needed
+                to close the circuit again.
+            failure : Callable[[BaseException], bool]
+                Decides whether an Exception raised by a
+                request counts as a failure. Defaults to
+                :func:`is_failure`.
+        """
+
+        self.endpoint = endpoint
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.open_duration = open_duration
+        self.trial_calls = trial_calls
+        self.failure = failure
+
+        self.state = CLOSED
+        self._window = _Window(window, 10)
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[
+            ['CircuitBreaker', str, str], None]):
+        """Call ``listener`` with this circuit breaker, the old and
+        the new state whenever the state of this circuit breaker changes.
+        """
+
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable):
+        """Stop calling a listener added with :meth:`add_listener`."""
+
+        self._listeners.remove(listener)
+
+    def _transition(self, state: str, now: float) -> Tuple[str, str]:
+        old, self.state = self.state, state
+        if state == OPEN:
+            self._opened_at = now
+        elif state == CLOSED:
+            self._window.clear()
+        self._trials = self._trial_successes = 0
+        return old, state
+
+    def _notify(self, change: Optional[Tuple[str, str]]):
+        if change is not None:
+            for listener in list(self._listeners):
+                listener(self, *change)
+
+    def allow(self) -> float:
+        """Check whether a request may be sent now.
+
+        Raises
+        ------
+        :class:`CircuitOpenError`
+            If the circuit is open, or half open and
+            all trial requests are in flight already.
+
+        Returns
+        -------
+        float
+            The time the request started, to be passed to :meth:`record`.
+        """
+
+        now = time.monotonic()
+        change = None
+        rejected = False
+        with self._lock:
+            if self.state == OPEN:
+                retry_after = self._opened_at + self.open_duration - now
+                if retry_after > 0:
+                    raise CircuitOpenError(self.endpoint, retry_after)
+                change = self._transition(HALF_OPEN, now)
+
+            if self.state == HALF_OPEN:
+                rejected = self._trials >= self.trial_calls
+                self._trials += not rejected
+
+        self._notify(change)
+        if rejected:
+            raise CircuitOpenError(self.endpoint, 0.0)
+        return now
+
+    def record(self, start: float, error: Optional[BaseException] = None):
+        """Record the outcome of a request allowed by :meth:`allow`.
+
+        Parameters
+        ----------
+            start : float
+                The value returned by :meth:`allow`.
+            error : Optional[BaseException]
+                The Exception raised by the request, if any.
+        """
+
+        now = time.monotonic()
+        # Cancelled requests, e.g. the losers of hedged requests,
+        # tell nothing about the health of the endpoint.
+        cancelled = isinstance(error, asyncio.CancelledError)
+        failed = error is not None and not cancelled and self.failure(error)
+        slow = self.slow_call is not None and now - start > self.slow_call
+
+        change = None
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if cancelled:
+                    self._trials -= 1
+                elif failed or slow:
+                    change = self._transition(OPEN, now)
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.trial_calls:
+                        change = self._transition(CLOSED, now)
+
+            elif self.state == CLOSED and not cancelled:
+                self._window.add(now, failed, slow)
+                calls, failures, slow_calls = self._window.totals(now)
+                if calls >= self.min_calls and (
+                        failures >= calls * self.error_rate or
+                        self.slow_call is not None and
+                        slow_calls >= calls * self.slow_rate):
+                    change = self._transition(OPEN, now)
+
+        self._notify(change)
+
+    def stats(self) -> dict:
+        """Get the state of this circuit breaker and the
+        amount of ``calls``, ``failures`` and ``slow_calls``
+        in its current window."""
+
+        now = time.monotonic()
+        with self._lock:
+            calls, failures, slow = self._window.totals(now)
+
+        return {
+            'endpoint': self.endpoint,
+            'state': self.state,
+            'calls': calls,
+            'failures': failures,
+            'slow_calls': slow
+        }
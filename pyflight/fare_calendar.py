@@ -0,0 +1,320 @@
+"""
+Contains the FareCalendar class, which
+keeps track of the cheapest price per
+day for a set of routes over a range
+of dates.
+"""
+import datetime
+import math
+import time
+from array import array
+from typing import (
+    Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+)
+
+from .api import Requester
+from .canonical import FrozenRequest
+from .requester import Request, Slice, send_many_async
+from .result import Result, split_price
+
+Cell = Tuple[str, str, str]
+
+
+class FareCalendar(object):
+    r"""A matrix of the minimum price and the cheapest trip for each
+    combination of origin, destination and date.
+
+    Every cell is filled by sending one one-way :class:`Request` for its
+    route and date. Prices, trip IDs and the time each cell was last updated
+    are stored in flat arrays indexed by cell, so large calendars stay
+    compact. Cells are updated as soon as their :class:`Result` arrives,
+    and later runs only refresh cells that are older than ``max_age``.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        calendar = FareCalendar(['SFO'], ['LAX', 'JFK'],
+                                datetime.date(2017, 9, 1), days=90)
+        await calendar.run(concurrency=10)
+        print(calendar.price('SFO', 'LAX', '2017-09-19'))
+
+    Attributes
+    ----------
+        routes : List[Tuple[str, str]]
+            The ``(origin, destination)`` pairs tracked by this calendar.
+            Pairs with the same origin and destination are left out.
+        dates : List[str]
+            The dates tracked by this calendar, in the format YYYY-MM-DD.
+        max_age : float
+            The amount of seconds after which a cell is considered stale.
+        currency : str
+            The currency of the stored prices, ``None`` until
+            the first :class:`Result` has been recorded.
+        errors : Dict[Tuple[str, str, str], Exception]
+            Exceptions raised while refreshing a cell during the last run,
+            keyed by ``(origin, destination, date)``.
+    """
+
+    def __init__(self, origins: Iterable[str], destinations: Iterable[str],
+                 start_date: Union[datetime.date, str], days: int,
+                 adult_count: int = 1, max_age: float = 3600.0,
+                 request_factory: Optional[
+                     Callable[[str, str, str], Request]] = None):
+        """Create a new, empty FareCalendar.
+
+        Parameters
+        ----------
+            origins : Iterable[str]
+                The airport or city IATA designators to depart from.
+            destinations : Iterable[str]
+                The airport or city IATA designators to arrive at.
+            start_date : Union[datetime.date, str]
+                The first date of the calendar.
+            days : int
+                The amount of consecutive days to track.
+            adult_count : int
+                The amount of adult passengers used for each request.
+            max_age : float
+                The amount of seconds after which a cell is stale.
+            request_factory : Optional[Callable[[str, str, str], Request]]
+                Called with origin, destination and date to build the
+                :class:`Request` for a cell, for example to set a cabin
+                or a sale country. Defaults to a one-way request
+                for ``adult_count`` adults.
+        """
+
+        if days < 1:
+            raise ValueError('days must be at least 1')
+
+        if isinstance(start_date, str):
+            start_date = datetime.datetime.strptime(
+                start_date, '%Y-%m-%d').date()
+
+        self.routes = [
+            (origin, destination)
+            for origin in dict.fromkeys(origins)
+            for destination in dict.fromkeys(destinations)
+            if origin != destination
+        ]
+        self.dates = [
+            (start_date + datetime.timedelta(days=day)).isoformat()
+            for day in range(days)
+        ]
+        self.max_age = max_age
+        self.adult_count = adult_count
+        self.request_factory = request_factory or self._default_request
+        self.currency = None
+        self.errors = {}
+
+        self._route_index = {r: i for i, r in enumerate(self.routes)}
+        self._date_index = {d: i for i, d in enumerate(self.dates)}
+
+        size = len(self.routes) * len(self.dates)
+        self._prices = array('d', [math.nan]) * size
+        self._updated = array('d', [0.0]) * size
+        self._trip_ids = [None] * size
+
+    def __len__(self):
+        """Returns the amount of cells in this :class:`FareCalendar`."""
+
+        return len(self._prices)
+
+    def _default_request(self, origin: str, destination: str,
+                         date: str) -> Request:
+        request = Request()
+        request.adult_count = self.adult_count
+        return request.add_slice(Slice(origin, destination, date))
+
+    def _index(self, origin: str, destination: str, date: str) -> int:
+        try:
+            route = self._route_index[(origin, destination)]
+            day = self._date_index[date]
+        except KeyError:
+            raise KeyError(
+                'No cell for {} - {} on {}'.format(origin, destination, date)
+            ) from None
+
+        return route * len(self.dates) + day
+
+    def _cell(self, index: int) -> Cell:
+        route, day = divmod(index, len(self.dates))
+        return self.routes[route] + (self.dates[day],)
+
+    def price(self, origin: str, destination: str,
+              date: str) -> Optional[float]:
+        """Get the minimum price of a cell.
+
+        Returns
+        -------
+        float
+            The cheapest total price found for the cell, in ``currency``.
+        None
+            If the cell has not been filled or no trip was found.
+        """
+
+        price = self._prices[self._index(origin, destination, date)]
+        return None if math.isnan(price) else price
+
+    def cheapest_trip(self, origin: str, destination: str,
+                      date: str) -> Optional[str]:
+        """Get the ID of the cheapest :class:`Trip` of a cell,
+        or ``None`` if the cell has not been filled."""
+
+        return self._trip_ids[self._index(origin, destination, date)]
+
+    def is_stale(self, origin: str, destination: str, date: str,
+                 now: Optional[float] = None) -> bool:
+        """Check whether a cell was never filled or is older than ``max_age``.
+        """
+
+        return self._is_stale(self._index(origin, destination, date),
+                              time.time() if now is None else now)
+
+    def _is_stale(self, index: int, now: float) -> bool:
+        updated = self._updated[index]
+        return updated == 0.0 or now - updated > self.max_age
+
+    def stale_cells(self, now: Optional[float] = None) -> Iterator[Cell]:
+        """Returns a generator over the ``(origin, destination, date)``
+        tuples of all cells that need to be refreshed."""
+
+        now = time.time() if now is None else now
+        return (
+            self._cell(i) for i in range(len(self)) if self._is_stale(i, now)
+        )
+
+    def record(self, origin: str, destination: str, date: str,
+               result: Result, now: Optional[float] = None):
+        """Update a cell from the :class:`Result` of its request.
+
+        The previous value of the cell is replaced, since it
+        is older than the given :class:`Result`.
+
+        Raises
+        ------
+        :class:`ValueError`
+            If the prices in the :class:`Result` are in a different
+            currency than the prices already stored in this calendar.
+        """
+
+        index = self._index(origin, destination, date)
+        best_price, best_trip = math.nan, None
+
+        for trip in result.trips:
+            currency, amount = split_price(trip.total_price)
+            if self.currency is None:
+                self.currency = currency
+            elif currency != self.currency:
+                raise ValueError('Expected prices in {}, got {}'.format(
+                    self.currency, trip.total_price
+                ))
+
+            if best_trip is None or amount < best_price:
+                best_price, best_trip = amount, trip.id
+
+        self._prices[index] = best_price
+        self._trip_ids[index] = best_trip
+        self._updated[index] = time.time() if now is None else now
+
+    def requests(self, only_stale: bool = True) -> Iterator[
+            Tuple[Cell, Request]]:
+        """Generate the requests needed to fill this calendar.
+
+        Parameters
+        ----------
+            only_stale : bool
+                Whether to only generate requests for stale cells.
+
+        Returns
+        -------
+        Generator[Tuple[Tuple[str, str, str], :class:`Request`]]
+            The ``(origin, destination, date)`` of each cell
+            together with the :class:`Request` for it.
+        """
+
+        cells = self.stale_cells() if only_stale else map(
+            self._cell, range(len(self))
+        )
+
+        return ((cell, self.request_factory(*cell)) for cell in cells)
+
+    async def run(self, concurrency: int = 10, only_stale: bool = True,
+                  client: Optional[Requester] = None) -> int:
+        """Send the requests for this calendar and record their results.
+
+        Requests are sent through :meth:`pyflight.send_many_async`,
+        with at most ``concurrency`` requests in flight at once.
+        Errors do not abort the run, but are stored in ``errors``.
+
+        Parameters
+        ----------
+            concurrency : int
+                The maximum amount of requests in flight at once.
+            only_stale : bool
+                Whether to only refresh stale cells.
+            client : Optional[Requester]
+                The :class:`Requester` to send the requests with.
+                Defaults to the shared requester.
+
+        Returns
+        -------
+        int
+            The amount of cells that were updated successfully.
+        """
+
+        # Cells by their request. Equal requests get the same results,
+        # so they are assigned to their cells in the order they return.
+        # Requests are frozen once, as they are generated, and sent in that
+        # form, so a factory may reuse and mutate a single Request.
+        in_flight = {}  # type: Dict[FrozenRequest, List[Cell]]
+        self.errors = {}
+
+        def bodies():
+            for cell, request in self.requests(only_stale):
+                key = FrozenRequest(request)
+                in_flight.setdefault(key, []).append(cell)
+                yield key
+
+        updated = 0
+        async for key, result in send_many_async(
+                bodies(), concurrency=concurrency, client=client):
+            cells = in_flight[key]
+            cell = cells.pop(0)
+            if not cells:
+                del in_flight[key]
+            if isinstance(result, Exception):
+                self.errors[cell] = result
+                continue
+
+            try:
+                self.record(*cell, result)
+            except ValueError as err:
+                self.errors[cell] = err
+            else:
+                updated += 1
+
+        return updated
+
+    def as_dict(self) -> dict:
+        """Get a dictionary representation of this :class:`FareCalendar`.
+
+        Returns
+        -------
+        dict
+            Maps each origin to a dictionary of destinations, which maps
+            each date to the ``price`` and ``trip_id`` of that cell.
+        """
+
+        calendar = {}
+        for index in range(len(self)):
+            origin, destination, date = self._cell(index)
+            price = self._prices[index]
+            calendar.setdefault(origin, {}).setdefault(destination, {})[
+                date] = {
+                    'price': None if math.isnan(price) else price,
+                    'trip_id': self._trip_ids[index]
+                }
+
+        return calendar
@@ -0,0 +1,223 @@
+"""
+Contains the functions to build selectors
+for partial responses, which only hold the
+fields asked for, and to apply them to
+responses like the API does.
+"""
+import functools
+from typing import Dict, Iterable, Optional, Tuple, Union
+from urllib.parse import parse_qs, quote, urlsplit
+
+# Maps each selected key to the selection within it,
+# or to None if everything within it is selected.
+Tree = Dict[str, Optional[dict]]
+
+# The prices, carriers, times and durations of the trips,
+# which is all that most uses of a response need.
+SUMMARY = (
+    'trips(requestId,data/carrier,tripOption(id,saleTotal,slice('
+    'duration,segment(duration,cabin,flight,leg('
+    'departureTime,arrivalTime,duration,origin,destination)))))'
+)
+
+
+def _merge(tree: Tree, key: str, subtree: Optional[Tree]):
+    if key not in tree:
+        tree[key] = subtree
+    elif tree[key] is None or subtree is None:
+        # Selecting all of a field includes any selection within it.
+        tree[key] = None
+    else:
+        for name, selection in subtree.items():
+            _merge(tree[key], name, selection)
+
+
+def _parse(selector: str, position: int) -> Tuple[Tree, int]:
+    tree = {}  # type: Tree
+    while True:
+        end = position
+        while end < len(selector) and selector[end] not in ',()':
+            end += 1
+        path = selector[position:end].strip().split('/')
+        if not all(path):
+            raise ValueError(
+                'Empty field name at {} in {!r}'.format(position, selector)
+            )
+
+        subtree = None
+        if end < len(selector) and selector[end] == '(':
+            subtree, end = _parse(selector, end + 1)
+            if end >= len(selector) or selector[end] != ')':
+                raise ValueError('Unclosed ( in {!r}'.format(selector))
+            end += 1
+        for key in reversed(path[1:]):
+            subtree = {key: subtree}
+        _merge(tree, path[0], subtree)
+
+        if end < len(selector) and selector[end] == ',':
+            position = end + 1
+            continue
+        return tree, end
+
+
+def parse_fields(selector: str) -> Tree:
+    """Parse a ``fields`` selector into the tree of the fields it selects.
+
+    Parameters
+    ----------
+        selector : str
+            A selector such as ``'trips/tripOption(id,saleTotal)'``.
+            Fields are separated by commas, ``a/b`` selects ``b`` within
+            ``a``, ``a(b,c)`` selects ``b`` and ``c`` within ``a`` and
+            ``*`` selects all fields of an object.
+
+    Raises
+    ------
+    :class:`ValueError`
+        If the selector is malformed.
+
+    Returns
+    -------
+    Dict[str, Optional[dict]]
+        Maps each selected key to the tree selected within
+        it, or to ``None`` if all of it is selected.
+    """
+
+    tree, end = _parse(selector, 0)
+    if end != len(selector):
+        raise ValueError('Unexpected {!r} at {} in {!r}'.format(
+            selector[end], end, selector
+        ))
+    return tree
+
+
+def format_fields(tree: Tree) -> str:
+    """Format a tree returned by :func:`parse_fields` as selector."""
+
+    items = []
+    for key, subtree in tree.items():
+        if not subtree:
+            items.append(key)
+        elif len(subtree) == 1:
+            items.append(key + '/' + format_fields(subtree))
+        else:
+            items.append('{}({})'.format(key, format_fields(subtree)))
+    return ','.join(items)
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_tree(selector: str) -> Tree:
+    return parse_fields(selector)
+
+
+def fields_tree(fields: Union[str, Iterable[str]]) -> Tree:
+    """Parse a projection, given like to :func:`fields_selector`,
+    into a tree like :func:`parse_fields` does. Trees of recently
+    used selectors are cached, so they must not be modified."""
+
+    if not isinstance(fields, str):
+        fields = ','.join(fields)
+    return _cached_tree(fields)
+
+
+def fields_selector(fields: Union[str, Iterable[str]]) -> str:
+    """Get the ``fields`` selector for a projection.
+
+    Parameters
+    ----------
+        fields : Union[str, Iterable[str]]
+            Either a selector, or the paths of the fields to select,
+            for example ``['trips/tripOption/saleTotal',
+            'trips/tripOption/slice/duration']``. Each path
+            may be a selector of its own.
+
+    Raises
+    ------
+    :class:`ValueError`
+        If the selector is malformed.
+
+    Returns
+    -------
+    str
+        The selector, in its most compact form. For the paths
+        above, ``'trips/tripOption(saleTotal,slice/duration)'``.
+    """
+
+    return format_fields(fields_tree(fields))
+
+
+def fields_url(url: str, selector: str) -> str:
+    """Add a ``fields`` selector to a URL which ends with
+    the query parameter the API key is appended to, like
+    :attr:`Requester.base_url`."""
+
+    path, _, query = url.partition('?')
+    return '{}?fields={}&{}'.format(
+        path, quote(selector, safe='/,()*'), query
+    )
+
+
+def url_fields(url: str) -> Optional[str]:
+    """Get the ``fields`` selector of a URL, as added by
+    :func:`fields_url`, or ``None`` if it has none."""
+
+    values = parse_qs(urlsplit(url).query).get('fields')
+    return values[0] if values else None
+
+
+def select(data: dict, tree: Optional[Tree]) -> dict:
+    """Only keep the keys of an object selected by a tree, without
+    looking into their values, which :func:`child` selects from."""
+
+    if tree is None or '*' in tree:
+        return data
+    return {key: data[key] for key in tree if key in data}
+
+
+def child(tree: Optional[Tree], key: str) -> Optional[Tree]:
+    """Get the tree selected within a key of a tree, ``None`` if all
+    of it is. Keys the tree does not select are not looked into, as
+    :func:`select` leaves them out."""
+
+    if tree is None:
+        return None
+    return tree[key] if key in tree else tree.get('*')
+
+
+def project(data, tree: Optional[Tree]):
+    """Only keep the fields of a response selected by a tree,
+    like the API does for the selector of the tree.
+
+    Parameters
+    ----------
+        data : Union[dict, list, Any]
+            The response, or a part of it. Lists
+            are projected item by item.
+        tree : Optional[Dict[str, Optional[dict]]]
+            The tree returned by :func:`parse_fields`,
+            or ``None`` to keep all of ``data``.
+
+    Returns
+    -------
+    Union[dict, list, Any]
+        A copy of ``data`` with only the selected fields.
+        Selected fields that ``data`` does not have are left out.
+    """
+
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    if '*' in tree:
+        every = tree['*']
+        return {
+            key: project(value, tree.get(key, every))
+            for key, value in data.items()
+        }
+    return {
+        key: project(data[key], subtree)
+        for key, subtree in tree.items() if key in data
+    }
@@ -0,0 +1,170 @@
+"""
+Contains the Hedger class, which sends
+a duplicate of a request that takes
+unusually long and uses whichever
+response arrives first.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from .stats import Histogram
+
+
+class Hedger(object):
+    """Cuts tail latency by hedging slow requests.
+
+    Latencies of completed requests are tracked online. Once a request has
+    been in flight for longer than the configured percentile of these
+    latencies, a duplicate request is fired, the first successful
+    response is used and the other request is cancelled.
+    To cap the extra load, duplicates are only fired as long as they
+    amount to at most ``budget_percent`` percent of all requests.
+
+    Enable hedging for :meth:`pyflight.send_async` with
+    :meth:`pyflight.enable_hedging`.
+
+    Attributes
+    ----------
+        percentile : float
+            The latency percentile after which a duplicate is fired.
+        budget_percent : float
+            The maximum amount of duplicates, as
+            a percentage of all requests.
+        min_samples : int
+            The amount of latencies to track before hedging
+            starts. Until then, no duplicates are fired.
+        window : int
+            After this many latencies, tracking starts over,
+            so that the delay follows changes in latency.
+        requests : int
+            The amount of requests sent through this :class:`Hedger`.
+        hedges_fired : int
+            The amount of duplicate requests fired.
+        hedges_won : int
+            How many times a duplicate returned first.
+    """
+
+    def __init__(self, percentile: float = 95.0, budget_percent: float = 5.0,
+                 min_samples: int = 20, window: int = 1000):
+        """Create a new Hedger.
+
+        Parameters
+        ----------
+            percentile : float
+                The latency percentile after which a duplicate is fired.
+            budget_percent : float
+                The maximum percentage of duplicate requests.
+            min_samples : int
+                The amount of latencies to track before hedging.
+            window : int
+                The amount of latencies after which tracking starts over.
+        """
+
+        if not 0 < percentile < 100:
+            raise ValueError('percentile must be between 0 and 100')
+
+        self.percentile = percentile
+        self.budget_percent = budget_percent
+        self.min_samples = min_samples
+        self.window = window
+
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+        self._latencies = Histogram()
+        self._previous = None
+
+    def delay(self) -> Optional[float]:
+        """Get the amount of seconds after which a duplicate is fired,
+        or ``None`` if not enough latencies have been tracked yet."""
+
+        latencies = self._latencies
+        if latencies.count < self.min_samples:
+            latencies = self._previous
+            if latencies is None:
+                return None
+
+        return latencies.percentile(self.percentile)
+
+    def _record(self, latency: float):
+        self._latencies.record(latency)
+        if self._latencies.count >= self.window:
+            self._previous = self._latencies
+            self._latencies = Histogram()
+
+    def _may_hedge(self) -> bool:
+        return self.hedges_fired + 1 <= \
+            self.requests * self.budget_percent / 100
+
+    async def run(self, send: Callable[[], Awaitable]):
+        """Send a request, hedging it if it takes too long.
+
+        Parameters
+        ----------
+            send : Callable[[], Awaitable]
+                Sends the request and returns its response.
+                Called a second time to fire the duplicate.
+
+        Returns
+        -------
+        Any
+            The first successful response. If all attempts fail,
+            the exception of the first attempt is raised.
+        """
+
+        self.requests += 1
+        delay = self.delay()
+
+        # The latency of the request is measured from the start of the
+        # primary, whichever attempt wins, so that winning duplicates do
+        # not make requests look faster than they are.
+        start = time.monotonic()
+        primary = asyncio.ensure_future(send())
+        done, pending = set(), {primary}
+        try:
+            if delay is not None:
+                done, pending = await asyncio.wait(pending, timeout=delay)
+                if not done and self._may_hedge():
+                    self.hedges_fired += 1
+                    pending.add(asyncio.ensure_future(send()))
+
+            first_error = None
+            while done or pending:
+                if not done:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+
+                task = done.pop()
+                if task.exception() is None:
+                    self._record(time.monotonic() - start)
+                    if task is not primary:
+                        self.hedges_won += 1
+                    return task.result()
+
+                if first_error is None or task is primary:
+                    first_error = task.exception()
+
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """Get the counters and the current delay of this :class:`Hedger`.
+
+        Returns
+        -------
+        dict
+            The amount of ``requests``, ``hedges_fired``
+            and ``hedges_won``, and the current ``delay``.
+        """
+
+        return {
+            'requests': self.requests,
+            'hedges_fired': self.hedges_fired,
+            'hedges_won': self.hedges_won,
+            'delay': self.delay()
+        }
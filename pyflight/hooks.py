@@ -0,0 +1,265 @@
+"""
+Contains the Hooks class, which emits
+events with the timings of the phases
+of each request to listeners, such as
+metrics or tracing integrations.
+"""
+import contextvars
+import itertools
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+QUEUED = 'queued'
+CONNECT = 'connect'
+FIRST_BYTE = 'first_byte'
+DOWNLOAD = 'download'
+DECODE = 'decode'
+PARSE = 'parse'
+REQUEST = 'request'
+
+_current = contextvars.ContextVar('pyflight_trace', default=None)
+_trace_config = None
+
+
+class RequestEvent(object):
+    """The timing of one phase of a request.
+
+    Attributes
+    ----------
+        phase : str
+            One of the following:
+
+            * ``'queued'``: From the call of :meth:`pyflight.send_async`
+              until the HTTP request was started.
+            * ``'connect'``: Acquiring a connection, either opening a new
+              one or reusing one from the pool, see ``reused``.
+            * ``'first_byte'``: From starting the HTTP request until the
+              response headers arrived, including connecting.
+            * ``'download'``: Reading the body of the response.
+            * ``'decode'``: Decoding the JSON of the body.
+            * ``'parse'``: Building the :class:`Result`. If the response
+              is parsed in a parse executor, this includes decoding.
+            * ``'request'``: The whole request, emitted last.
+
+            Requests sent with :meth:`pyflight.send_sync` have no
+            ``'queued'`` and ``'connect'`` phases.
+        request_id : int
+            A number identifying the request, the same for all its events.
+        url : str
+            The URL the request is sent to, without the API key.
+        start : float
+            The value of :func:`time.monotonic` when the phase started.
+        end : float
+            The value of :func:`time.monotonic` when the phase ended.
+        size : Optional[int]
+            The amount of bytes of the body, for the
+            ``'download'``, ``'decode'`` and ``'request'`` phases.
+        sent : Optional[int]
+            For the ``'request'`` phase, the amount of bytes
+            of the bodies of the HTTP requests sent.
+        reused : Optional[bool]
+            For the ``'connect'`` phase, whether the
+            connection was reused from the pool.
+        error : Optional[BaseException]
+            For the ``'request'`` phase, the exception
+            that was raised by the request, if any.
+    """
+
+    __slots__ = ('phase', 'request_id', 'url', 'start', 'end', 'size',
+                 'sent', 'reused', 'error')
+
+    def __init__(self, phase: str, request_id: int, url: str, start: float,
+                 end: float, size: Optional[int] = None,
+                 sent: Optional[int] = None, reused: Optional[bool] = None,
+                 error: Optional[BaseException] = None):
+        self.phase = phase
+        self.request_id = request_id
+        self.url = url
+        self.start = start
+        self.end = end
+        self.size = size
+        self.sent = sent
+        self.reused = reused
+        self.error = error
+
+    def __repr__(self):
+        return '<RequestEvent {} #{} {:.6f}s>'.format(
+            self.phase, self.request_id, self.duration
+        )
+
+    @property
+    def duration(self) -> float:
+        """The amount of seconds the phase took."""
+
+        return self.end - self.start
+
+    def as_dict(self) -> dict:
+        """Get a dictionary representing this :class:`RequestEvent`,
+        with ``error`` formatted as a string."""
+
+        return {
+            'phase': self.phase,
+            'request_id': self.request_id,
+            'url': self.url,
+            'start': self.start,
+            'end': self.end,
+            'duration': self.duration,
+            'size': self.size,
+            'sent': self.sent,
+            'reused': self.reused,
+            'error': None if self.error is None else repr(self.error)
+        }
+
+
+class Trace(object):
+    """The state of a single request whose events are being emitted.
+    Created by :meth:`Hooks.begin`."""
+
+    __slots__ = ('hooks', 'request_id', 'url', 'start', 'size', 'sent',
+                 '_token')
+
+    def __init__(self, hooks: 'Hooks', request_id: int, url: str):
+        self.hooks = hooks
+        self.request_id = request_id
+        self.url = url
+        self.start = time.monotonic()
+        self.size = None
+        self.sent = 0
+        self._token = _current.set(self)
+
+    def emit(self, phase: str, start: float, end: Optional[float] = None,
+             size: Optional[int] = None, reused: Optional[bool] = None,
+             error: Optional[BaseException] = None):
+        """Emit an event for a phase that started at ``start``
+        and ended at ``end``, or now."""
+
+        if size is not None:
+            self.size = size
+        self.hooks.emit(RequestEvent(
+            phase, self.request_id, self.url, start,
+            time.monotonic() if end is None else end, size,
+            self.sent if phase == REQUEST else None, reused, error
+        ))
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Emit the ``'request'`` event and stop tracing the request."""
+
+        _current.reset(self._token)
+        self.emit(REQUEST, self.start, size=self.size, error=error)
+
+
+class Hooks(object):
+    """The listeners of the request events of a :class:`Requester`.
+
+    Listeners are called with a :class:`RequestEvent` at the end of each
+    phase, on the thread that sent the request. They should return
+    quickly and must not raise. Without any listeners, requests are not
+    traced at all, so that hooks cost nothing until they are used.
+    """
+
+    def __init__(self):
+        """Create a new Hooks object without listeners."""
+
+        self._listeners = []
+        self._ids = itertools.count(1)
+
+    def __bool__(self):
+        """Returns whether any listeners are attached."""
+
+        return bool(self._listeners)
+
+    def add(self, listener: Callable[[RequestEvent], None]):
+        """Call ``listener`` with each :class:`RequestEvent`."""
+
+        self._listeners.append(listener)
+
+    def remove(self, listener: Callable[[RequestEvent], None]):
+        """Stop calling a listener added with :meth:`add`."""
+
+        self._listeners.remove(listener)
+
+    def emit(self, event: RequestEvent):
+        """Call all listeners with an event."""
+
+        for listener in list(self._listeners):
+            listener(event)
+
+    def begin(self, url: str) -> Trace:
+        """Start tracing a request to ``url``. Until :meth:`Trace.finish`
+        is called, :func:`current` returns the new :class:`Trace`."""
+
+        return Trace(self, next(self._ids), url.split('?', 1)[0])
+
+    @staticmethod
+    def trace_config() -> 'aiohttp.TraceConfig':
+        """Get the :class:`aiohttp.TraceConfig` that emits the
+        ``'queued'``, ``'connect'`` and ``'first_byte'`` events
+        of the :class:`Trace` passed as ``trace_request_ctx``.
+        Requests without a :class:`Trace` are ignored.
+
+        As each :class:`Trace` knows its hooks, the config
+        is the same for all of them and shared by sessions."""
+
+        global _trace_config  # pylint: disable=global-statement
+        if _trace_config is None:
+            import aiohttp
+
+            config = aiohttp.TraceConfig()
+            config.on_request_start.append(_on_request_start)
+            config.on_connection_create_start.append(_on_connect_start)
+            config.on_connection_create_end.append(_on_connect_end)
+            config.on_connection_reuseconn.append(_on_connection_reused)
+            config.on_request_chunk_sent.append(_on_chunk_sent)
+            config.on_request_end.append(_on_request_end)
+            _trace_config = config
+
+        return _trace_config
+
+
+def current() -> Optional[Trace]:
+    """Get the :class:`Trace` of the request being sent, if any."""
+
+    return _current.get()
+
+
+async def _on_request_start(_, context: SimpleNamespace, __):
+    trace = context.trace_request_ctx
+    if trace is None:
+        return
+    context.start = time.monotonic()
+    trace.emit(QUEUED, trace.start, context.start)
+
+
+async def _on_connect_start(_, context: SimpleNamespace, __):
+    if context.trace_request_ctx is None:
+        return
+    context.connect = time.monotonic()
+
+
+async def _on_connect_end(_, context: SimpleNamespace, __):
+    if context.trace_request_ctx is None:
+        return
+    context.trace_request_ctx.emit(CONNECT, context.connect, reused=False)
+
+
+async def _on_connection_reused(_, context: SimpleNamespace, __):
+    if context.trace_request_ctx is None:
+        return
+    now = time.monotonic()
+    context.trace_request_ctx.emit(CONNECT, now, now, reused=True)
+
+
+async def _on_chunk_sent(_, context: SimpleNamespace, params):
+    if context.trace_request_ctx is None:
+        return
+    context.trace_request_ctx.sent += len(params.chunk)
+
+
+async def _on_request_end(_, context: SimpleNamespace, __):
+    if context.trace_request_ctx is None:
+        return
+    context.trace_request_ctx.emit(FIRST_BYTE, context.start)
@@ -0,0 +1,205 @@
+"""
+Contains the AdaptiveLimiter class,
+which adjusts the amount of requests
+in flight to how the API is coping,
+using additive increase and
+multiplicative decrease (AIMD).
+"""
+import asyncio
+import time
+from typing import Optional
+
+from .circuit_breaker import is_failure
+
+THROTTLING_REASONS = 'rateLimitExceeded', 'userRateLimitExceeded'
+
+
+def is_throttling(error: BaseException) -> bool:
+    """Check whether an Exception raised by a request means
+    that the API is asking clients to slow down."""
+
+    return getattr(error, 'code', None) == 429 \
+        or getattr(error, 'reason', None) in THROTTLING_REASONS
+
+
+class AdaptiveLimiter(object):
+    """Adapts a concurrency limit to the latency and errors of responses.
+
+    While responses are healthy, the limit grows by ``increase`` for every
+    ``limit`` responses, which is about once per round trip. When a request
+    is throttled (see :func:`is_throttling`), fails because of the server
+    (see :func:`is_failure`) or takes more than ``latency_tolerance`` times
+    the lowest recently seen latency, the limit is multiplied by
+    ``backoff``. It is decreased at most once per ``cooldown`` seconds,
+    so that a burst of errors caused by one overload only counts once.
+
+    Pass an :class:`AdaptiveLimiter` as the ``concurrency``
+    of :meth:`pyflight.send_many_async` to use it.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        limiter = AdaptiveLimiter(initial=4, max_limit=64)
+        async for request, result in send_many_async(requests, limiter):
+            ...
+
+        print(limiter.limit)
+
+    Attributes
+    ----------
+        limit : float
+            The current concurrency limit. At least ``int(limit)``
+            requests may be in flight at once.
+        min_limit : float
+            The lowest allowed limit.
+        max_limit : float
+            The highest allowed limit.
+        increase : float
+            How much the limit grows per round trip.
+        backoff : float
+            The factor the limit is multiplied with on a decrease.
+        latency_tolerance : float
+            How many times the baseline latency a response may
+            take before it counts as a sign of overload.
+        cooldown : Optional[float]
+            The minimum amount of seconds between two decreases.
+            Defaults to the baseline latency.
+        window : int
+            The amount of responses after which the baseline
+            latency is measured anew.
+        increases : int
+            How many times the limit was increased.
+        decreases : int
+            How many times the limit was decreased.
+    """
+
+    def __init__(self, initial: float = 4, min_limit: float = 1,
+                 max_limit: float = 100, increase: float = 1,
+                 backoff: float = 0.5, latency_tolerance: float = 2.0,
+                 cooldown: Optional[float] = None, window: int = 100):
+        """Create a new AdaptiveLimiter.
+
+        Parameters
+        ----------
+            initial : float
+                The initial concurrency limit.
+            min_limit : float
+                The lowest allowed limit.
+            max_limit : float
+                The highest allowed limit.
+            increase : float
+                How much the limit grows per round trip.
+            backoff : float
+                The factor the limit is multiplied with on a decrease.
+            latency_tolerance : float
+                How many times the baseline latency a response may take.
+            cooldown : Optional[float]
+                The minimum amount of seconds between two decreases.
+            window : int
+                The amount of responses per baseline latency measurement.
+        """
+
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError('Expected 1 <= min_limit <= initial <= max_limit')
+        if not 0 < backoff < 1:
+            raise ValueError('backoff must be between 0 and 1')
+
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.window = window
+
+        self.increases = 0
+        self.decreases = 0
+
+        self._baseline = None
+        self._window_min = None
+        self._window_count = 0
+        self._decreased_at = None
+
+    def __int__(self):
+        """Returns the amount of requests that may be in flight at once."""
+
+        return int(self.limit)
+
+    @property
+    def baseline(self) -> Optional[float]:
+        """The lowest latency seen recently, in seconds,
+        or ``None`` if no response was recorded yet."""
+
+        return self._baseline
+
+    def _track_latency(self, latency: float):
+        if self._window_min is None or latency < self._window_min:
+            self._window_min = latency
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+
+        self._window_count += 1
+        if self._window_count >= self.window:
+            self._baseline = self._window_min
+            self._window_min = None
+            self._window_count = 0
+
+    def record(self, latency: float, error: Optional[BaseException] = None,
+               now: Optional[float] = None):
+        """Adapt the limit to the outcome of a request.
+
+        Parameters
+        ----------
+            latency : float
+                How many seconds the request took.
+            error : Optional[BaseException]
+                The Exception raised by the request, if any.
+            now : Optional[float]
+                The current value of :func:`time.monotonic`.
+        """
+
+        now = time.monotonic() if now is None else now
+        if isinstance(error, asyncio.CancelledError):
+            return
+
+        overloaded = error is not None and (
+            is_throttling(error) or is_failure(error)
+        )
+        if error is None:
+            inflated = self._baseline is not None and \
+                latency > self._baseline * self.latency_tolerance
+            self._track_latency(latency)
+            overloaded = inflated
+        elif not overloaded:
+            return
+
+        if overloaded:
+            cooldown = self.cooldown
+            if cooldown is None:
+                cooldown = self._baseline or 0.0
+            if self._decreased_at is None or \
+                    now - self._decreased_at >= cooldown:
+                self._decreased_at = now
+                self.decreases += 1
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            return
+
+        if self.limit < self.max_limit:
+            self.increases += 1
+            self.limit = min(
+                self.max_limit, self.limit + self.increase / self.limit
+            )
+
+    def stats(self) -> dict:
+        """Get the current ``limit``, the ``baseline`` latency, and how
+        many ``increases`` and ``decreases`` happened so far."""
+
+        return {
+            'limit': self.limit,
+            'baseline': self._baseline,
+            'increases': self.increases,
+            'decreases': self.decreases
+        }
@@ -0,0 +1,302 @@
+"""
+Contains the Metrics class, a registry
+of counters and latency histograms fed
+by request events, which can be read
+as a snapshot or as Prometheus text.
+"""
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .circuit_breaker import CircuitOpenError
+from .hooks import CONNECT, REQUEST, RequestEvent
+from .stats import Histogram
+
+# The upper bounds of the buckets of histograms in seconds,
+# when rendered as text. Values are tracked more finely.
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def outcome(error: Optional[BaseException]) -> Tuple[str, str]:
+    """Get the status and reason a request ended with.
+
+    Returns
+    -------
+    Tuple[str, str]
+        The status code and reason of a response or an
+        :class:`APIException`, ``'circuit_open'`` for a
+        :class:`CircuitOpenError`, ``'cancelled'`` for cancelled
+        requests, or ``'error'`` and the name of the exception type
+        for other errors, such as connection errors.
+    """
+
+    if error is None:
+        return '200', ''
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return str(code), getattr(error, 'reason', '') or ''
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open', ''
+    if isinstance(error, asyncio.CancelledError):
+        return 'cancelled', ''
+    return 'error', type(error).__name__
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    parts = [
+        '{}="{}"'.format(key, value.replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    ]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Metrics(object):
+    """A registry of counters and histograms about requests.
+
+    Added as a listener to the :class:`Hooks` of a :class:`Requester`,
+    which :meth:`pyflight.enable_metrics` does, it keeps track of:
+
+    * ``requests_total``: Requests by ``status`` and ``reason``,
+      see :func:`outcome`.
+    * ``request_duration_seconds``: The latency of whole requests.
+    * ``phase_duration_seconds``: The duration of each ``phase``
+      of requests, such as ``'first_byte'`` or ``'parse'``.
+    * ``bytes_received_total`` and ``bytes_sent_total``:
+      The bytes of the bodies of responses and requests.
+    * ``connections_total``: Acquired connections, by whether
+      they were ``reused``.
+
+    Other parts of pyflight and applications can add their own metrics
+    with :meth:`increment` and :meth:`observe`, like the hit rate of
+    caches, and :meth:`add_collector` adds counters or gauges whose
+    values are read when a snapshot is taken, such as the amount of
+    hedged requests or the current concurrency limit.
+
+    Metrics are thread-safe.
+
+    Attributes
+    ----------
+        prefix : str
+            Prepended to the name of each metric when rendered as text.
+    """
+
+    def __init__(self, prefix: str = 'pyflight'):
+        """Create a new, empty Metrics registry.
+
+        Parameters
+        ----------
+            prefix : str
+                Prepended to the name of each metric in :meth:`render`.
+        """
+
+        self.prefix = prefix
+        self._counters = {}  # type: Dict[str, Dict[Labels, float]]
+        self._histograms = {}  # type: Dict[str, Dict[Labels, Histogram]]
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent):
+        """Record a :class:`RequestEvent`."""
+
+        if event.phase == REQUEST:
+            status, reason = outcome(event.error)
+            self.increment('requests_total', status=status, reason=reason)
+            self.observe('request_duration_seconds', event.duration)
+            if event.size:
+                self.increment('bytes_received_total', event.size)
+            if event.sent:
+                self.increment('bytes_sent_total', event.sent)
+            return
+
+        self.observe('phase_duration_seconds', event.duration,
+                     phase=event.phase)
+        if event.phase == CONNECT:
+            self.increment('connections_total',
+                           reused='true' if event.reused else 'false')
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        """Add ``amount`` to the counter ``name`` with the given labels."""
+
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        """Record ``value`` in the histogram ``name`` with the given
+        labels. Values are expected to be seconds."""
+
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.record(value)
+
+    def add_collector(self, collector: Callable[[], Dict[str, float]],
+                      gauge: bool = False):
+        """Add a function that returns the current values of additional
+        counters by name, which is called whenever a snapshot is taken.
+        If ``gauge`` is set, the values are gauges instead, which
+        can go down as well as up."""
+
+        self._collectors.append((collector, gauge))
+
+    def counter(self, name: str, **labels) -> float:
+        """Get the value of a counter, 0 if it was never incremented."""
+
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        """Get a copy of a histogram, ``None`` if nothing was observed."""
+
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(_labels(labels))
+            if histogram is None:
+                return None
+            copy = Histogram(histogram.precision, histogram.min_value)
+            copy.merge(histogram)
+            return copy
+
+    def reset(self):
+        """Clear all counters and histograms."""
+
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def _collect(self) -> Tuple[Dict[str, Dict[Labels, float]],
+                                Dict[str, Dict[Labels, float]]]:
+        with self._lock:
+            counters = {
+                name: dict(series) for name, series in self._counters.items()
+            }
+        gauges = {}  # type: Dict[str, Dict[Labels, float]]
+        for collector, gauge in self._collectors:
+            for name, value in collector().items():
+                (gauges if gauge else counters).setdefault(name, {})[()] = \
+                    value
+        return counters, gauges
+
+    def snapshot(self) -> dict:
+        """Get the current value of all metrics.
+
+        Returns
+        -------
+        dict
+            ``counters``, ``gauges`` and ``histograms``, each mapping the
+            name of a metric to a list with the ``labels`` and the value
+            of each of its series. Counter and gauge series have a
+            ``value``, histogram series the summary of
+            :meth:`Histogram.as_dict`.
+        """
+
+        counters, gauges = self._collect()
+        with self._lock:
+            histograms = {
+                name: [
+                    dict(histogram.as_dict(), labels=dict(labels))
+                    for labels, histogram in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+
+        def values(metrics):
+            return {
+                name: [
+                    {'labels': dict(labels), 'value': value}
+                    for labels, value in series.items()
+                ]
+                for name, series in metrics.items()
+            }
+
+        return {
+            'counters': values(counters),
+            'gauges': values(gauges),
+            'histograms': histograms
+        }
+
+    def render(self, buckets: Sequence[float] = SECONDS_BUCKETS) -> str:
+        """Render all metrics in the Prometheus text exposition format.
+
+        Parameters
+        ----------
+            buckets : Sequence[float]
+                The upper bounds of the rendered histogram buckets.
+                Counts are approximate, as values are tracked in
+                finer, logarithmic buckets.
+
+        Returns
+        -------
+        str
+            The metrics, to be served with the content type
+            ``text/plain; version=0.0.4``.
+        """
+
+        lines = []  # type: List[str]
+        counters, gauges = self._collect()
+        for kind, metrics in (('counter', counters), ('gauge', gauges)):
+            for name, series in sorted(metrics.items()):
+                name = '{}_{}'.format(self.prefix, name)
+                lines.append('# TYPE {} {}'.format(name, kind))
+                for labels, value in sorted(series.items()):
+                    lines.append('{}{} {}'.format(
+                        name, _format_labels(labels), _number(value)
+                    ))
+
+        with self._lock:
+            histograms = sorted(
+                (name, sorted(
+                    (labels, [(bound, count) for bound, count in
+                              histogram.buckets()],
+                     histogram.sum, histogram.count)
+                    for labels, histogram in series.items()
+                ))
+                for name, series in self._histograms.items()
+            )
+
+        for name, series in histograms:
+            name = '{}_{}'.format(self.prefix, name)
+            lines.append('# TYPE {} histogram'.format(name))
+            for labels, fine, total, count in series:
+                cumulative = 0
+                fine = iter(fine)
+                pending = next(fine, None)
+                for bound in buckets:
+                    while pending is not None and pending[0] <= bound:
+                        cumulative += pending[1]
+                        pending = next(fine, None)
+                    lines.append('{}_bucket{} {}'.format(
+                        name,
+                        _format_labels(labels, 'le="{}"'.format(bound)),
+                        cumulative
+                    ))
+                lines.append('{}_bucket{} {}'.format(
+                    name, _format_labels(labels, 'le="+Inf"'), count
+                ))
+                lines.append('{}_sum{} {}'.format(
+                    name, _format_labels(labels), _number(total)
+                ))
+                lines.append('{}_count{} {}'.format(
+                    name, _format_labels(labels), count
+                ))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
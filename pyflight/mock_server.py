@@ -0,0 +1,495 @@
+"""
+Contains the MockServer class, a local
+stand-in for the QPX Express API used
+to test and load test offline, with
+injectable latency and failures.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Iterable, Optional, Sequence, Tuple,
+    Union
+)
+from urllib.parse import parse_qsl, urlsplit
+
+from .fields import parse_fields, project
+from .synthetic import generate_response
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+PATH = '/qpxExpress/v1/trips/search'
+BATCH_PATH = '/batch/qpxExpress/v1'
+
+# The seconds start_thread waits for the server to listen.
+START_TIMEOUT = 10.0
+
+# The domain, reason and message of the errors
+# the API returns for each status code.
+ERRORS = {
+    400: ('global', 'badRequest', 'Bad Request'),
+    403: ('usageLimits', 'dailyLimitExceeded', 'Daily Limit Exceeded'),
+    500: ('global', 'backendError', 'Backend Error'),
+    503: ('global', 'backendError', 'Service Unavailable'),
+}
+RATE_LIMITED = (
+    403, ('usageLimits', 'userRateLimitExceeded', 'User Rate Limit Exceeded')
+)
+
+
+def error_body(code: int, domain: str, reason: str, message: str) -> dict:
+    """Create the body of an error response as returned by the API."""
+
+    return {
+        'error': {
+            'errors': [
+                {'domain': domain, 'reason': reason, 'message': message}
+            ],
+            'code': code,
+            'message': message
+        }
+    }
+
+
+def synthetic_response(request: dict) -> dict:
+    """Answer a search with a synthetic response that has as
+    many trips as the search asked for solutions, at most 50."""
+
+    solutions = request.get('request', {}).get('solutions', 1)
+    return generate_response(trips=min(solutions, 50), seed=solutions)
+
+
+def _query(request_line: str) -> Dict[str, str]:
+    target = request_line.split()[1] if ' ' in request_line else ''
+    return dict(parse_qsl(urlsplit(target).query))
+
+
+class MockServer(object):
+    """A local server that speaks the ``trips/search`` contract.
+
+    Searches are answered with synthetic responses by default, or with
+    recorded responses, of which only the ``fields`` selected in the
+    query are sent. Latency, errors, rate limiting and slowly
+    dripping bodies can be injected to see how the client copes.
+
+    Point the requester at it with :meth:`pyflight.set_base_url`, or
+    create a :class:`Requester` with its ``base_url`` to leave the shared
+    requester alone. The server can run on the current event loop with
+    ``async with``, or in a thread of its own with ``with``, which is
+    needed to serve :meth:`pyflight.send_sync` from the same thread.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        server = MockServer(latency=lambda rng: rng.expovariate(10),
+                            error_rate=0.05, rate_limit=50)
+        with server:
+            client = Requester(server.base_url)
+            client.api_key = 'test'
+            result = send_sync(my_request, client=client)
+
+        print(server.stats())
+
+    Attributes
+    ----------
+        responses : Union[Callable[[dict], dict], Sequence[dict]]
+            Either called with each search to get its response,
+            or a sequence of responses that are served in turn.
+        latency : Union[float, Callable[[random.Random], float], None]
+            The seconds to wait before responding, either fixed or
+            drawn from a distribution by a function of a random
+            number generator, for example
+            ``lambda rng: rng.lognormvariate(-1.5, 0.5)``.
+        error_rate : float
+            The share of searches, from 0 to 1, answered with an error.
+        error_codes : Sequence[int]
+            The status codes of injected errors, chosen at random.
+            Each must be a key of :data:`ERRORS`.
+        rate_limit : Optional[float]
+            The amount of searches per second allowed on average. Others
+            are rejected like the API does, with a ``403`` error with the
+            reason ``userRateLimitExceeded``.
+        burst : int
+            The amount of searches allowed at once under ``rate_limit``.
+        drip : Optional[Tuple[int, float]]
+            If set, bodies are sent in chunks of this many bytes,
+            waiting the given amount of seconds between chunks.
+        host : str
+            The host to listen on.
+        port : int
+            The port to listen on. If 0, a free port is chosen on start.
+        requests : int
+            The amount of searches received, including
+            those in batches.
+        batches : int
+            The amount of batch requests received
+            on :data:`BATCH_PATH`.
+        errors : Dict[int, int]
+            The amount of error responses sent, by status code.
+    """
+
+    def __init__(self, responses: Union[Callable[[dict], dict],
+                                        Sequence[dict]] = synthetic_response,
+                 latency: Union[float, Callable[[random.Random], float],
+                                None] = None,
+                 error_rate: float = 0.0,
+                 error_codes: Iterable[int] = (400, 403, 500),
+                 rate_limit: Optional[float] = None, burst: int = 1,
+                 drip: Optional[Sequence] = None, host: str = '127.0.0.1',
+                 port: int = 0, seed: int = 0):
+        """Create a new MockServer. It is not started yet.
+
+        Parameters
+        ----------
+            responses : Union[Callable[[dict], dict], Sequence[dict]]
+                The responses to serve, see above. Defaults to
+                synthetic responses.
+            latency : Union[float, Callable[[random.Random], float], None]
+                The seconds to wait before responding.
+            error_rate : float
+                The share of searches answered with an error.
+            error_codes : Iterable[int]
+                The status codes of injected errors.
+            rate_limit : Optional[float]
+                The amount of searches per second allowed on average.
+            burst : int
+                The amount of searches allowed at once.
+            drip : Optional[Tuple[int, float]]
+                The chunk size and the seconds between chunks of bodies.
+            host : str
+                The host to listen on.
+            port : int
+                The port to listen on, or 0 to choose a free one.
+            seed : int
+                The seed of the random latency and errors.
+        """
+
+        self.error_codes = tuple(error_codes)
+        unknown = set(self.error_codes) - set(ERRORS)
+        if unknown:
+            raise ValueError('Unknown error codes: {}'.format(unknown))
+
+        self.responses = responses
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.drip = drip
+        self.host = host
+        self.port = port
+
+        self.requests = 0
+        self.batches = 0
+        self.errors = {}
+
+        self._rng = random.Random(seed)
+        if callable(responses):
+            self._recorded = None
+        else:
+            self._recorded = itertools.cycle(responses)
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._runner = None
+        self._thread = None
+        self._thread_loop = None
+
+    @property
+    def base_url(self) -> str:
+        """The URL to send searches to, to which the API key is appended,
+        for use with :meth:`pyflight.set_base_url`."""
+
+        return 'http://{}:{}{}?key='.format(self.host, self.port, PATH)
+
+    def stats(self) -> dict:
+        """Get the amount of ``requests`` received
+        and ``errors`` sent by status code."""
+
+        return {'requests': self.requests, 'errors': dict(self.errors)}
+
+    def _take_token(self) -> bool:
+        if self.rate_limit is None:
+            return True
+
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._refilled) * self.rate_limit
+        )
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _send(self, request: 'web.Request', status: int,
+                    body: dict) -> 'web.StreamResponse':
+        from aiohttp import web
+
+        data = json.dumps(body).encode()
+        if self.drip is None:
+            return web.Response(
+                status=status, body=data, content_type='application/json'
+            )
+
+        chunk_size, interval = self.drip
+        response = web.StreamResponse(status=status)
+        response.content_type = 'application/json'
+        response.content_length = len(data)
+        await response.prepare(request)
+        for start in range(0, len(data), chunk_size):
+            await response.write(data[start:start + chunk_size])
+            await asyncio.sleep(interval)
+        await response.write_eof()
+        return response
+
+    async def _answer(self, key: Optional[str], raw: bytes,
+                      fields: Optional[str] = None) -> Tuple[int, dict]:
+        self.requests += 1
+        status, body = await self._respond(key, raw)
+        if status != 200:
+            self.errors[status] = self.errors.get(status, 0) + 1
+        elif fields:
+            # Errors are sent in full, like the API does.
+            try:
+                body = project(body, parse_fields(fields))
+            except ValueError:
+                status, body = 400, error_body(
+                    400, 'global', 'invalidParameter', 'Invalid Field'
+                )
+                self.errors[status] = self.errors.get(status, 0) + 1
+        return status, body
+
+    async def _respond(self, key: Optional[str],
+                       raw: bytes) -> Tuple[int, dict]:
+        if not key:
+            return 400, error_body(
+                400, 'usageLimits', 'keyInvalid', 'Bad Request'
+            )
+
+        try:
+            search = json.loads(raw.decode())
+        except ValueError:
+            return 400, error_body(400, 'global', 'parseError', 'Parse Error')
+
+        if not self._take_token():
+            code, error = RATE_LIMITED
+            return code, error_body(code, *error)
+
+        latency = self.latency
+        if callable(latency):
+            latency = latency(self._rng)
+        if latency:
+            await asyncio.sleep(latency)
+
+        if self.error_codes and self._rng.random() < self.error_rate:
+            code = self._rng.choice(self.error_codes)
+            return code, error_body(code, *ERRORS[code])
+
+        if self._recorded is None:
+            return 200, self.responses(search)
+        return 200, next(self._recorded)
+
+    async def _search(self,
+                      request: 'web.Request') -> 'web.StreamResponse':
+        status, body = await self._answer(
+            request.query.get('key'), await request.read(),
+            request.query.get('fields')
+        )
+        return await self._send(request, status, body)
+
+    async def _batch(self, request: 'web.Request') -> 'web.Response':
+        from aiohttp import web
+        from .batch import encode_batch_response, parse_parts
+
+        self.batches += 1
+        content_type = request.headers.get('Content-Type', '')
+        boundary = content_type.partition('boundary=')[2].strip('"')
+        if request.content_type != 'multipart/mixed' or not boundary:
+            return await self._send(request, 400, error_body(
+                400, 'global', 'badContent', 'Expected multipart/mixed'
+            ))
+
+        key = request.query.get('key')
+        parts = parse_parts(await request.read(), boundary)
+        # Each part is answered as if it was sent on its own,
+        # with the fields selected in the query of its path.
+        answers = await asyncio.gather(*(
+            self._answer(key, content, _query(request_line).get('fields'))
+            for _, request_line, _, content in parts
+        ))
+
+        responses = []
+        for (part_headers, _, _, _), (status, body) in zip(parts, answers):
+            content_id = part_headers.get('content-id', '').strip('<>')
+            responses.append((content_id, status, json.dumps(body).encode()))
+        content_type, data = encode_batch_response(responses)
+        return web.Response(
+            status=200, body=data, headers={'Content-Type': content_type}
+        )
+
+    async def start(self) -> str:
+        """Start serving on the current event loop.
+
+        Raises
+        ------
+        OSError
+            If the server can not listen, for example
+            because the port is already in use.
+
+        Returns
+        -------
+        str
+            The ``base_url`` of the server.
+        """
+
+        # Imported here, as the server is only needed for testing.
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post(PATH, self._search)
+        app.router.add_post(BATCH_PATH, self._batch)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        try:
+            await site.start()
+        except BaseException:
+            await self.close()
+            raise
+        self.port = self._runner.addresses[0][1]
+        return self.base_url
+
+    async def close(self):
+        """Stop serving."""
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'MockServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def start_thread(self) -> str:
+        """Start serving on an event loop in a new daemon thread.
+
+        Raises
+        ------
+        OSError
+            If the server can not listen, for example
+            because the port is already in use.
+
+        Returns
+        -------
+        str
+            The ``base_url`` of the server.
+        """
+
+        started = threading.Event()
+        failure = []
+        loop = asyncio.new_event_loop()
+
+        def serve():
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as error:  # pylint: disable=broad-except
+                failure.append(error)
+                loop.close()
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.close())
+            loop.close()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        if not started.wait(START_TIMEOUT):
+            raise TimeoutError('MockServer did not start in {} seconds'
+                               .format(START_TIMEOUT))
+        if failure:
+            thread.join()
+            raise failure[0]
+
+        self._thread_loop = loop
+        self._thread = thread
+        return self.base_url
+
+    def stop_thread(self):
+        """Stop serving in the thread started by :meth:`start_thread`."""
+
+        if self._thread is not None:
+            self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+            self._thread.join()
+            self._thread = self._thread_loop = None
+
+    def __enter__(self) -> 'MockServer':
+        self.start_thread()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_thread()
+
+
+def main():
+    """Run a :class:`MockServer` until interrupted."""
+
+    parser = argparse.ArgumentParser(
+        description='Serve a local stand-in for the QPX Express API.'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--responses', metavar='FILE', nargs='*',
+                        help='recorded responses to serve in turn, '
+                             'instead of synthetic ones')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='mean latency in seconds, '
+                             'exponentially distributed')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-codes', type=int, nargs='+',
+                        default=[400, 403, 500])
+    parser.add_argument('--rate-limit', type=float)
+    parser.add_argument('--burst', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    responses = synthetic_response
+    if args.responses:
+        responses = []
+        for path in args.responses:
+            with open(path) as recorded:
+                responses.append(json.load(recorded))
+
+    latency = None
+    if args.latency:
+        latency = lambda rng: rng.expovariate(1 / args.latency)  # noqa
+
+    server = MockServer(
+        responses, latency, args.error_rate, args.error_codes,
+        args.rate_limit, args.burst, host=args.host, port=args.port,
+        seed=args.seed
+    )
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    print('Serving on', server.base_url)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.close())
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
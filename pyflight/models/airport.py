@@ -4,8 +4,10 @@ which is used to represent
 an Airport with its code,
 city code, and name.
 """
+from .schema import Field, model
 
 
+@model
 class Airport(object):
     """
     Contains Data of an Airport and its City Code.
@@ -38,21 +40,11 @@ class Airport(object):
             The Code of the City associated with the Airport
     """
 
-    def __init__(self, airport: dict):
-        """Create an Airport Object containing Data
-        about an Airport and its associated City.
-
-        An Airport Object which contains Data about
-        each Flight returned from the API.
-
-        Arguments
-        ---------
-            airport : dict
-                A single Airport returned by the API
-        """
-        self.code = airport['code']
-        self.name = airport['name']
-        self.city = airport['city']
+    FIELDS = (
+        Field('code', 'code'),
+        Field('name', 'name'),
+        Field('city', 'city'),
+    )
 
     def __eq__(self, other):
         """Compare two Airports with each other by their Airport and City Codes.
@@ -80,27 +72,3 @@ class Airport(object):
         """
 
         return self.name
-
-    def as_dict(self):
-        """Get a dictionary representation of the Airport.
-
-        Example
-        -------
-            >>> airport = {
-                'code': '3E7', 'city': 'XYZ', 'name': 'Example Airport'
-            }
-            >>> example_airport = Airport(airport)
-            >>> example_airport.as_dict()
-            {
-                'code': '3E7',
-                'city': 'XYZ',
-                'name': 'Example Airport',
-            }
-
-        Returns
-        -------
-        dict
-            A dictionary representing this Airport.
-        """
-
-        return self.__dict__
@@ -3,8 +3,10 @@ Contains the BagDescriptor
 class which is used to re-
 present a type of bag.
 """
+from .schema import Field, model
 
 
+@model
 class BagDescriptor(object):
     r"""A representation of a type of bag.
 
@@ -51,22 +53,15 @@ class BagDescriptor(object):
         A single :class:`FreeBaggageOption` contains multiple BagDescriptors.
     """
 
-    def __init__(self, bag_descriptor_data: dict):
-        """Create a new BagDescriptor object.
-
-        Parameters
-        ----------
-            bag_descriptor_data : dict
-                The Bag Descriptor data as a dictionary,
-                returned from the API in Arrays.
-        """
-        self.commercial_name = bag_descriptor_data.get('commercialName', '')
-        self.count = bag_descriptor_data['count']
-        self.description = bag_descriptor_data.get('description', [])
-        self.subcode = bag_descriptor_data['subcode']
-        self.max_kilos = bag_descriptor_data.get('kilos')
-        self.kilos_per_piece = bag_descriptor_data.get('kilosPerPiece')
-        self.pounds = bag_descriptor_data.get('pounds')
+    FIELDS = (
+        Field('commercialName', 'commercial_name', ''),
+        Field('count', 'count'),
+        Field('description', 'description', []),
+        Field('subcode', 'subcode'),
+        Field('kilos', 'max_kilos'),
+        Field('kilosPerPiece', 'kilos_per_piece'),
+        Field('pounds', 'pounds'),
+    )
 
     def __str__(self):
         """Get the ``commercial_name`` of this :class:`BagDescriptor`.
@@ -90,15 +85,3 @@ class BagDescriptor(object):
         """
 
         return self.__dict__ == other.__dict__
-
-    def as_dict(self):
-        """Get a dictionary representing the attributes of this :class:`BagDescriptor`
-
-        Returns
-        -------
-        dict
-            A dictionary with key / value pairs containing
-            the attributes of this :class:`BagDescriptor`.
-        """
-
-        return self.__dict__
@@ -3,8 +3,10 @@ Defines the Fare class which
 represents the fare used to
 price one or more segments.
 """
+from .schema import Field, model
 
 
+@model
 class Fare(object):
     """
     The fare used to price one or more segments.
@@ -40,21 +42,14 @@ class Fare(object):
             Defaults to ``None``.
     """
 
-    def __init__(self, fare_data: dict):
-        """
-        Create a new Fare Object.
-
-        Parameters
-        ----------
-            fare_data : dict
-                A Fare Object returned in from the API in arrays.
-        """
-        self.id = fare_data['id']  # pylint: disable=invalid-name
-        self.carrier_code = fare_data['carrier']
-        self.origin_city_code = fare_data['origin']
-        self.destination_city_code = fare_data['destination']
-        self.basis_code = fare_data['basisCode']
-        self.private = fare_data.get('private', None)
+    FIELDS = (
+        Field('id', 'id'),
+        Field('carrier', 'carrier_code'),
+        Field('origin', 'origin_city_code'),
+        Field('destination', 'destination_city_code'),
+        Field('basisCode', 'basis_code'),
+        Field('private', 'private'),
+    )
 
     def __eq__(self, other):
         r"""Compare two :class:`Fare`\s for equality.
@@ -77,15 +72,3 @@ class Fare(object):
         """
 
         return self.id
-
-    def as_dict(self):
-        """Get a representation of this :class:`Fare` as a dictionary.
-
-        Returns
-        -------
-        dict
-            A dictionary containing the attributes of
-            this :class:`Fare` as key / value pairs.
-        """
-
-        return self.__dict__
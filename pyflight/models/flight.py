@@ -3,8 +3,10 @@ Contains the Flight class,
 which is used to represent
 a flight from takeoff to landing.
 """
+from .schema import Field, model
 
 
+@model
 class Flight(object):  # pylint: disable=too-many-instance-attributes
     r"""
     The smallest unit of travel, identifies a flight from takeoff to landing.
@@ -60,29 +62,27 @@ class Flight(object):  # pylint: disable=too-many-instance-attributes
         performance : int
             Specifies the published on time performance on this leg.
             ``None`` if not specified.
+        connection_duration : int
+            The minutes between the arrival of this leg and the departure
+            of the next leg of the same segment. ``None`` for the last leg.
     """
 
-    def __init__(self, leg_data: dict):
-        """Create a new Flight Object
-
-        Parameters
-        ----------
-            leg_data : dict
-                The Leg Data given from the API to initialize this Object from
-        """
-        self.id = leg_data['id']  # pylint: disable=invalid-name
-        self.aircraft = leg_data['aircraft']
-        self.departure_time = leg_data['departureTime']
-        self.arrival_time = leg_data['arrivalTime']
-        self.duration = leg_data['duration']
-        self.origin = leg_data['origin']
-        self.destination = leg_data['destination']
-        self.origin_terminal = leg_data.get('originTerminal', '')
-        self.destination_terminal = leg_data.get('destinationTerminal', '')
-        self.mileage = leg_data['mileage']
-        self.meal = leg_data.get('meal', '')
-        self.change_plane = leg_data.get('changePlane', '')
-        self.performance = leg_data.get('onTimePerformance', None)
+    FIELDS = (
+        Field('id', 'id'),
+        Field('aircraft', 'aircraft'),
+        Field('departureTime', 'departure_time'),
+        Field('arrivalTime', 'arrival_time'),
+        Field('duration', 'duration'),
+        Field('origin', 'origin'),
+        Field('destination', 'destination'),
+        Field('originTerminal', 'origin_terminal', ''),
+        Field('destinationTerminal', 'destination_terminal', ''),
+        Field('mileage', 'mileage'),
+        Field('meal', 'meal', ''),
+        Field('changePlane', 'change_plane', ''),
+        Field('onTimePerformance', 'performance'),
+        Field('connectionDuration', 'connection_duration'),
+    )
 
     def __eq__(self, other):
         """Compare two :class:`Flight`s with each other for equality.
@@ -104,15 +104,3 @@ class Flight(object):  # pylint: disable=too-many-instance-attributes
         """Get a string of the ID of this instance of :class:`Flight`"""
 
         return self.id
-
-    def as_dict(self):
-        """Get this object in the form of a dictionary.
-
-        Returns
-        -------
-        dict
-            A dictionary representing all attributes of this
-            :class:`Flight` as Key / Value pairs.
-        """
-
-        return self.__dict__
@@ -4,10 +4,11 @@ which is used to represent information
 about the free baggage allowance for
 one Segment.
 """
-
 from .bag_descriptor import BagDescriptor
+from .schema import Field, model
 
 
+@model
 class FreeBaggageOption(object):
     """Contains Information about the free baggage allowance for one Segment.
 
@@ -25,31 +26,7 @@ class FreeBaggageOption(object):
         Information about this is saved in a :class:`SegmentPricing` class.
     """
 
-    def __init__(self, baggage_data: dict):
-        """Create a new FreeBaggageOption object.
-
-        Parameters
-        ----------
-            baggage_data : dict
-                The Baggage Data as returned from the API in an Array.
-
-        """
-        self.pieces = baggage_data['pieces']
-        self.bag_descriptors = [
-            BagDescriptor(bd) for bd in baggage_data.get('bagDescriptor', [])
-        ]
-
-    def as_dict(self):
-        """Return a dictionary representation of this :class:`FreeBaggageOption`.
-
-        Returns
-        -------
-        dict
-            A dictionary with key / value pairs containing
-            the attributes of this :class:`FreeBaggageOption`.
-        """
-
-        return {
-            'pieces': self.pieces,
-            'bag_descriptors': [bd.as_dict() for bd in self.bag_descriptors]
-        }
+    FIELDS = (
+        Field('pieces', 'pieces'),
+        Field('bagDescriptor', 'bag_descriptors', model=BagDescriptor),
+    )
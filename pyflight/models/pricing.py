@@ -5,11 +5,12 @@ information about the pricing
 of the route this is stored
 in on a per-passenger basis.
 """
-
 from .fare import Fare
+from .schema import Field, model
 from .segment_pricing import SegmentPricing
 
 
+@model
 class Pricing(object):  # pylint: disable=too-many-instance-attributes
     """
     Contains Information about the pricing of the given Route, per passenger.
@@ -63,62 +64,20 @@ class Pricing(object):  # pylint: disable=too-many-instance-attributes
 
     """
 
-    def __init__(self, pricing_data: dict):
-        """
-        Create a new Pricing object from fare data.
-
-        Parameters
-        ----------
-            pricing_data : dict
-                The Pricing Data Object as returned from the API in an Array
-        """
-
-        self.fares = [Fare(f) for f in pricing_data['fare']]
-
-        self.segment_pricing = [
-            SegmentPricing(sp) for sp in pricing_data['segmentPricing']
-        ]
-
-        self.base_fare_total = pricing_data.get('baseFareTotal')
-        self.sale_fare_total = pricing_data['saleFareTotal']
-        self.sale_tax_total = pricing_data['saleTaxTotal']
-        self.sale_total = pricing_data['saleTotal']
-        self.adults = pricing_data['passengers'].get('adultCount', 0)
-        self.children = pricing_data['passengers'].get('childCount', 0)
-        self.infants_in_lap = pricing_data['passengers'].get(
-            'infantInLapCount', 0)
-        self.infants_in_seat = pricing_data['passengers'].get(
-            'infantInSeatCount', 0)
-        self.seniors = pricing_data['passengers'].get('seniorCount', 0)
-        self.fare_calculation = pricing_data['fareCalculation']
-        self.latest_ticketing_time = pricing_data['latestTicketingTime']
-        self.for_passenger_type = pricing_data['ptc']
-        self.refundable = pricing_data.get('refundable', None)
-
-    def as_dict(self):
-        """Get a dictionary representing this :class:`Pricing`.
-
-        Returns
-        -------
-        dict
-            A dictionary containing the attributes of this
-            :class:`Pricing` as key / value pairs.
-        """
-
-        return {
-            'fares': [f.as_dict() for f in self.fares],
-            'segment_pricing': [sp.as_dict() for sp in self.segment_pricing],
-            'base_fare_total': self.base_fare_total,
-            'sale_fare_total': self.sale_fare_total,
-            'sale_tax_total': self.sale_tax_total,
-            'sale_total': self.sale_total,
-            'adults': self.adults,
-            'children': self.children,
-            'infants_in_lap': self.infants_in_lap,
-            'infants_in_seat': self.infants_in_seat,
-            'seniors': self.seniors,
-            'fare_calculation': self.fare_calculation,
-            'latest_ticketing_time': self.latest_ticketing_time,
-            'for_passenger_type': self.for_passenger_type,
-            'refundable': self.refundable
-        }
+    FIELDS = (
+        Field('fare', 'fares', model=Fare),
+        Field('segmentPricing', 'segment_pricing', model=SegmentPricing),
+        Field('baseFareTotal', 'base_fare_total'),
+        Field('saleFareTotal', 'sale_fare_total'),
+        Field('saleTaxTotal', 'sale_tax_total'),
+        Field('saleTotal', 'sale_total'),
+        Field('passengers/adultCount', 'adults', 0),
+        Field('passengers/childCount', 'children', 0),
+        Field('passengers/infantInLapCount', 'infants_in_lap', 0),
+        Field('passengers/infantInSeatCount', 'infants_in_seat', 0),
+        Field('passengers/seniorCount', 'seniors', 0),
+        Field('fareCalculation', 'fare_calculation'),
+        Field('latestTicketingTime', 'latest_ticketing_time'),
+        Field('ptc', 'for_passenger_type'),
+        Field('refundable', 'refundable'),
+    )
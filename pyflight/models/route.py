@@ -4,10 +4,11 @@ represents a traveller's intent
 as well as a low-fare search
 about an itinerary between two points.
 """
-
+from .schema import Field, model
 from .segment import Segment
 
 
+@model
 class Route(object):
     r"""Represents the traveller's intent as well as a low-fare
     search about an itinerary between two points.
@@ -51,16 +52,10 @@ class Route(object):
             legs on the same flight.
     """
 
-    def __init__(self, route_slice: dict):
-        """Create a new Route Object.
-
-        Parameters
-        ----------
-            route_slice : dict
-                The ``trips.tripsOption[].slice[]`` Object from the Response
-        """
-        self.duration = route_slice['duration']
-        self.segments = [Segment(s) for s in route_slice['segment']]
+    FIELDS = (
+        Field('duration', 'duration'),
+        Field('segment', 'segments', model=Segment),
+    )
 
     def __lt__(self, other):
         r"""Compare the duration of two :class:`Route`\s.
@@ -119,16 +114,3 @@ class Route(object):
         """
 
         return self.duration == other.duration
-
-    def as_dict(self):
-        """Returns this :class:`Route` as a dictionary.
-
-        Returns
-        -------
-        dict
-            This :class:`Route` as a dictionary."""
-
-        return {
-            'duration': self.duration,
-            'segments': [segment.as_dict() for segment in self.segments]
-        }
@@ -0,0 +1,243 @@
+"""
+Contains the Field class, with which the
+models declare what they read from the API,
+and the model decorator, which generates
+their constructors and as_dict from it.
+"""
+import ast
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..fields import child, select
+
+# Read instead of a missing nested object. Never modified.
+_EMPTY = {}  # type: dict
+
+# The generated constructors of models without nested models, which
+# the constructors of the models containing them build in place.
+_LEAVES = {}  # type: Dict[type, Callable]
+
+
+class Field(object):
+    """One attribute of a model and where it is found in the response.
+
+    Attributes
+    ----------
+        key : str
+            The key of the value in the object of the model. Values of
+            nested objects are found by the path of their keys, like
+            ``'flight/carrier'``.
+        name : str
+            The name of the attribute.
+        default : Union[str, int, bool, list, None]
+            The value of the attribute if the key is missing. It must be
+            a literal, which is copied for each instance if it is a list.
+        model : Optional[type]
+            If set, the value is a list of objects, each of which
+            is built into an instance of this model.
+    """
+
+    __slots__ = ('key', 'name', 'default', 'model')
+
+    def __init__(self, key: str, name: str, default=None,
+                 model: Optional[type] = None):
+        # The default is written into the generated constructor.
+        try:
+            literal = ast.literal_eval(repr(default)) == default
+        except (SyntaxError, ValueError):
+            literal = False
+        if not literal:
+            raise ValueError(
+                'The default of {} is not a literal: {!r}'.format(
+                    name, default
+                )
+            )
+        if model is not None and default is not None:
+            raise ValueError('Fields of models always default to []')
+
+        self.key = key
+        self.name = name
+        self.default = default
+        self.model = model
+
+    def __repr__(self):
+        return 'Field({!r}, {!r})'.format(self.key, self.name)
+
+
+def _check(key: str, default: str) -> str:
+    # Keys of the object itself are checked against its tree instead
+    # of copying the selected ones, see _constructor_source.
+    return ' if every or {!r} in fields else {}'.format(key, default)
+
+
+def _constructor_body(fields: Sequence[Field], selected: bool,
+                      target: str = 'self', get: str = 'get') -> List[str]:
+    # The getters of nested objects are bound once, before reading their
+    # values, as get<n>, and the trees selected within them as tree<n>.
+    objects = {'': (get, 'fields')}  # type: Dict[str, Tuple[str, str]]
+    lines = []  # type: List[str]
+    for field in fields:
+        path = field.key.split('/')
+        for depth in range(1, len(path)):
+            prefix = '/'.join(path[:depth])
+            if prefix in objects:
+                continue
+            getter, tree = objects['/'.join(path[:depth - 1])]
+            number = len(objects)
+            if selected:
+                value = '{}({!r}, _EMPTY)'.format(getter, path[depth - 1])
+                if depth == 1:
+                    value += _check(path[0], '_EMPTY')
+                lines += [
+                    'tree{} = child({}, {!r})'.format(
+                        number, tree, path[depth - 1]
+                    ),
+                    'get{0} = select({1}, tree{0}).get'.format(number, value),
+                ]
+            else:
+                lines.append('{}{} = {}({!r}, _EMPTY).get'.format(
+                    get, number, getter, path[depth - 1]
+                ))
+            objects[prefix] = get + str(number), 'tree{}'.format(number)
+
+    for index, field in enumerate(fields):
+        path = field.key.split('/')
+        getter, tree = objects['/'.join(path[:-1])]
+        if selected and len(path) == 1:
+            check = _check(path[0], repr(field.default))
+        else:
+            check = ''
+        if field.model is None:
+            default = '' if field.default is None else ', {!r}'.format(
+                field.default
+            )
+            lines.append('{}.{} = {}({!r}{}){}'.format(
+                target, field.name, getter, path[-1], default, check
+            ))
+        elif selected:
+            lines += [
+                'items = {}({!r}){}'.format(getter, path[-1], check),
+                'if items:',
+                '    tree = child({}, {!r})'.format(tree, path[-1]),
+                '    self.{} = [_model{}(item, tree) for item in items]'
+                .format(field.name, index),
+                'else:',
+                '    self.{} = []'.format(field.name),
+            ]
+        elif field.model in _LEAVES:
+            # Unless its constructor was replaced, as by a ParseProfiler,
+            # a model without nested models is built in place, which
+            # saves calling its class for each item.
+            lines += [
+                'items = {}({!r})'.format(getter, path[-1]),
+                'if not items:',
+                '    self.{} = []'.format(field.name),
+                'elif _model{0}.__init__ is _init{0}:'.format(index),
+                '    self.{} = built = []'.format(field.name),
+                '    for item in items:',
+                '        obj = _new(_model{})'.format(index),
+                '        iget = item.get',
+            ]
+            lines += ['        ' + line for line in _constructor_body(
+                field.model.FIELDS, False, 'obj', 'iget'
+            )]
+            lines += [
+                '        built.append(obj)',
+                'else:',
+                '    self.{} = [_model{}(item) for item in items]'.format(
+                    field.name, index
+                ),
+            ]
+        else:
+            lines += [
+                'items = {}({!r})'.format(getter, path[-1]),
+                'self.{} = [_model{}(item) for item in items] if items '
+                'else []'.format(field.name, index),
+            ]
+    return lines
+
+
+def _constructor_source(fields: Sequence[Field]) -> str:
+    # Building all fields, the most common case, is kept apart
+    # from building selected ones, so that it checks no trees. The
+    # selected ones are read from the object itself, like select()
+    # would, and only nested objects are copied by select().
+    lines = [
+        'def __init__(self, data, fields=None):',
+        '    if fields is None:',
+        '        get = data.get',
+    ]
+    lines += ['        ' + line for line in _constructor_body(fields, False)]
+    lines += [
+        '    else:',
+        '        get = data.get',
+        "        every = '*' in fields",
+    ]
+    lines += ['        ' + line for line in _constructor_body(fields, True)]
+    return '\n'.join(lines) + '\n'
+
+
+def _serializer_source(fields: Sequence[Field]) -> str:
+    if all(field.model is None for field in fields):
+        # Without nested models, the attributes are the dictionary.
+        return 'def as_dict(self):\n    return self.__dict__\n'
+
+    lines = ['def as_dict(self):', '    return {']
+    for field in fields:
+        if field.model is None:
+            lines.append('        {0!r}: self.{0},'.format(field.name))
+        else:
+            lines.append(
+                '        {0!r}: [item.as_dict() for item in self.{0}],'
+                .format(field.name)
+            )
+    lines.append('    }')
+    return '\n'.join(lines) + '\n'
+
+
+def _define(source: str, qualname: str, namespace: dict,
+            doc: str) -> Callable:
+    # Named after the method, so that tracebacks and profiles
+    # show which model the generated code belongs to.
+    exec(compile(source, '<{}>'.format(qualname), 'exec'), namespace)
+    function = namespace[qualname.rpartition('.')[2]]
+    function.__qualname__ = qualname
+    function.__doc__ = doc
+    return function
+
+
+def model(cls: type) -> type:
+    r"""Generate the constructor and ``as_dict`` of a model
+    from the :class:`Field`\s in its ``FIELDS``.
+
+    The constructor takes the object of the model in the response, and
+    optionally the tree of the fields to build, see :class:`Result`.
+    Each attribute is read with one lookup, and lists of nested models
+    are only looked into if they are selected. ``as_dict`` returns the
+    attributes by name, with nested models as dictionaries. For models
+    without nested models, this is the ``__dict__`` of the instance.
+    """
+
+    fields = cls.FIELDS
+    namespace = {
+        'select': select, 'child': child, '_EMPTY': _EMPTY,
+        '_new': object.__new__
+    }
+    for index, field in enumerate(fields):
+        if field.model is not None:
+            namespace['_model{}'.format(index)] = field.model
+            namespace['_init{}'.format(index)] = _LEAVES.get(field.model)
+
+    cls.__init__ = _define(
+        _constructor_source(fields), cls.__name__ + '.__init__', namespace,
+        'Create a new :class:`{}` from its object in the response,\n'
+        'building only the fields selected by a tree of fields from\n'
+        ':func:`pyflight.fields.fields_tree`, if given.'.format(cls.__name__)
+    )
+    cls.as_dict = _define(
+        _serializer_source(fields), cls.__name__ + '.as_dict', {},
+        'Get a dictionary of the attributes of this :class:`{}`,\n'
+        'with nested models as dictionaries as well.'.format(cls.__name__)
+    )
+    if all(field.model is None for field in fields):
+        _LEAVES[cls] = cls.__init__
+    return cls
@@ -4,10 +4,11 @@ which is used to represent
 one or more consecutive legs
 on the same flight.
 """
-
 from .flight import Flight
+from .schema import Field, model
 
 
+@model
 class Segment(object):  # pylint: disable=too-many-instance-attributes
     r"""A single Segment consisting of one or
     more consecutive legs on the same flight.
@@ -52,28 +53,25 @@ class Segment(object):  # pylint: disable=too-many-instance-attributes
             The flight number of this Segment
         married_segment_group : str
             The Index of a Segment in a married Segment Group
+        connection_duration : int
+            The minutes between the arrival of this Segment and the
+            departure of the next one. ``None`` for the last Segment.
         flights : List[:class:`Flight`]
             The flights from takeoff to landing for this Segment.
     """
 
-    def __init__(self, segment: dict):
-        """Create a new Segment Object.
-
-        Parameters
-        ----------
-            segment : dict
-                The dictionary to construct this Segment from.
-        """
-        self.id = segment['id']  # pylint: disable=invalid-name
-        self.duration = segment['duration']
-        self.cabin = segment['cabin']
-        self.booking_code = segment['bookingCode']
-        self.booking_code_count = segment['bookingCodeCount']
-        self.flight_carrier = segment['flight']['carrier']
-        self.flight_number = segment['flight']['number']
-        self.married_segment_group = segment['marriedSegmentGroup']
-
-        self.flights = [Flight(f) for f in segment['leg']]
+    FIELDS = (
+        Field('id', 'id'),
+        Field('duration', 'duration'),
+        Field('cabin', 'cabin'),
+        Field('bookingCode', 'booking_code'),
+        Field('bookingCodeCount', 'booking_code_count'),
+        Field('flight/carrier', 'flight_carrier'),
+        Field('flight/number', 'flight_number'),
+        Field('marriedSegmentGroup', 'married_segment_group'),
+        Field('connectionDuration', 'connection_duration'),
+        Field('leg', 'flights', model=Flight),
+    )
 
     def __eq__(self, other):
         """Compare one :class:`Segment` object to another."""
@@ -158,24 +156,3 @@ class Segment(object):  # pylint: disable=too-many-instance-attributes
         """
 
         return (f for f in self.flights if condition_function(f))
-
-    def as_dict(self):
-        """Get a dictionary representing the contents of this :class:`Segment`.
-
-        Returns
-        -------
-        dict
-            A dictionary containing the Data of this :class:`Flight` object.
-        """
-
-        return {
-            'id': self.id,
-            'duration': self.duration,
-            'cabin': self.cabin,
-            'booking_code': self.booking_code,
-            'booking_code_count': self.booking_code_count,
-            'flight_carrier': self.flight_carrier,
-            'flight_number': self.flight_number,
-            'married_segment_group': self.married_segment_group,
-            'flights': [x.as_dict() for x in self.flights]
-        }
@@ -3,10 +3,11 @@ Contains the SegmentPricing class
 which contains information about
 price and baggage for segments.
 """
-
 from .free_baggage_option import FreeBaggageOption
+from .schema import Field, model
 
 
+@model
 class SegmentPricing(object):
     r"""Price and baggage information for segments.
 
@@ -37,21 +38,11 @@ class SegmentPricing(object):
 
     """
 
-    def __init__(self, segment_data: dict):
-        """Create a new SegmentPricing object.
-
-        Arguments:
-            segment_data : dict
-                The Data for a single SegmentPricing
-                returned in Arrays from the API.
-
-        """
-        self.segment_id = segment_data['segmentId']
-        self.fare_id = segment_data['fareId']
-        self.free_baggage = [
-            FreeBaggageOption(fbo)
-            for fbo in segment_data.get('freeBaggageOption', [])
-        ]
+    FIELDS = (
+        Field('segmentId', 'segment_id'),
+        Field('fareId', 'fare_id'),
+        Field('freeBaggageOption', 'free_baggage', model=FreeBaggageOption),
+    )
 
     def __eq__(self, other):
         """Compares two :class:`SegmentPricing` objects for equality.
@@ -75,19 +66,3 @@ class SegmentPricing(object):
         """
 
         return self.segment_id
-
-    def as_dict(self):
-        """Return a dictionary representing this :class:`SegmentPricing`.
-
-        Returns
-        -------
-        dict
-            A dictionary containing the attributes of this
-            :class:`SegmentPricing` as key / value pairs.
-        """
-
-        return {
-            'segment_id': self.segment_id,
-            'fare_id': self.fare_id,
-            'free_baggage': [fbo.as_dict() for fbo in self.free_baggage]
-        }
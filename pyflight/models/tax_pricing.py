@@ -4,8 +4,10 @@ which contains information about
 the taxes used to calculate the
 total tax per ticket.
 """
+from .schema import Field, model
 
 
+@model
 class TaxPricing(object):
     """The taxes used to calculate the total tax per ticket.
 
@@ -41,18 +43,13 @@ class TaxPricing(object):
             The price of the tax in the sales or equivalent currency.
     """
 
-    def __init__(self, pricing_tax_data: dict):
-        """Create a new :class:`TaxPricing` object.
-
-        Args:
-            pricing_tax_data : dict
-                The ``pricing[].tax[]` data returned from the API.
-        """
-        self.id = pricing_tax_data.get('id', None)  # pylint: disable=invalid-name
-        self.charge_type = pricing_tax_data['chargeType']
-        self.code = pricing_tax_data['code']
-        self.country = pricing_tax_data.get('country', None)
-        self.sale_price = pricing_tax_data['salePrice']
+    FIELDS = (
+        Field('id', 'id'),
+        Field('chargeType', 'charge_type'),
+        Field('code', 'code'),
+        Field('country', 'country'),
+        Field('salePrice', 'sale_price'),
+    )
 
     def __eq__(self, other):
         """Compare two :class:`TaxPricing` objects.
@@ -75,15 +72,3 @@ class TaxPricing(object):
         """
 
         return self.id
-
-    def as_dict(self):
-        """Get a dictionary representation of this :class:`TaxPricing`
-
-        Returns
-        -------
-        dict
-            A dictionary containing the attributes of this
-            :class:`TaxPricing` as key / value pairs.
-        """
-
-        return self.__dict__
@@ -5,11 +5,14 @@ about a single trip - which
 is an itinerary solution -
 as returned by the API.
 """
+import hashlib
 
-from .route import Route
 from .pricing import Pricing
+from .route import Route
+from .schema import Field, model
 
 
+@model
 class Trip(object):
     r"""Contains Information about one Trip - an itinerary solution - from the API.
 
@@ -39,19 +42,12 @@ class Trip(object):
             A list of pricing data from this Trip
     """
 
-    def __init__(self, trip_data: dict):
-        """Create a new Trip object.
-
-        Parameters
-        ----------
-            trip_data : dict The tripOption dictionary returned by
-                the API to create the Trip Object from.
-        """
-        self.total_price = trip_data['saleTotal']
-        self.id = trip_data['id']  # pylint: disable=invalid-name
-
-        self.routes = [Route(r) for r in trip_data['slice']]
-        self.pricing = [Pricing(pd) for pd in trip_data['pricing']]
+    FIELDS = (
+        Field('saleTotal', 'total_price'),
+        Field('id', 'id'),
+        Field('slice', 'routes', model=Route),
+        Field('pricing', 'pricing', model=Pricing),
+    )
 
     def __eq__(self, other):
         """Compare two :class:`Trip` objects with each other for equality
@@ -75,19 +71,45 @@ class Trip(object):
 
         return self.id
 
-    def as_dict(self) -> dict:
-        """Get a dictionary representation of this :class:`Trip`.
+    def fingerprint(self) -> str:
+        """Get a key identifying the itinerary of this :class:`Trip`.
+
+        Unlike the ``id``, which is only unique within a single response,
+        the fingerprint stays the same across responses as long as the
+        carrier, flight number, origin, destination and departure time of
+        each flight of the itinerary are the same. Its price, cabins and
+        booking codes are not part of the fingerprint, so that a move to
+        another fare bucket shows up as a new price of the same itinerary.
 
         Returns
         -------
-        dict
-            A dictionary containing the attributes
-            of this :class:`Trip` as key / value pairs.
+        str
+            A hexadecimal hash of the itinerary.
         """
 
-        return {
-            'total_price': self.total_price,
-            'id': self.id,
-            'routes': [r.as_dict() for r in self.routes],
-            'pricing': [p.as_dict() for p in self.pricing]
-        }
+        key = '/'.join(
+            '|'.join(
+                '{}{} {}-{}@{}'.format(
+                    segment.flight_carrier, segment.flight_number,
+                    f.origin, f.destination, f.departure_time
+                )
+                for segment in route.segments
+                for f in segment.flights
+            )
+            for route in self.routes
+        )
+
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+    def booking_classes(self) -> str:
+        """Get the cabin and booking code of each segment of this
+        :class:`Trip`, such as ``'COACH Y|COACH M/COACH Y'``, with
+        the segments of each route separated by ``'|'``."""
+
+        return '/'.join(
+            '|'.join(
+                '{} {}'.format(segment.cabin, segment.booking_code)
+                for segment in route.segments
+            )
+            for route in self.routes
+        )
@@ -0,0 +1,370 @@
+"""
+Contains the Pipeline class, which
+chains asynchronous processing stages
+with bounded queues, so that slow
+stages apply backpressure to the
+stages and the source before them.
+"""
+import asyncio
+import inspect
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, Optional
+
+_DONE = object()
+
+MAP = 'map'
+FILTER = 'filter'
+SINK = 'sink'
+
+
+class Stage(object):
+    """A single stage of a :class:`Pipeline`.
+
+    Stages are created with :meth:`Pipeline.map`, :meth:`Pipeline.filter`
+    and :meth:`Pipeline.sink`.
+
+    Attributes
+    ----------
+        name : str
+            The name of this stage, used in the statistics.
+        kind : str
+            One of ``'map'``, ``'filter'`` or ``'sink'``.
+        func : Callable
+            The function applied to each item. If it returns an awaitable,
+            such as a coroutine, it is awaited, unless ``executor`` is set.
+        concurrency : int
+            The amount of items processed at once.
+        executor : Optional[:class:`concurrent.futures.Executor`]
+            If set, ``func`` is run in this executor
+            instead of on the event loop.
+        processed : int
+            The amount of items processed successfully.
+        dropped : int
+            The amount of items dropped by a filter stage.
+        errors : int
+            The amount of items for which ``func`` raised an Exception.
+        busy : float
+            The total amount of seconds spent processing items.
+        max_queue_depth : int
+            The maximum amount of items that waited for this stage.
+    """
+
+    def __init__(self, name: str, kind: str, func: Callable,
+                 concurrency: int, executor: Optional[Executor]):
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+
+        self.name = name
+        self.kind = kind
+        self.func = func
+        self.concurrency = concurrency
+        self.executor = executor
+        self.queue = None
+        self.reset()
+
+    def reset(self):
+        """Reset the statistics of this stage."""
+
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.max_queue_depth = 0
+        # The amount of workers that did not see the end of the items yet.
+        self.remaining = self.concurrency
+
+    async def apply(self, item: Any) -> Any:
+        """Apply the function of this stage to an item."""
+
+        if self.executor is not None:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.executor, self.func, item)
+        result = self.func(item)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def stats(self, elapsed: float) -> dict:
+        """Get the statistics of this stage as a dictionary,
+        given the amount of seconds the pipeline has been running."""
+
+        return {
+            'name': self.name,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queue_depth': self.queue.qsize() if self.queue else 0,
+            'max_queue_depth': self.max_queue_depth,
+            'busy': self.busy,
+            'throughput': self.processed / elapsed if elapsed else 0.0
+        }
+
+
+class Pipeline(object):
+    r"""Pushes items from a source through a chain of asynchronous stages.
+
+    Between each two stages, and between the source and the first stage,
+    is a queue holding at most ``queue_size`` items. When a stage can not
+    keep up, the queue before it fills up and the stages before it wait,
+    down to the source, which is only read from when there is room. The
+    amount of items held by a running pipeline is therefore bounded, no
+    matter how many items the source yields.
+
+    Each stage processes up to ``concurrency`` items at once. Stages doing
+    CPU-bound work, such as building :class:`Result`\s, can be given an
+    ``executor`` to run in instead of blocking the event loop.
+
+    Examples
+    --------
+    Search, parse in a thread pool, keep cheap results and store them:
+
+    .. code-block:: python
+
+        pool = concurrent.futures.ThreadPoolExecutor(4)
+        pipeline = (
+            Pipeline(queue_size=50)
+            .map(lambda r: send_async(r, use_containers=False),
+                 concurrency=10, name='search')
+            .map(Result, executor=pool, concurrency=4, name='parse')
+            .filter(lambda r: split_price(r.trips[0].total_price)[1] < 100)
+            .sink(store, concurrency=2)
+        )
+        stats = await pipeline.run(SearchSpace(...))
+
+    Attributes
+    ----------
+        stages : List[:class:`Stage`]
+            The stages of this pipeline, in order.
+        queue_size : int
+            The maximum amount of items in each queue.
+        on_error : Optional[Callable[[Stage, Any, Exception], None]]
+            Called with the stage, the item and the Exception whenever a
+            stage raises an Exception, after which the item is skipped.
+            If ``None``, the Exception stops the pipeline
+            and is raised from :meth:`run`.
+    """
+
+    def __init__(self, queue_size: int = 100,
+                 on_error: Optional[
+                     Callable[[Stage, Any, Exception], None]] = None):
+        """Create a new Pipeline without any stages.
+
+        Parameters
+        ----------
+            queue_size : int
+                The maximum amount of items in each queue.
+            on_error : Optional[Callable[[Stage, Any, Exception], None]]
+                Called for Exceptions raised by stages. If not given,
+                Exceptions stop the pipeline.
+        """
+
+        if queue_size < 1:
+            raise ValueError('queue_size must be at least 1')
+
+        self.stages = []
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self._stopping = False
+        self._started = None
+        self._finished = None
+
+    def _add(self, kind: str, func: Callable, concurrency: int,
+             executor: Optional[Executor], name: Optional[str]) -> 'Pipeline':
+        if self.stages and self.stages[-1].kind == SINK:
+            raise ValueError('Can not add stages after a sink')
+
+        name = name or getattr(func, '__name__', kind)
+        self.stages.append(Stage(name, kind, func, concurrency, executor))
+        return self
+
+    def map(self, func: Callable, concurrency: int = 1,
+            executor: Optional[Executor] = None,
+            name: Optional[str] = None) -> 'Pipeline':
+        """Add a stage that replaces each item with ``func(item)``.
+
+        Returns
+        -------
+        self
+            To ease chaining of this function, ``self`` is returned.
+        """
+
+        return self._add(MAP, func, concurrency, executor, name)
+
+    def filter(self, predicate: Callable, concurrency: int = 1,
+               executor: Optional[Executor] = None,
+               name: Optional[str] = None) -> 'Pipeline':
+        """Add a stage that drops each item for which
+        ``predicate(item)`` is false.
+
+        Returns
+        -------
+        self
+            To ease chaining of this function, ``self`` is returned.
+        """
+
+        return self._add(FILTER, predicate, concurrency, executor, name)
+
+    def sink(self, func: Callable, concurrency: int = 1,
+             executor: Optional[Executor] = None,
+             name: Optional[str] = None) -> 'Pipeline':
+        """Add the final stage, which calls ``func(item)`` for each item
+        and discards its return value. No stages can be added after it.
+
+        Returns
+        -------
+        self
+            To ease chaining of this function, ``self`` is returned.
+        """
+
+        return self._add(SINK, func, concurrency, executor, name)
+
+    def stop(self):
+        """Stop reading from the source. Items already read are still
+        processed, after which :meth:`run` returns."""
+
+        self._stopping = True
+
+    def stats(self) -> dict:
+        """Get statistics about the current or last run of this pipeline.
+
+        Returns
+        -------
+        dict
+            The amount of seconds the pipeline ran as ``elapsed``, and
+            ``stages``, a list with the statistics of each :class:`Stage`:
+            its ``name``, how many items were ``processed``, ``dropped``
+            or raised ``errors``, the current and maximum queue depth
+            before it, the seconds it was ``busy`` and its ``throughput``
+            in items per second.
+        """
+
+        if self._started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished or time.monotonic()) - self._started
+
+        return {
+            'elapsed': elapsed,
+            'stages': [stage.stats(elapsed) for stage in self.stages]
+        }
+
+    async def run(self, source: Iterable) -> dict:
+        """Push all items of ``source`` through the pipeline.
+
+        If this coroutine is cancelled, all stages are cancelled as well.
+
+        Parameters
+        ----------
+            source : Union[Iterable, AsyncIterable]
+                The items to process. It is only read from
+                when the first queue has room.
+
+        Raises
+        ------
+        Exception
+            The first Exception raised by a stage,
+            unless ``on_error`` is set.
+
+        Returns
+        -------
+        dict
+            The statistics of this run, see :meth:`stats`.
+        """
+
+        if not self.stages:
+            raise ValueError('Pipeline has no stages')
+
+        self._stopping = False
+        self._started = time.monotonic()
+        self._finished = None
+        for stage in self.stages:
+            stage.reset()
+            stage.queue = asyncio.Queue(self.queue_size)
+
+        tasks = [asyncio.ensure_future(self._feed(source))]
+        for index, stage in enumerate(self.stages):
+            following = self.stages[index + 1] \
+                if index + 1 < len(self.stages) else None
+            tasks.extend(
+                asyncio.ensure_future(self._work(stage, following))
+                for _ in range(stage.concurrency)
+            )
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            self._finished = time.monotonic()
+
+        return self.stats()
+
+    @staticmethod
+    async def _put(stage: Stage, item: Any):
+        await stage.queue.put(item)
+        depth = stage.queue.qsize()
+        if depth > stage.max_queue_depth:
+            stage.max_queue_depth = depth
+
+    async def _feed(self, source):
+        first = self.stages[0]
+        # Check for stop() before reading an item, so no item that
+        # was read from the source is lost.
+        if hasattr(source, '__aiter__'):
+            items = source.__aiter__()
+            while not self._stopping:
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    break
+                await self._put(first, item)
+        else:
+            items = iter(source)
+            while not self._stopping:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                await self._put(first, item)
+
+        # Only signal the end after all items were fed. If feeding failed
+        # or was cancelled, run() cancels the workers instead, and nothing
+        # would take the signals from a full queue.
+        for _ in range(first.concurrency):
+            await first.queue.put(_DONE)
+
+    async def _work(self, stage: Stage, following: Optional[Stage]):
+        while True:
+            item = await stage.queue.get()
+            if item is _DONE:
+                stage.remaining -= 1
+                if not stage.remaining and following is not None:
+                    for _ in range(following.concurrency):
+                        await following.queue.put(_DONE)
+                return
+
+            start = time.monotonic()
+            try:
+                result = await stage.apply(item)
+            except Exception as error:  # pylint: disable=broad-except
+                stage.errors += 1
+                if self.on_error is None:
+                    raise
+                self.on_error(stage, item, error)
+                continue
+            finally:
+                stage.busy += time.monotonic() - start
+
+            stage.processed += 1
+            if stage.kind == FILTER:
+                if not result:
+                    stage.dropped += 1
+                    continue
+                result = item
+
+            if following is not None:
+                await self._put(following, result)
@@ -0,0 +1,259 @@
+"""
+Contains the ParseProfiler class, which
+measures how many instances of each model
+are built while parsing, and how much
+time and memory building them takes.
+"""
+import functools
+import threading
+import time
+import tracemalloc
+from typing import Dict, Iterable, Optional
+
+from .models.airport import Airport
+from .models.bag_descriptor import BagDescriptor
+from .models.fare import Fare
+from .models.flight import Flight
+from .models.flight_data import Aircraft, Carrier, City, Tax
+from .models.free_baggage_option import FreeBaggageOption
+from .models.pricing import Pricing
+from .models.route import Route
+from .models.segment import Segment
+from .models.segment_pricing import SegmentPricing
+from .models.tax_pricing import TaxPricing
+from .models.trip import Trip
+from .result import Result
+
+MODELS = (
+    Result, Trip, Route, Segment, Flight, Pricing, Fare, SegmentPricing,
+    FreeBaggageOption, BagDescriptor, TaxPricing, Airport, Aircraft,
+    Carrier, City, Tax
+)
+
+_active = None  # type: Optional[ParseProfiler]
+
+
+class ModelStats(object):
+    """What building the instances of one model class cost.
+
+    Attributes
+    ----------
+        count : int
+            The amount of instances built.
+        total : float
+            The seconds spent in the constructors,
+            including building nested models.
+        own : float
+            The seconds spent in the constructors,
+            excluding building nested models.
+        allocated : int
+            The bytes of memory allocated by the constructors and not
+            freed before they returned, including nested models.
+        own_allocated : int
+            The same, excluding nested models.
+    """
+
+    __slots__ = ('count', 'total', 'own', 'allocated', 'own_allocated')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.allocated = 0
+        self.own_allocated = 0
+
+    def as_dict(self) -> dict:
+        """Get a dictionary representing these :class:`ModelStats`."""
+
+        return {
+            'count': self.count,
+            'total': self.total,
+            'own': self.own,
+            'allocated': self.allocated,
+            'own_allocated': self.own_allocated
+        }
+
+
+class ParseProfiler(object):
+    """Profiles the construction of :class:`Result` and the models.
+
+    While enabled, the constructors of the profiled classes are wrapped
+    to count instances and measure time and, using :mod:`tracemalloc`,
+    memory. This slows parsing down considerably, so the numbers are
+    best compared with each other rather than with unprofiled timings.
+    Only one profiler can be enabled at a time.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        with ParseProfiler() as profiler:
+            result = Result(response)
+
+        print(profiler.report())
+
+    Attributes
+    ----------
+        models : Tuple[type, ...]
+            The profiled classes.
+        memory : bool
+            Whether allocated memory is measured.
+    """
+
+    def __init__(self, models: Iterable[type] = MODELS, memory: bool = True):
+        """Create a new, disabled ParseProfiler.
+
+        Parameters
+        ----------
+            models : Iterable[type]
+                The classes to profile. Defaults to all models.
+            memory : bool
+                Whether to measure allocated memory.
+        """
+
+        self.models = tuple(models)
+        self.memory = memory
+        self._stats = {}  # type: Dict[str, ModelStats]
+        self._originals = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    @property
+    def enabled(self) -> bool:
+        """Whether this profiler is currently enabled."""
+
+        return _active is self
+
+    def enable(self):
+        """Start profiling. Statistics of earlier runs are kept."""
+
+        global _active  # pylint: disable=global-statement
+        if _active is self:
+            return
+        if _active is not None:
+            raise RuntimeError('Another ParseProfiler is enabled already')
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        # Look up all constructors before wrapping any, so that models
+        # inheriting their constructor wrap the original one.
+        inits = {
+            model: next(
+                vars(base)['__init__'] for base in model.__mro__
+                if '__init__' in vars(base)
+            )
+            for model in self.models
+        }
+        for model, init in inits.items():
+            self._originals[model] = vars(model).get('__init__')
+            stats = self._stats.setdefault(model.__name__, ModelStats())
+            model.__init__ = self._wrap(init, stats)
+
+        _active = self
+
+    def disable(self):
+        """Stop profiling and restore the original constructors."""
+
+        global _active  # pylint: disable=global-statement
+        if _active is not self:
+            return
+
+        for model, original in self._originals.items():
+            if original is None:
+                del model.__init__
+            else:
+                model.__init__ = original
+        self._originals = {}
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        _active = None
+
+    def __enter__(self) -> 'ParseProfiler':
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def reset(self):
+        """Clear the statistics."""
+
+        # The wrapped constructors hold on to their ModelStats,
+        # so these are cleared instead of replaced.
+        with self._lock:
+            for stats in self._stats.values():
+                stats.__init__()
+
+    def _wrap(self, init, stats: ModelStats):
+        local = self._local
+        lock = self._lock
+        memory = self.memory
+
+        @functools.wraps(init)
+        def __init__(instance, *args, **kwargs):
+            stack = getattr(local, 'stack', None)
+            if stack is None:
+                stack = local.stack = []
+
+            # The time and memory of nested models, to be subtracted.
+            nested = [0.0, 0]
+            stack.append(nested)
+            before = tracemalloc.get_traced_memory()[0] if memory else 0
+            start = time.perf_counter()
+            try:
+                init(instance, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                allocated = tracemalloc.get_traced_memory()[0] - before \
+                    if memory else 0
+                stack.pop()
+                if stack:
+                    stack[-1][0] += elapsed
+                    stack[-1][1] += allocated
+
+                with lock:
+                    stats.count += 1
+                    stats.total += elapsed
+                    stats.own += elapsed - nested[0]
+                    stats.allocated += allocated
+                    stats.own_allocated += allocated - nested[1]
+
+        return __init__
+
+    def stats(self) -> Dict[str, dict]:
+        """Get the :class:`ModelStats` of each profiled class that was
+        instantiated, by class name, as dictionaries."""
+
+        with self._lock:
+            return {
+                name: stats.as_dict()
+                for name, stats in self._stats.items() if stats.count
+            }
+
+    def report(self) -> str:
+        """Format the statistics as a table,
+        the most expensive models first."""
+
+        lines = ['{:<18} {:>8} {:>10} {:>10} {:>12} {:>12}'.format(
+            'model', 'count', 'total ms', 'own ms', 'total KiB', 'own KiB'
+        )]
+        ordered = sorted(
+            self.stats().items(), key=lambda item: -item[1]['own']
+        )
+        for name, stats in ordered:
+            lines.append(
+                '{:<18} {:>8} {:>10.3f} {:>10.3f} {:>12.1f} {:>12.1f}'.format(
+                    name, stats['count'], stats['total'] * 1000,
+                    stats['own'] * 1000, stats['allocated'] / 1024,
+                    stats['own_allocated'] / 1024
+                )
+            )
+
+        return '\n'.join(lines)
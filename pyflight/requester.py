@@ -1,13 +1,29 @@
 """
 Provides an easy-to-use interface to use pyflight with.
 """
+import asyncio
+import functools
+import json
 import re
-from typing import List, Optional, Union
-
-from .api import requester
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, \
+    ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Union
+
+from .api import BASE_URL, Requester, requester
+from .background import BackgroundLoop
+from .batch import Batcher
+from .canonical import FrozenRequest
+from .cassette import Cassette
+from .circuit_breaker import CircuitBreaker
+from .fields import fields_selector, fields_url
+from .hedging import Hedger
+from .hooks import PARSE, RequestEvent, Trace
+from .limiter import AdaptiveLimiter
+from .metrics import Metrics
 from .result import Result
+from .transports import TRANSPORTS, Transport
 
-BASE_URL = 'https://www.googleapis.com/qpxExpress/v1/trips/search?key='
 __API_KEY = ''
 MAX_PRICE_REGEX = re.compile(r'[A-Z]{3}\d+(\.\d+)?')
 ALLOWED_PREFERRED_CABINS = 'COACH', 'PREMIUM_COACH', 'BUSINESS', 'FIRST'
@@ -123,7 +139,7 @@ class Slice:
 
     @max_stops.setter
     def max_stops(self, max_stops: int):
-        self.raw_data['max_stops'] = max_stops
+        self.raw_data['maxStops'] = max_stops
 
     @property
     def max_connection_duration(self) -> Optional[int]:
@@ -297,6 +313,15 @@ class Request:
 
         return self.raw_data
 
+    def freeze(self) -> FrozenRequest:
+        """
+        Returns an immutable, hashable :class:`FrozenRequest` with the
+        canonical form of the data of this request. Later changes to this
+        request do not affect the returned :class:`FrozenRequest`.
+        """
+
+        return FrozenRequest(self.raw_data)
+
     def send_sync(self, use_containers: bool = True) -> Union[Result, dict]:
         """Synchronously execute a request.
 
@@ -438,35 +463,539 @@ class Request:
         self.raw_data['request']['solutions'] = count
 
 
-def set_api_key(key: str):
+RequestBody = Union[dict, Request, FrozenRequest]
+Fields = Union[str, Iterable[str], None]
+
+
+def set_api_key(key: str, client: Optional[Requester] = None):
     """Set the API key to use with the API.
 
     Parameters
     ----------
         key : str
             The API key to execute requests with.
+        client : Optional[Requester]
+            The :class:`Requester` to use the key with.
+            Defaults to the shared requester.
+    """
+
+    (client or requester).api_key = key
+
+
+def enable_hedging(percentile: float = 95.0, budget_percent: float = 5.0,
+                   min_samples: int = 20, window: int = 1000,
+                   client: Optional[Requester] = None) -> Hedger:
+    """Enable hedging of slow requests sent with :meth:`send_async`.
+
+    Once a request has been in flight for longer than ``percentile`` of
+    the latencies seen so far, a duplicate request is sent, and whichever
+    response arrives first is used. See :class:`Hedger` for details.
+
+    Parameters
+    ----------
+        percentile : float
+            The latency percentile after which a duplicate is sent.
+        budget_percent : float
+            The maximum amount of duplicates, as a percentage of all requests.
+        min_samples : int
+            The amount of latencies to track before hedging starts.
+        window : int
+            The amount of latencies after which tracking starts over,
+            so that the delay follows changes in latency.
+        client : Optional[Requester]
+            The :class:`Requester` to hedge the requests of.
+            Defaults to the shared requester.
+
+    Returns
+    -------
+    :class:`Hedger`
+        The new :class:`Hedger`, whose counters
+        can be inspected with :meth:`Hedger.stats`.
     """
 
-    requester.api_key = key
+    client = client or requester
+    client.hedger = Hedger(percentile, budget_percent, min_samples, window)
+    return client.hedger
+
+
+def disable_hedging(client: Optional[Requester] = None):
+    """Disable hedging of requests enabled with :meth:`enable_hedging`."""
+
+    (client or requester).hedger = None
+
+
+def enable_circuit_breakers(
+        listener: Optional[Callable[[CircuitBreaker, str, str], None]] = None,
+        client: Optional[Requester] = None, **settings):
+    r"""Guard each API endpoint with its own :class:`CircuitBreaker`.
+
+    While the circuit breaker of an endpoint is open, :meth:`send_async`
+    and :meth:`send_sync` raise a :class:`CircuitOpenError` right away
+    instead of sending requests to it.
+
+    Parameters
+    ----------
+        listener : Optional[Callable[[CircuitBreaker, str, str], None]]
+            Called with the circuit breaker, its old and its new state
+            whenever the state of a circuit breaker changes.
+        client : Optional[Requester]
+            The :class:`Requester` to guard the endpoints of.
+            Defaults to the shared requester.
+        \*\*settings
+            Passed to :class:`CircuitBreaker`, for example
+            ``error_rate=0.3`` or ``open_duration=10``.
+    """
+
+    client = client or requester
+    with client._circuit_breaker_lock:  # pylint: disable=protected-access
+        client.circuit_breaker_settings = settings
+        client.circuit_breaker_listeners = [listener] if listener else []
+        client.circuit_breakers = {}
+
+
+def disable_circuit_breakers(client: Optional[Requester] = None):
+    """Disable the circuit breakers enabled
+    with :meth:`enable_circuit_breakers`."""
+
+    client = client or requester
+    with client._circuit_breaker_lock:  # pylint: disable=protected-access
+        client.circuit_breaker_settings = None
+        client.circuit_breakers = {}
+
+
+def set_base_url(url: Optional[str] = None,
+                 client: Optional[Requester] = None):
+    """Set the URL that searches are sent to, for example to send them
+    to a local :class:`MockServer` instead of the QPX Express API.
+
+    To send searches to different URLs at the same time, create a
+    :class:`Requester` for each of them and pass it as the ``client``
+    of the send functions.
+
+    Parameters
+    ----------
+        url : Optional[str]
+            The URL of the ``trips/search`` endpoint, ending with the
+            query parameter the API key is appended to, like
+            ``'http://localhost:8080/qpxExpress/v1/trips/search?key='``.
+            If ``None``, the QPX Express API is used again.
+        client : Optional[Requester]
+            The :class:`Requester` to send searches to the URL with.
+            Defaults to the shared requester.
+    """
+
+    (client or requester).base_url = url or BASE_URL
+
+
+def set_parse_executor(executor: Union[str, Executor, None] = 'thread',
+                       threshold: int = 64 * 1024,
+                       workers: Optional[int] = None,
+                       client: Optional[Requester] = None) \
+        -> Optional[Executor]:
+    """Parse large responses of :meth:`send_async` outside the event loop.
+
+    Building a :class:`Result` for a response with hundreds of trips takes
+    long enough to hold up every other request in flight. With a parse
+    executor, responses of at least ``threshold`` bytes are decoded and
+    turned into a :class:`Result` in the executor instead.
+
+    Parameters
+    ----------
+        executor : Union[str, Executor, None]
+            ``'thread'`` or ``'process'`` to create a new thread or process
+            pool, an existing :class:`concurrent.futures.Executor`, or
+            ``None`` to parse all responses on the event loop again.
+        threshold : int
+            The size in bytes from which on responses are parsed in
+            the executor. Smaller responses are parsed right away,
+            as handing them to the executor costs more than it saves.
+        workers : Optional[int]
+            The amount of workers of a newly created pool.
+        client : Optional[Requester]
+            The :class:`Requester` to parse the responses of.
+            Defaults to the shared requester.
+
+    Returns
+    -------
+    Optional[:class:`concurrent.futures.Executor`]
+        The executor responses are parsed in now. A pool created from
+        ``'thread'`` or ``'process'`` is shut down once it is replaced
+        by calling this function again, which waits for the responses
+        being parsed in it. Executors passed in are not shut down.
+    """
+
+    client = client or requester
+    created = None
+    if isinstance(executor, str):
+        if executor == 'thread':
+            created = executor = ThreadPoolExecutor(workers)
+        elif executor == 'process':
+            created = executor = ProcessPoolExecutor(workers)
+        else:
+            raise ValueError(
+                "executor must be 'thread', 'process' or an Executor"
+            )
+
+    # pylint: disable=protected-access
+    previous, client._created_parse_executor = \
+        client._created_parse_executor, created
+    client.parse_executor = executor
+    client.parse_threshold = threshold
+    if previous is not None:
+        # Waits for the responses being parsed in it, as process
+        # pools that are not waited for can hang on Python 3.7.
+        previous.shutdown()
+    return executor
+
+
+def add_hook(listener: Callable[[RequestEvent], None],
+             client: Optional[Requester] = None):
+    """Call ``listener`` with a :class:`RequestEvent` for each
+    phase of each request sent by :meth:`send_async` and
+    :meth:`send_sync`, such as connecting or decoding.
+
+    Parameters
+    ----------
+        listener : Callable[[RequestEvent], None]
+            Called on the thread that sent the request
+            at the end of each phase. Must not raise.
+        client : Optional[Requester]
+            The :class:`Requester` to listen to the requests of.
+            Defaults to the shared requester.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        def log_slow_downloads(event):
+            if event.phase == 'download' and event.duration > 1:
+                print('Downloading', event.size, 'bytes took', event.duration)
+
+        pyflight.add_hook(log_slow_downloads)
+    """
+
+    (client or requester).hooks.add(listener)
+
+
+def remove_hook(listener: Callable[[RequestEvent], None],
+                client: Optional[Requester] = None):
+    """Stop calling a listener added with :meth:`add_hook`."""
+
+    (client or requester).hooks.remove(listener)
+
+
+def enable_metrics(prefix: str = 'pyflight',
+                   client: Optional[Requester] = None) -> Metrics:
+    """Keep :class:`Metrics` about all requests sent by a requester.
+
+    Besides the metrics derived from the request events, the registry
+    counts the duplicate requests fired and won by hedging as
+    ``hedges_fired_total`` and ``hedges_won_total``, and the hits and
+    misses of the cassette in use as ``cassette_hits_total`` and
+    ``cassette_misses_total``. The current limit of the
+    :class:`AdaptiveLimiter` used with :meth:`send_many_async`
+    is the gauge ``concurrency_limit``.
+
+    Parameters
+    ----------
+        prefix : str
+            Prepended to the names of the metrics when rendered as text.
+        client : Optional[Requester]
+            The :class:`Requester` to keep metrics about.
+            Defaults to the shared requester.
+
+    Returns
+    -------
+    :class:`Metrics`
+        The registry, whose :meth:`Metrics.snapshot` and
+        :meth:`Metrics.render` give the current values.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        metrics = pyflight.enable_metrics()
+        ...
+        # In the handler of the /metrics endpoint of the application:
+        return metrics.render()
+    """
+
+    client = client or requester
+    disable_metrics(client)
+
+    def collect() -> dict:
+        values = {}
+        if client.hedger is not None:
+            values['hedges_fired_total'] = client.hedger.hedges_fired
+            values['hedges_won_total'] = client.hedger.hedges_won
+        if client.cassette is not None:
+            values['cassette_hits_total'] = client.cassette.hits
+            values['cassette_misses_total'] = client.cassette.misses
+        return values
+
+    def gauges() -> dict:
+        if client.limiter is None:
+            return {}
+        return {'concurrency_limit': client.limiter.limit}
+
+    client.metrics = Metrics(prefix)
+    client.metrics.add_collector(collect)
+    client.metrics.add_collector(gauges, gauge=True)
+    client.hooks.add(client.metrics)
+    return client.metrics
+
+
+def disable_metrics(client: Optional[Requester] = None):
+    """Stop keeping the metrics enabled with :meth:`enable_metrics`."""
+
+    client = client or requester
+    if client.metrics is not None:
+        client.hooks.remove(client.metrics)
+        client.metrics = None
+
+
+def set_transport(transport: Union[str, Transport],
+                  client: Optional[Requester] = None) -> Transport:
+    """Select the library requests are sent with.
+
+    Transports supporting asynchronous requests are used by
+    :meth:`send_async`, and those supporting synchronous requests by
+    :meth:`send_sync`. For example, selecting ``'aiohttp'`` leaves
+    :meth:`send_sync` alone, while ``'httpx'`` is used by both.
+
+    Parameters
+    ----------
+        transport : Union[str, Transport]
+            ``'aiohttp'`` and ``'requests'``, the defaults, ``'httpx'``,
+            which uses HTTP/2 and needs ``httpx[http2]`` to be installed,
+            ``'memory'`` to answer with synthetic responses without
+            any network, or a :class:`Transport`.
+        client : Optional[Requester]
+            The :class:`Requester` to use the transport with.
+            Defaults to the shared requester.
+
+    Returns
+    -------
+    :class:`Transport`
+        The transport now in use.
+    """
 
+    if isinstance(transport, str):
+        if transport not in TRANSPORTS:
+            raise ValueError('transport must be one of {}'.format(
+                ', '.join(TRANSPORTS)
+            ))
+        transport = TRANSPORTS[transport]()
 
-async def send_async(request_body: Union[dict, Request], use_containers: bool = True):
+    client = client or requester
+    if transport.asynchronous:
+        client.transport = transport
+    if transport.synchronous:
+        client.sync_transport = transport
+    return transport
+
+
+def use_cassette(path: str, mode: str = 'auto',
+                 simulate_latency: bool = False, latency_scale: float = 1.0,
+                 client: Optional[Requester] = None) -> Cassette:
+    """Record responses to, or replay them from, a :class:`Cassette`.
+
+    Responses are keyed by the canonical request body and the ``fields``
+    selector, so partial responses are never replayed to full searches.
+
+    Parameters
+    ----------
+        path : str
+            The directory the responses are saved in.
+        mode : str
+            ``'record'`` to send all requests and save their responses,
+            ``'replay'`` to only serve saved responses, or ``'auto'``
+            to serve saved responses and record the others.
+        simulate_latency : bool
+            Whether replaying waits as long as the recorded request took.
+        latency_scale : float
+            The factor applied to the recorded latency when simulating it.
+        client : Optional[Requester]
+            The :class:`Requester` to use the cassette with.
+            Defaults to the shared requester.
+
+    Returns
+    -------
+    :class:`Cassette`
+        The cassette now in use.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        pyflight.use_cassette('tests/cassettes', mode='replay')
+        result = pyflight.send_sync(my_request)
+    """
+
+    client = client or requester
+    client.cassette = Cassette(
+        path, mode, simulate_latency, latency_scale
+    )
+    return client.cassette
+
+
+def eject_cassette(client: Optional[Requester] = None):
+    """Send requests normally again after :meth:`use_cassette`."""
+
+    (client or requester).cassette = None
+
+
+def enable_background_loop(client: Optional[Requester] = None) \
+        -> BackgroundLoop:
+    """Make :meth:`send_sync` send requests on an event loop running
+    in a background thread, instead of with ``requests``.
+
+    Blocking code then shares one pool of connections between all of
+    its threads and can use :meth:`send_many_sync` to have many requests
+    in flight at once. Hedging only applies to requests sent this way.
+
+    Parameters
+    ----------
+        client : Optional[Requester]
+            The :class:`Requester` to use the loop with.
+            Defaults to the shared requester.
+
+    Returns
+    -------
+    :class:`BackgroundLoop`
+        The loop requests are sent on now.
+    """
+
+    client = client or requester
+    if client.background is None:
+        client.background = BackgroundLoop()
+    return client.background
+
+
+def disable_background_loop(client: Optional[Requester] = None):
+    """Close the loop started by :meth:`enable_background_loop`
+    and send requests with ``requests`` again."""
+
+    client = client or requester
+    background, client.background = client.background, None
+    if background is not None:
+        background.close()
+
+
+def enable_batching(max_size: int = 20, window: float = 0.005,
+                    client: Optional[Requester] = None) -> Batcher:
+    """Pack searches sent at about the same time into ``multipart/mixed``
+    batch requests, sending fewer requests to the API.
+
+    Each search still returns its own :class:`Result` or raises its own
+    :class:`APIException`. Batching applies to :meth:`send_async` and
+    to :meth:`send_sync` with :meth:`enable_background_loop`, where many
+    searches can be waiting at once. It adds up to ``window`` seconds to
+    the latency of a search. Duplicates fired by hedging are batched like
+    any other search, so they wait for the window as well.
+
+    Parameters
+    ----------
+        max_size : int
+            The most searches to send in one batch.
+        window : float
+            The seconds to wait for more searches before sending a batch.
+        client : Optional[Requester]
+            The :class:`Requester` to batch the searches of.
+            Defaults to the shared requester.
+
+    Returns
+    -------
+    :class:`Batcher`
+        The batcher, which counts the batches sent.
+    """
+
+    client = client or requester
+    client.batcher = Batcher(max_size, window)
+    return client.batcher
+
+
+def disable_batching(client: Optional[Requester] = None):
+    """Send each search on its own again, after
+    :meth:`enable_batching`. Pending batches are still sent."""
+
+    (client or requester).batcher = None
+
+
+def _to_result(response: dict, trace: Optional[Trace],
+               fields: Optional[str] = None) -> Result:
+    start = time.monotonic()
+    result = Result(response, fields)
+    if trace is not None:
+        trace.emit(PARSE, start)
+    return result
+
+
+def _parse_result(body: bytes, fields: Optional[str] = None) -> Result:
+    # Defined at module level so that process pools can pickle it.
+    return Result(json.loads(body), fields)
+
+
+def _selector(fields: Fields) -> Optional[str]:
+    return None if fields is None else fields_selector(fields)
+
+
+def _url(client: Requester, fields: Fields) -> str:
+    if fields is None:
+        return client.base_url
+    return fields_url(client.base_url, fields_selector(fields))
+
+
+def _payload(request_body: RequestBody) -> Union[dict, bytes]:
+    if isinstance(request_body, dict):
+        return request_body
+    if isinstance(request_body, Request):
+        return request_body.raw_data
+    if isinstance(request_body, FrozenRequest):
+        return request_body.json_bytes
+
+    raise ValueError('Unsupported Request Type')
+
+
+async def send_async(request_body: RequestBody, use_containers: bool = True,
+                     client: Optional[Requester] = None,
+                     fields: Fields = None, result_fields: Fields = None):
     """Asynchronously execute and send a JSON Request or a :class:`Request`.
      This is a coroutine - calling this function must be awaited.
 
     Parameters
     ----------
-    request_body : Union[dict, Request]
+    request_body : Union[dict, Request, FrozenRequest]
         The body of the request to be sent to the API.
         This must follow the structure described here:
         https://developers.google.com/qpx-express/v1/trips/search
         It is heavily recommended to use :class:`Request` instead
-        of constructing request bodies manually.
+        of constructing request bodies manually. For a
+        :class:`FrozenRequest`, its cached ``json_bytes`` are sent.
     use_containers : Optional[bool]
         Whether the containers given should be used or not.
         If False is given, any API call will return a dictionary
         of the "raw" API data without any modification. Otherwise, an
         API call will return a :class:`Result` object.
+    client : Optional[Requester]
+        The :class:`Requester` to send the request with, for example one
+        with another ``base_url``. Defaults to the shared requester
+        configured by :meth:`set_api_key` and :meth:`set_base_url`.
+    fields : Union[str, Iterable[str], None]
+        Only ask the API for these fields of the response, so that less
+        of it is downloaded and decoded. Either a ``fields`` selector such
+        as ``'trips/tripOption(id,saleTotal)'``, or the paths of the
+        fields, see :func:`fields_selector`. Attributes of the
+        :class:`Result` that were not asked for are ``None`` or empty.
+        Defaults to the whole response.
+    result_fields : Union[str, Iterable[str], None]
+        Only build these fields of the :class:`Result`, see its
+        ``fields``. Unlike ``fields``, the whole response is still
+        downloaded, for example to replay it from a cassette, but the
+        rest of it is skipped while parsing. Defaults to all fields.
 
     Raises
     ------
@@ -478,44 +1007,76 @@ async def send_async(request_body: Union[dict, Request], use_containers: bool =
     -------
     :class:`Result`
         If ``use_containers`` is ``True`` and no Error occurred.
+        Large responses are parsed outside the event loop
+        if enabled with :meth:`set_parse_executor`.
     dict
         If ``use_containers`` is ``False``,
         as a raw dictionary without any adjustments.
 
     """
 
-    if isinstance(request_body, dict):
-        response = await requester.post_request(BASE_URL, request_body)
-    elif isinstance(request_body, Request):
-        response = await requester.post_request(
-            BASE_URL, request_body.raw_data
-        )
-    else:
-        raise ValueError('Unsupported Request Type')
-
-    if use_containers:
-        return Result(response)
-
+    client = client or requester
+    url = _url(client, fields)
+    selector = _selector(result_fields)
+    trace = client.hooks.begin(client.base_url) if client.hooks else None
+    try:
+        if use_containers and client.parse_executor is not None:
+            response = await client.post_request(
+                url, _payload(request_body),
+                parse=functools.partial(_parse_result, fields=selector)
+            )
+        else:
+            response = await client.post_request(url, _payload(request_body))
+            if use_containers:
+                response = _to_result(response, trace, selector)
+    except BaseException as error:
+        if trace is not None:
+            trace.finish(error)
+        raise
+
+    if trace is not None:
+        trace.finish()
     return response
 
 
-def send_sync(request_body: Union[dict, Request], use_containers: bool = True):
+def send_sync(request_body: RequestBody, use_containers: bool = True,
+              client: Optional[Requester] = None, fields: Fields = None,
+              result_fields: Fields = None):
     """Synchronously execute and send a JSON-Request or a :class:`Request.
     Note that this function is blocking.
 
     Parameters
     ----------
-    request_body : Union[dict, Request]
+    request_body : Union[dict, Request, FrozenRequest]
         The body of the request to be sent to the API.
         This must follow the structure described here:
         https://developers.google.com/qpx-express/v1/trips/search
         It is heavily recommended to use :class:`Request` instead
-        of constructing request bodies manually.
+        of constructing request bodies manually. For a
+        :class:`FrozenRequest`, its cached ``json_bytes`` are sent.
     use_containers : Optional[bool]
         Whether the containers given should be used or not.
         If False is given, any API call will return a dictionary
         of the "raw" API data without any modification. Otherwise,
         the API call will return a :class:`Result` object.
+    client : Optional[Requester]
+        The :class:`Requester` to send the request with, for example one
+        with another ``base_url``. Defaults to the shared requester
+        configured by :meth:`set_api_key` and :meth:`set_base_url`.
+        If it has a background loop, see :meth:`enable_background_loop`,
+        the request is sent on that loop.
+    fields : Union[str, Iterable[str], None]
+        Only ask the API for these fields of the response, so that less
+        of it is downloaded and decoded. Either a ``fields`` selector such
+        as ``'trips/tripOption(id,saleTotal)'``, or the paths of the
+        fields, see :func:`fields_selector`. Attributes of the
+        :class:`Result` that were not asked for are ``None`` or empty.
+        Defaults to the whole response.
+    result_fields : Union[str, Iterable[str], None]
+        Only build these fields of the :class:`Result`, see its
+        ``fields``. Unlike ``fields``, the whole response is still
+        downloaded, for example to replay it from a cassette, but the
+        rest of it is skipped while parsing. Defaults to all fields.
 
     Raises
     ------
@@ -533,14 +1094,183 @@ def send_sync(request_body: Union[dict, Request], use_containers: bool = True):
 
     """
 
-    if isinstance(request_body, dict):
-        response = requester.post_request_sync(BASE_URL, request_body)
-    elif isinstance(request_body, Request):
-        response = requester.post_request_sync(BASE_URL, request_body.raw_data)
-    else:
-        raise ValueError('Unsupported Request Type')
-
-    if use_containers:
-        return Result(response)
+    client = client or requester
+    if client.background is not None:
+        return client.background.run(
+            send_async(request_body, use_containers, client, fields,
+                       result_fields)
+        )
 
+    url = _url(client, fields)
+    selector = _selector(result_fields)
+    trace = client.hooks.begin(client.base_url) if client.hooks else None
+    try:
+        response = client.post_request_sync(url, _payload(request_body))
+        if use_containers:
+            response = _to_result(response, trace, selector)
+    except BaseException as error:
+        if trace is not None:
+            trace.finish(error)
+        raise
+
+    if trace is not None:
+        trace.finish()
     return response
+
+
+def send_many_sync(request_bodies: Iterable[RequestBody],
+                   concurrency: Optional[int] = None,
+                   use_containers: bool = True,
+                   client: Optional[Requester] = None,
+                   fields: Fields = None,
+                   result_fields: Fields = None) -> List[Future]:
+    """Send many requests on the background loop without blocking.
+
+    All requests are submitted at once and share the connection pool of
+    the background loop, which is enabled with :meth:`enable_background_loop`
+    if it was not already, so that :meth:`send_sync` uses it from now on.
+
+    Parameters
+    ----------
+    request_bodies : Iterable[Union[dict, Request, FrozenRequest]]
+        The bodies of the requests to be sent, see :meth:`send_sync`.
+    concurrency : Optional[int]
+        The maximum amount of these requests in flight at once,
+        or ``None`` for no limit.
+    use_containers : Optional[bool]
+        Whether responses should be returned as :class:`Result` objects,
+        see :meth:`send_sync`.
+    client : Optional[Requester]
+        The :class:`Requester` to send the requests with,
+        see :meth:`send_sync`.
+    fields : Union[str, Iterable[str], None]
+        Only ask for these fields of each response, see :meth:`send_sync`.
+    result_fields : Union[str, Iterable[str], None]
+        Only build these fields of each :class:`Result`,
+        see :meth:`send_sync`.
+
+    Returns
+    -------
+    List[:class:`concurrent.futures.Future`]
+        The future of the response to each request, in the order of
+        ``request_bodies``. If sending a request fails, its future
+        raises the exception, usually an :class:`APIException`.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        futures = pyflight.send_many_sync(my_requests, concurrency=20)
+        for future in concurrent.futures.as_completed(futures):
+            print(future.result().trips[0].total_price)
+    """
+
+    client = client or requester
+    background = client.background or enable_background_loop(client)
+    semaphore = None if concurrency is None else \
+        background.semaphore(concurrency)
+    return [
+        background.submit(
+            send_async(body, use_containers, client, fields, result_fields),
+            semaphore
+        )
+        for body in request_bodies
+    ]
+
+
+async def send_many_async(request_bodies: Iterable[RequestBody],
+                          concurrency: Union[int, AdaptiveLimiter] = 10,
+                          use_containers: bool = True,
+                          client: Optional[Requester] = None,
+                          fields: Fields = None,
+                          result_fields: Fields = None):
+    """Asynchronously send many requests, with at most ``concurrency``
+    of them in flight at the same time.
+
+    This is an asynchronous generator. Request bodies are pulled from
+    ``request_bodies`` only when a slot is free, so lazily generated
+    iterables are never materialized in full.
+
+    Parameters
+    ----------
+    request_bodies : Iterable[Union[dict, Request, FrozenRequest]]
+        The bodies of the requests to be sent, see :meth:`send_async`.
+    concurrency : Union[int, AdaptiveLimiter]
+        The maximum amount of requests in flight at once. If an
+        :class:`AdaptiveLimiter` is given, the limit follows its
+        ``limit``, which adapts to the latency and errors of
+        the responses. It becomes the ``limiter`` of the client,
+        so that its limit is exported by :meth:`enable_metrics`.
+    use_containers : Optional[bool]
+        Whether responses should be returned as :class:`Result` objects,
+        see :meth:`send_async`.
+    client : Optional[Requester]
+        The :class:`Requester` to send the requests with,
+        see :meth:`send_async`.
+    fields : Union[str, Iterable[str], None]
+        Only ask for these fields of each response, see :meth:`send_async`.
+    result_fields : Union[str, Iterable[str], None]
+        Only build these fields of each :class:`Result`,
+        see :meth:`send_async`.
+
+    Yields
+    ------
+    Tuple[Union[dict, Request, FrozenRequest],
+          Union[Result, dict, Exception]]
+        The request body together with its response, in order of completion.
+        If sending a request failed, the raised Exception (usually an
+        :class:`APIException`) takes the place of the response instead
+        of aborting the remaining requests.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        async for request, result in send_many_async(my_requests, 5):
+            if isinstance(result, Exception):
+                print('Failed:', result)
+            else:
+                print(result.trips[0].total_price)
+    """
+
+    limiter = concurrency if isinstance(concurrency, AdaptiveLimiter) \
+        else None
+    if limiter is None and concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+    if limiter is not None:
+        (client or requester).limiter = limiter
+
+    loop = asyncio.get_event_loop()
+    bodies = iter(request_bodies)
+    pending = {}
+
+    def fill():
+        while len(pending) < int(concurrency):
+            try:
+                body = next(bodies)
+            except StopIteration:
+                return
+            task = asyncio.ensure_future(
+                send_async(body, use_containers, client, fields,
+                           result_fields)
+            )
+            pending[task] = body, loop.time()
+
+    fill()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                body, start = pending.pop(task)
+                error = task.exception()
+                if limiter is not None:
+                    limiter.record(loop.time() - start, error)
+                yield body, error if error is not None else task.result()
+            fill()
+    finally:
+        for task in pending:
+            task.cancel()
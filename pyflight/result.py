@@ -7,11 +7,50 @@ Some of the Documentation is extracted from the resource reference
 from the API itself, for which a full documentation can be found here:
 https://developers.google.com/qpx-express/v1/trips/search
 """
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
+from .fields import Tree, child, fields_tree, select
 from .models.airport import Airport
 from .models.flight_data import Aircraft, Carrier, City, Tax
 from .models.trip import Trip
 
+PRICE_REGEX = re.compile(r'([A-Z]{3})(\d+(?:\.\d+)?)')
+
+
+def split_price(price: str) -> Tuple[str, float]:
+    """Split a price as returned by the API into its currency and amount.
+
+    Parameters
+    ----------
+        price : str
+            A price such as ``'USD69.00'``.
+
+    Raises
+    ------
+    :class:`ValueError`
+        If the given price is not in ISO-4217 format.
+
+    Returns
+    -------
+    Tuple[str, float]
+        The currency code and the amount, for example ``('USD', 69.0)``.
+    """
+
+    match = PRICE_REGEX.fullmatch(price)
+    if match is None:
+        raise ValueError('Invalid price: {!r}'.format(price))
+
+    return match.group(1), float(match.group(2))
+
+
+def _selected(data: dict, key: str, tree: Optional[Tree]) -> List[dict]:
+    items = data.get(key, [])
+    item_tree = child(tree, key)
+    if item_tree is None:
+        return items
+    return [select(item, item_tree) for item in items]
+
 
 class Result(object):
     r"""Contains Results of an API Call.
@@ -33,6 +72,9 @@ class Result(object):
         This will call ``__iter__`` of :class:`Result` and return an iterator
         over the :class:`Trip`\s saved in this :class:`Result`.
 
+    To find out what changed between two :class:`Result`\s
+    of the same request, use :meth:`diff` instead.
+
     Attributes
     ----------
         request_id : str
@@ -63,32 +105,62 @@ class Result(object):
             by the amount of Solutions set in the Request.
     """
 
-    def __init__(self, data: dict):
+    def __init__(self, data: dict,
+                 fields: Union[str, Iterable[str], None] = None):
         """Create the Result Object from the Response of the API.
 
         Parameters
         ----------
             data: dict
                 The Response of the API, as a dictionary
+            fields: Union[str, Iterable[str], None]
+                If given, only these fields of the response are built,
+                see :func:`fields_selector`, for example
+                :data:`pyflight.fields.SUMMARY`. The rest of the response
+                is skipped, so the time and memory taken depend on what
+                is selected. Attributes that were not selected are
+                ``None`` or empty, like for a partial response.
         """
-        self.request_id = data['trips']['requestId']
+        tree = None if fields is None else fields_tree(fields)
+        if tree is not None:
+            data = select(data, tree)
 
-        self.airports = [Airport(a) for a in data['trips']['data']['airport']]
+        # Partial responses, see the ``fields`` of :meth:`send_async`,
+        # may leave out any of these.
+        trips = data.get('trips', {})
+        trips_tree = child(tree, 'trips')
+        if trips_tree is not None:
+            trips = select(trips, trips_tree)
+        trips_data = trips.get('data', {})
+        data_tree = child(trips_tree, 'data')
+        if data_tree is not None:
+            trips_data = select(trips_data, data_tree)
+        self.request_id = trips.get('requestId')
+
+        airport_tree = child(data_tree, 'airport')
+        self.airports = [
+            Airport(a, airport_tree) for a in trips_data.get('airport', [])
+        ]
         self.aircraft = [
-            Aircraft(a['code'], a['name'])
-            for a in data['trips']['data']['aircraft']
+            Aircraft(a.get('code'), a.get('name'))
+            for a in _selected(trips_data, 'aircraft', data_tree)
         ]
         self.carriers = [
-            Carrier(c['code'], c['name'])
-            for c in data['trips']['data']['carrier']
+            Carrier(c.get('code'), c.get('name'))
+            for c in _selected(trips_data, 'carrier', data_tree)
         ]
         self.cities = [
-            City(c['code'], c['name']) for c in data['trips']['data']['city']
+            City(c.get('code'), c.get('name'))
+            for c in _selected(trips_data, 'city', data_tree)
         ]
         self.taxes = [
-            Tax(t['id'], t['name']) for t in data['trips']['data']['tax']
+            Tax(t.get('id'), t.get('name'))
+            for t in _selected(trips_data, 'tax', data_tree)
+        ]
+        option_tree = child(trips_tree, 'tripOption')
+        self.trips = [
+            Trip(t, option_tree) for t in trips.get('tripOption', [])
         ]
-        self.trips = [Trip(t) for t in data['trips']['tripOption']]
 
     def __eq__(self, other):
         """Compare two :class:`Result` objects for equality.
@@ -121,6 +193,63 @@ class Result(object):
         for trip in self.trips:
             yield trip
 
+    def snapshot(self) -> 'ResultSnapshot':
+        """Get a compact :class:`ResultSnapshot` of the itineraries
+        and prices in this :class:`Result`, to :meth:`diff` against later.
+        """
+
+        trips = {}
+        for trip in self.trips:
+            trips.setdefault(trip.fingerprint(), (
+                trip.id, trip.total_price, trip.booking_classes()
+            ))
+
+        return ResultSnapshot(self.request_id, trips)
+
+    def diff(self, other: Union['Result', 'ResultSnapshot']) -> 'ResultDiff':
+        r"""Find out what changed since an earlier response to the same request.
+
+        Itineraries are matched by :meth:`Trip.fingerprint`, so this takes
+        linear time in the amount of :class:`Trip`\s. If an itinerary occurs
+        more than once in a response, only its first (cheapest) occurrence
+        is considered. Itineraries whose price or
+        :meth:`Trip.booking_classes` changed are repriced.
+
+        Parameters
+        ----------
+            other : Union[:class:`Result`, :class:`ResultSnapshot`]
+                The earlier response, or a snapshot of it.
+
+        Returns
+        -------
+        :class:`ResultDiff`
+            The itineraries that were added, removed or repriced
+            in this :class:`Result` compared to ``other``.
+        """
+
+        if isinstance(other, Result):
+            other = other.snapshot()
+
+        seen = set()
+        added, repriced = [], []
+        for trip in self.trips:
+            fingerprint = trip.fingerprint()
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+
+            previous = other.trips.get(fingerprint)
+            if previous is None:
+                added.append(trip)
+                continue
+            _, price, classes = previous
+            if price != trip.total_price \
+                    or classes != trip.booking_classes():
+                repriced.append((trip, price, classes))
+
+        removed = [f for f in other.trips if f not in seen]
+        return ResultDiff(added, removed, repriced)
+
     def as_dict(self) -> dict:
         """Returns a dictionary representation of this :class:`Result`.
 
@@ -142,3 +271,105 @@ class Result(object):
             'taxes': [t.as_dict() for t in self.taxes],
             'trips': [t.as_dict() for t in self.trips]
         }
+
+
+class ResultSnapshot(object):
+    r"""A compact, serializable record of the itineraries
+    and prices of a :class:`Result`.
+
+    Create one with :meth:`Result.snapshot`. Store it using :meth:`as_dict`
+    and load it again with :meth:`from_dict`.
+
+    Attributes
+    ----------
+        request_id : str
+            The ``request_id`` of the :class:`Result` this was taken from.
+        trips : Dict[str, Tuple[str, str, str]]
+            Maps the :meth:`Trip.fingerprint` of each itinerary to the
+            ``id``, ``total_price`` and :meth:`Trip.booking_classes`
+            of its :class:`Trip`.
+    """
+
+    __slots__ = ('request_id', 'trips')
+
+    def __init__(self, request_id: str,
+                 trips: Dict[str, Tuple[str, str, str]]):
+        self.request_id = request_id
+        self.trips = trips
+
+    def __len__(self):
+        """Returns the amount of itineraries in this snapshot."""
+
+        return len(self.trips)
+
+    def as_dict(self) -> dict:
+        """Get this :class:`ResultSnapshot` as a JSON-serializable dictionary.
+        """
+
+        return {
+            'request_id': self.request_id,
+            'trips': {k: list(v) for k, v in self.trips.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ResultSnapshot':
+        """Load a :class:`ResultSnapshot` saved with :meth:`as_dict`."""
+
+        return cls(
+            data['request_id'],
+            {k: tuple(v) for k, v in data['trips'].items()}
+        )
+
+
+class ResultDiff(object):
+    r"""The changes between two responses to the same request,
+    as returned by :meth:`Result.diff`.
+
+    This class supports the following *magic methods*:
+
+    ``bool(x)``
+        Returns ``True`` if anything changed.
+
+    Attributes
+    ----------
+        added : List[:class:`Trip`]
+            Trips whose itinerary was not in the earlier response.
+        removed : List[str]
+            Fingerprints of the itineraries that are no longer returned.
+            Their trip ID and price can be looked up in the earlier
+            :class:`ResultSnapshot`.
+        repriced : List[Tuple[:class:`Trip`, str, str]]
+            Trips whose itinerary was returned before at a different
+            price or in different booking classes, together with the
+            price and :meth:`Trip.booking_classes` in the earlier response.
+    """
+
+    __slots__ = ('added', 'removed', 'repriced')
+
+    def __init__(self, added: List[Trip], removed: List[str],
+                 repriced: List[Tuple[Trip, str, str]]):
+        self.added = added
+        self.removed = removed
+        self.repriced = repriced
+
+    def __bool__(self):
+        """Check whether anything changed."""
+
+        return bool(self.added or self.removed or self.repriced)
+
+    def as_dict(self) -> dict:
+        """Get a dictionary representation of this :class:`ResultDiff`."""
+
+        return {
+            'added': [t.id for t in self.added],
+            'removed': self.removed,
+            'repriced': [
+                {
+                    'id': t.id,
+                    'old_price': price, 'new_price': t.total_price,
+                    'old_booking_classes': classes,
+                    'new_booking_classes': t.booking_classes()
+                }
+                for t, price, classes in self.repriced
+            ]
+        }
@@ -0,0 +1,382 @@
+"""
+Contains the Scheduler class, which
+dispatches requests of different
+priorities under a shared budget
+for concurrency and request rate.
+"""
+import asyncio
+import enum
+import heapq
+import itertools
+from typing import Optional, Union
+
+from .api import Requester
+from .requester import RequestBody, send_async
+from .result import Result
+
+
+class Priority(enum.IntEnum):
+    """The priority classes of jobs submitted to a :class:`Scheduler`.
+    Jobs with a lower value are dispatched first."""
+
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BACKGROUND = 2
+
+
+class JobDropped(Exception):
+    """
+    Base class for Exceptions raised by :meth:`Scheduler.submit`
+    when a job is dropped before its request was sent.
+    """
+
+
+class DeadlineExceeded(JobDropped):
+    """
+    Raised when the deadline of a job passed before it could be dispatched.
+    """
+
+
+class JobPreempted(JobDropped):
+    """
+    Raised when a job is pushed out of a full queue by a job
+    with a higher priority, or is not queued at all because
+    the queue is full of jobs with the same or a higher priority.
+    """
+
+
+class _Job(object):
+    __slots__ = ('priority', 'body', 'future', 'enqueued', 'deadline',
+                 'timer', 'queued', 'task')
+
+    def __init__(self, priority, body, future, enqueued, deadline):
+        self.priority = priority
+        self.body = body
+        self.future = future
+        self.enqueued = enqueued
+        self.deadline = deadline
+        self.timer = None
+        self.queued = True
+        self.task = None
+
+
+class _WaitStats(object):
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, wait: float):
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max
+        }
+
+
+class Scheduler(object):
+    r"""Dispatches search jobs by priority under a global budget.
+
+    Interactive searches and background crawlers can share the same quota
+    by submitting their requests to one :class:`Scheduler`. Queued jobs are
+    dispatched in order of their :class:`Priority`, and in order of
+    submission within the same priority, whenever the amount of requests
+    in flight and the request rate allow it. Jobs whose deadline passes
+    while they are queued are dropped instead of being sent late.
+
+    All jobs of a :class:`Scheduler` must be submitted from the same
+    event loop.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        scheduler = Scheduler(concurrency=8, rate=20, max_queue=1000)
+
+        # In the request handler of a web application:
+        result = await scheduler.submit(
+            request, Priority.INTERACTIVE, deadline=2.0
+        )
+
+        # In a crawler:
+        result = await scheduler.submit(request, Priority.BACKGROUND)
+
+    Attributes
+    ----------
+        concurrency : int
+            The maximum amount of requests in flight at once.
+        rate : Optional[float]
+            The maximum amount of requests sent per second,
+            or ``None`` for no limit.
+        burst : int
+            How many requests may be sent at once after being idle,
+            when ``rate`` is set.
+        max_queue : Optional[int]
+            The maximum amount of queued jobs,
+            or ``None`` for no limit.
+        use_containers : bool
+            Passed to :meth:`pyflight.send_async`.
+        client : Optional[Requester]
+            The :class:`Requester` that sends the requests,
+            or ``None`` for the shared requester.
+    """
+
+    def __init__(self, concurrency: int = 10, rate: Optional[float] = None,
+                 burst: int = 1, max_queue: Optional[int] = None,
+                 use_containers: bool = True,
+                 client: Optional[Requester] = None):
+        """Create a new Scheduler.
+
+        Parameters
+        ----------
+            concurrency : int
+                The maximum amount of requests in flight at once.
+            rate : Optional[float]
+                The maximum amount of requests sent per second.
+            burst : int
+                How many requests may be sent at once after being idle.
+            max_queue : Optional[int]
+                The maximum amount of queued jobs.
+            use_containers : bool
+                Whether jobs return :class:`Result` objects
+                or the raw response.
+            client : Optional[Requester]
+                The :class:`Requester` to send the requests with.
+                Defaults to the shared requester.
+        """
+
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.use_containers = use_containers
+        self.client = client
+
+        self._queue = []
+        self._sequence = itertools.count()
+        self._queued = 0
+        self._in_flight = 0
+        self._tokens = float(burst)
+        self._refilled = None
+        self._wakeup = None
+
+        self._dispatched = 0
+        self._expired = 0
+        self._preempted = 0
+        self._waits = {priority: _WaitStats() for priority in Priority}
+
+    @property
+    def queue_depth(self) -> int:
+        """The amount of jobs currently waiting to be dispatched."""
+
+        return self._queued
+
+    @property
+    def in_flight(self) -> int:
+        """The amount of requests currently being sent."""
+
+        return self._in_flight
+
+    def stats(self) -> dict:
+        """Get statistics about this :class:`Scheduler`.
+
+        Returns
+        -------
+        dict
+            The current ``queue_depth`` in total and ``by_priority``,
+            the amount of requests ``in_flight``, how many jobs were
+            ``dispatched``, ``expired`` or ``preempted`` so far, and
+            the ``count``, ``mean`` and ``max`` of the time in seconds
+            that dispatched jobs spent waiting in the queue, per priority.
+        """
+
+        depth = {priority.name: 0 for priority in Priority}
+        for _, _, job in self._queue:
+            if job.queued:
+                depth[Priority(job.priority).name] += 1
+
+        return {
+            'queue_depth': self._queued,
+            'by_priority': depth,
+            'in_flight': self._in_flight,
+            'dispatched': self._dispatched,
+            'expired': self._expired,
+            'preempted': self._preempted,
+            'wait_time': {
+                priority.name: stats.as_dict()
+                for priority, stats in self._waits.items()
+            }
+        }
+
+    async def submit(self, request_body: RequestBody,
+                     priority: Union[Priority, int] = Priority.DEFAULT,
+                     deadline: Optional[float] = None) -> Union[Result, dict]:
+        """Queue a request and wait for its response.
+
+        Cancelling the call removes the job from the queue, or
+        cancels its request if it was already dispatched.
+
+        Parameters
+        ----------
+            request_body : Union[dict, Request, FrozenRequest]
+                The body of the request, see :meth:`pyflight.send_async`.
+            priority : :class:`Priority`
+                The priority class of the request.
+            deadline : Optional[float]
+                The amount of seconds within which the request has to be
+                dispatched. It is dropped if it is still queued afterwards.
+
+        Raises
+        ------
+        :class:`DeadlineExceeded`
+            If the deadline passed before the request was dispatched.
+        :class:`JobPreempted`
+            If the queue was full and the job had to make way
+            for one with a higher priority.
+        :class:`APIException`
+            If the API returned an error.
+
+        Returns
+        -------
+        Union[:class:`Result`, dict]
+            The response, as returned by :meth:`pyflight.send_async`.
+        """
+
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        priority = Priority(priority)
+        job = _Job(priority, request_body, loop.create_future(), now,
+                   None if deadline is None else now + deadline)
+
+        if self.max_queue is not None and self._queued >= self.max_queue:
+            self._make_room(job)
+
+        heapq.heappush(self._queue, (priority, next(self._sequence), job))
+        self._queued += 1
+        if job.deadline is not None:
+            job.timer = loop.call_at(job.deadline, self._expire, job)
+
+        self._pump()
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            if job.queued:
+                self._dequeue(job)
+            elif job.task is not None:
+                job.task.cancel()
+            raise
+
+    def _make_room(self, job: _Job):
+        victim = None
+        for entry in self._queue:
+            if not entry[2].queued:
+                continue
+            if victim is None or entry[:2] > victim[:2]:
+                victim = entry
+
+        if victim is None or victim[0] <= job.priority:
+            self._preempted += 1
+            raise JobPreempted('Queue is full')
+
+        self._drop(victim[2], JobPreempted(
+            'Preempted by a job with priority {}'.format(job.priority.name)
+        ))
+        self._preempted += 1
+
+    def _dequeue(self, job: _Job):
+        if job.timer is not None:
+            job.timer.cancel()
+        job.queued = False
+        self._queued -= 1
+
+        # Jobs that left the queue before reaching its top stay in the
+        # heap, so it is rebuilt once they make up half of it.
+        if len(self._queue) > 2 * self._queued:
+            self._queue = [entry for entry in self._queue if entry[2].queued]
+            heapq.heapify(self._queue)
+
+    def _drop(self, job: _Job, error: JobDropped):
+        self._dequeue(job)
+        job.future.set_exception(error)
+
+    def _expire(self, job: _Job):
+        if job.queued:
+            self._expired += 1
+            self._drop(job, DeadlineExceeded(
+                'Not dispatched within the deadline'
+            ))
+
+    def _take_token(self, now: float) -> bool:
+        if self.rate is None:
+            return True
+
+        if self._refilled is not None:
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._refilled) * self.rate
+            )
+        self._refilled = now
+
+        if self._tokens < 1:
+            return False
+
+        self._tokens -= 1
+        return True
+
+    def _pump(self):
+        loop = asyncio.get_event_loop()
+        while self._queue and self._in_flight < self.concurrency:
+            job = self._queue[0][2]
+            if not job.queued:
+                heapq.heappop(self._queue)
+                continue
+
+            now = loop.time()
+            if not self._take_token(now):
+                if self._wakeup is None:
+                    delay = (1 - self._tokens) / self.rate
+                    self._wakeup = loop.call_later(delay, self._wake)
+                return
+
+            heapq.heappop(self._queue)
+            self._dequeue(job)
+
+            self._dispatched += 1
+            self._waits[job.priority].add(now - job.enqueued)
+            self._in_flight += 1
+            job.task = asyncio.ensure_future(self._send(job))
+
+    def _wake(self):
+        self._wakeup = None
+        self._pump()
+
+    async def _send(self, job: _Job):
+        try:
+            response = await send_async(
+                job.body, use_containers=self.use_containers,
+                client=self.client
+            )
+        except asyncio.CancelledError:
+            # Checked first, as it is an Exception on Python 3.7.
+            job.future.cancel()
+            raise
+        except Exception as error:  # pylint: disable=broad-except
+            if not job.future.done():
+                job.future.set_exception(error)
+        else:
+            if not job.future.done():
+                job.future.set_result(response)
+        finally:
+            self._in_flight -= 1
+            self._pump()
@@ -0,0 +1,289 @@
+"""
+Contains the SearchSpace class, which
+expands sets of origins, destinations,
+dates and other options into all of the
+Requests they describe.
+"""
+import datetime
+import heapq
+import itertools
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Union
+
+from .requester import Request, Slice
+
+DateLike = Union[datetime.date, str]
+
+SLICE_OPTIONS = (
+    'max_stops', 'max_connection_duration', 'preferred_cabin',
+    'earliest_departure_time', 'latest_departure_time',
+    'permitted_carriers', 'prohibited_carriers'
+)
+REQUEST_OPTIONS = (
+    'adult_count', 'children_count', 'infant_in_lap_count',
+    'infant_in_seat_count', 'senior_count', 'max_price', 'sale_country',
+    'ticketing_country', 'refundable', 'solution_count'
+)
+LIST_OPTIONS = 'permitted_carriers', 'prohibited_carriers'
+
+
+def _as_date(date: DateLike) -> datetime.date:
+    if isinstance(date, str):
+        return datetime.datetime.strptime(date, '%Y-%m-%d').date()
+    return date
+
+
+def flexible_dates(date: DateLike, days: int) -> List[str]:
+    """Get the dates within ``days`` days around ``date``.
+
+    The dates are ordered by their distance to ``date``, so that
+    a :class:`SearchSpace` with ``priority=True`` tries the
+    exact date first, for example::
+
+        >>> flexible_dates('2017-09-19', 1)
+        ['2017-09-19', '2017-09-18', '2017-09-20']
+
+    Parameters
+    ----------
+        date : Union[datetime.date, str]
+            The preferred date.
+        days : int
+            How many days earlier or later the date may be.
+
+    Returns
+    -------
+    List[str]
+        The dates, formatted as YYYY-MM-DD.
+    """
+
+    center = _as_date(date)
+    offsets = [0] + [o for d in range(1, days + 1) for o in (-d, d)]
+    return [
+        (center + datetime.timedelta(days=offset)).isoformat()
+        for offset in offsets
+    ]
+
+
+class SearchSpace(object):
+    r"""Expands sets of values for the fields of a :class:`Slice`
+    and a :class:`Request` into one :class:`Request` per combination.
+
+    Every field is given as an iterable of alternatives. Iterating over a
+    :class:`SearchSpace` lazily generates the Cartesian product of all
+    fields, so even huge search spaces are never held in memory as a whole.
+    Duplicate alternatives are dropped, which makes every generated
+    :class:`Request` unique, and combinations that can not be sent are
+    skipped - for example a return before the outbound flight, identical
+    origin and destination, or no adult or senior passenger.
+
+    Since a :class:`SearchSpace` is an iterable of :class:`Request`\s,
+    it can be passed to :meth:`pyflight.send_many_async` directly.
+
+    This class supports various *magic methods*:
+
+    ``for request in x``
+        Generate the :class:`Request`\s of this search space.
+
+    ``len(x)``
+        The size of the Cartesian product, including
+        combinations that are skipped because they are invalid.
+
+    Examples
+    --------
+    Any of SFO, OAK or SJC to any of LAX, BUR or SNA, up to three days
+    around September 19th, for one or two adults:
+
+    .. code-block:: python
+
+        space = SearchSpace(
+            origin=['SFO', 'OAK', 'SJC'],
+            destination=['LAX', 'BUR', 'SNA'],
+            date=flexible_dates('2017-09-19', 3),
+            adult_count=[1, 2],
+            priority=True
+        )
+
+        async for request, result in send_many_async(space, 10):
+            ...
+
+    Attributes
+    ----------
+        axes : Dict[str, Tuple]
+            The de-duplicated alternatives for each field, in order.
+        priority : bool
+            Whether combinations are generated by priority instead of in
+            plain product order. The priority of a combination is the sum
+            of the positions of its values in their fields, so combinations
+            made up of the first alternatives of each field come first.
+    """
+
+    def __init__(self, origin: Iterable[str], destination: Iterable[str],
+                 date: Iterable[DateLike],
+                 return_date: Optional[Iterable[DateLike]] = None,
+                 priority: bool = False,
+                 where: Optional[Callable[[dict], bool]] = None,
+                 **options: Any):
+        r"""Create a new SearchSpace.
+
+        Parameters
+        ----------
+            origin : Iterable[str]
+                The airport or city IATA designators to depart from.
+            destination : Iterable[str]
+                The airport or city IATA designators to arrive at.
+            date : Iterable[Union[datetime.date, str]]
+                The dates of the outbound flight.
+            return_date : Optional[Iterable[Union[datetime.date, str]]]
+                The dates of the return flight. If given, every
+                :class:`Request` gets a second :class:`Slice`
+                from ``destination`` back to ``origin``.
+            priority : bool
+                Whether to generate combinations by priority, see above.
+            where : Optional[Callable[[dict], bool]]
+                Called with the values of each valid combination by field
+                name. The combination is skipped if this returns ``False``.
+            \*\*options : Any
+                Alternatives for any other attribute of :class:`Slice`
+                (applied to all slices) or :class:`Request`, for example
+                ``adult_count=range(1, 3)`` or ``max_stops=[0, 1]``.
+                A single value is used for every combination. Unless
+                ``adult_count`` or ``senior_count`` is given,
+                each :class:`Request` is for a single adult.
+                ``permitted_carriers`` and ``prohibited_carriers``
+                take a list of carriers, or a list of such lists.
+
+        Raises
+        ------
+        :class:`ValueError`
+            If an option is unknown or one of its values is rejected by
+            :class:`Slice` or :class:`Request`.
+        """
+
+        self.axes = {
+            'origin': self._alternatives(origin),
+            'destination': self._alternatives(destination),
+            'date': tuple(dict.fromkeys(
+                _as_date(d).isoformat() for d in date
+            ))
+        }
+        if return_date is not None:
+            self.axes['return_date'] = tuple(dict.fromkeys(
+                _as_date(d).isoformat() for d in return_date
+            ))
+
+        if 'adult_count' not in options and 'senior_count' not in options:
+            options['adult_count'] = 1
+
+        for name, values in options.items():
+            if name not in SLICE_OPTIONS and name not in REQUEST_OPTIONS:
+                raise ValueError('Unknown option: {!r}'.format(name))
+            if name in LIST_OPTIONS:
+                self.axes[name] = self._carrier_alternatives(values)
+            else:
+                self.axes[name] = self._alternatives(values)
+
+        self.priority = priority
+        self.where = where
+        self._check_options()
+
+    @staticmethod
+    def _alternatives(values: Any) -> tuple:
+        if isinstance(values, (str, bytes)) or not hasattr(values, '__iter__'):
+            values = [values]
+        return tuple(dict.fromkeys(values))
+
+    @staticmethod
+    def _carrier_alternatives(values: Iterable) -> tuple:
+        values = list(values)
+        if all(isinstance(v, str) for v in values):
+            values = [values]
+        return tuple(dict.fromkeys(tuple(sorted(v)) for v in values))
+
+    def _check_options(self):
+        scratch_slice = Slice('', '', '')
+        scratch_request = Request()
+        for name, values in self.axes.items():
+            if name in SLICE_OPTIONS:
+                target = scratch_slice
+            elif name in REQUEST_OPTIONS:
+                target = scratch_request
+            else:
+                continue
+
+            for value in values:
+                setattr(target, name, value)
+
+    def __len__(self):
+        """Returns the size of the Cartesian product of all fields."""
+
+        size = 1
+        for values in self.axes.values():
+            size *= len(values)
+        return size
+
+    def __iter__(self) -> Iterator[Request]:
+        """Returns a generator over the :class:`Request`\\s
+        of this search space."""
+
+        names = tuple(self.axes)
+        for combination in self._combinations():
+            values = dict(zip(names, combination))
+            if self._is_valid(values):
+                yield self._build(values)
+
+    def _combinations(self) -> Iterator[tuple]:
+        axes = tuple(self.axes.values())
+        if not all(axes):
+            return
+        if not self.priority:
+            yield from itertools.product(*axes)
+            return
+
+        # Best-first walk over the grid of value positions. Each position
+        # tuple is only pushed by the tuple that has its last non-zero
+        # index decremented, so no set of visited tuples is needed and
+        # only the frontier is kept in memory.
+        heap = [(0, (0,) * len(axes), 0)]
+        while heap:
+            score, indices, last = heapq.heappop(heap)
+            yield tuple(axis[i] for axis, i in zip(axes, indices))
+
+            for position in range(last, len(axes)):
+                if indices[position] + 1 < len(axes[position]):
+                    successor = list(indices)
+                    successor[position] += 1
+                    heapq.heappush(
+                        heap, (score + 1, tuple(successor), position)
+                    )
+
+    def _is_valid(self, values: dict) -> bool:
+        if values['origin'] == values['destination']:
+            return False
+        if values.get('return_date', values['date']) < values['date']:
+            return False
+
+        adults = values.get('adult_count', 0) + values.get('senior_count', 0)
+        if adults < 1 or values.get('infant_in_lap_count', 0) > adults:
+            return False
+
+        return self.where is None or self.where(values)
+
+    def _build(self, values: dict) -> Request:
+        request = Request()
+        slices = [Slice(values['origin'], values['destination'],
+                        values['date'])]
+        if 'return_date' in values:
+            slices.append(Slice(values['destination'], values['origin'],
+                                values['return_date']))
+
+        for name, value in values.items():
+            if name in REQUEST_OPTIONS:
+                setattr(request, name, value)
+            elif name in SLICE_OPTIONS:
+                for slice_ in slices:
+                    setattr(slice_, name, list(value)
+                            if name in LIST_OPTIONS else value)
+
+        for slice_ in slices:
+            request.add_slice(slice_)
+
+        return request
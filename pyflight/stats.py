@@ -0,0 +1,153 @@
+"""
+Contains the Histogram class, a
+log-bucketed histogram used to
+track latencies and other values
+online with bounded memory.
+"""
+import math
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class Histogram(object):
+    """A histogram with logarithmically sized buckets.
+
+    Each bucket covers values that are at most ``2 ** (1 / precision)``
+    times larger than those of the previous bucket, so percentiles are
+    accurate to a relative error of about ``69 / precision`` percent
+    regardless of the magnitude of the values, while only buckets that
+    received a value take up memory.
+
+    Attributes
+    ----------
+        precision : int
+            The amount of buckets per doubling of the value.
+        min_value : float
+            Values at or below this are counted in the lowest bucket.
+        count : int
+            The amount of recorded values.
+        sum : float
+            The sum of all recorded values.
+        min : Optional[float]
+            The smallest recorded value, ``None`` if empty.
+        max : Optional[float]
+            The largest recorded value, ``None`` if empty.
+    """
+
+    __slots__ = ('precision', 'min_value', 'count', 'sum', 'min', 'max',
+                 '_buckets', '_log_base')
+
+    def __init__(self, precision: int = 16, min_value: float = 1e-6):
+        """Create a new, empty Histogram.
+
+        Parameters
+        ----------
+            precision : int
+                The amount of buckets per doubling of the value.
+            min_value : float
+                The lower bound of the bucketed range.
+        """
+
+        self.precision = precision
+        self.min_value = min_value
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._buckets = {}
+        self._log_base = math.log(2) / precision
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / self._log_base) + 1
+
+    def upper_bound(self, bucket: int) -> float:
+        """Get the largest value counted in the given bucket."""
+
+        return self.min_value * math.exp(bucket * self._log_base)
+
+    def record(self, value: float, count: int = 1):
+        """Record a value, ``count`` times."""
+
+        bucket = self._bucket(value)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + count
+        self.count += count
+        self.sum += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: 'Histogram'):
+        """Add all values recorded in ``other``, which
+        must have the same ``precision`` and ``min_value``."""
+
+        if (other.precision, other.min_value) != \
+                (self.precision, self.min_value):
+            raise ValueError('Histograms have different buckets')
+
+        for bucket, count in other._buckets.items():
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def buckets(self) -> Iterator[Tuple[float, int]]:
+        """Returns a generator over the ``(upper_bound, count)``
+        of all non-empty buckets, in ascending order."""
+
+        return (
+            (self.upper_bound(bucket), self._buckets[bucket])
+            for bucket in sorted(self._buckets)
+        )
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Get an estimate of the given percentile of the recorded values.
+
+        Parameters
+        ----------
+            percentile : float
+                The percentile to estimate, from 0 to 100.
+
+        Returns
+        -------
+        float
+            The upper bound of the bucket containing the percentile,
+            limited to the smallest and largest recorded value.
+        None
+            If no values have been recorded.
+        """
+
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for upper_bound, count in self.buckets():
+            seen += count
+            if seen >= rank:
+                return min(max(upper_bound, self.min), self.max)
+
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        """The mean of the recorded values, ``None`` if empty."""
+
+        return self.sum / self.count if self.count else None
+
+    def as_dict(self) -> Dict[str, Optional[float]]:
+        """Get a summary of this :class:`Histogram` as a dictionary."""
+
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99)
+        }
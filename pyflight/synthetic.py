@@ -0,0 +1,316 @@
+"""
+Contains a generator for synthetic
+responses of the QPX Express API,
+used to test and benchmark parsing
+responses of any size offline.
+"""
+import datetime
+import random
+
+AIRPORTS = (
+    ('SFO', 'SFO', 'San Francisco International'),
+    ('LAX', 'LAX', 'Los Angeles International'),
+    ('JFK', 'NYC', 'New York John F Kennedy International'),
+    ('ORD', 'CHI', 'Chicago O\'Hare International'),
+    ('SEA', 'SEA', 'Seattle/Tacoma Sea/Tac'),
+    ('DEN', 'DEN', 'Denver International'),
+    ('FRA', 'FRA', 'Frankfurt International'),
+    ('LHR', 'LON', 'London Heathrow'),
+    ('CDG', 'PAR', 'Paris Charles de Gaulle'),
+    ('AMS', 'AMS', 'Amsterdam Schiphol'),
+    ('MUC', 'MUC', 'Munich International'),
+    ('NRT', 'TYO', 'Tokyo Narita'),
+)
+CITIES = {
+    'SFO': 'San Francisco', 'LAX': 'Los Angeles', 'NYC': 'New York',
+    'CHI': 'Chicago', 'SEA': 'Seattle', 'DEN': 'Denver',
+    'FRA': 'Frankfurt', 'LON': 'London', 'PAR': 'Paris',
+    'AMS': 'Amsterdam', 'MUC': 'Munich', 'TYO': 'Tokyo'
+}
+CARRIERS = (
+    ('UA', 'United Airlines, Inc.'),
+    ('AA', 'American Airlines Inc.'),
+    ('DL', 'Delta Air Lines Inc.'),
+    ('LH', 'Lufthansa'),
+    ('BA', 'British Airways p.l.c.'),
+)
+AIRCRAFT = (
+    ('738', 'Boeing 737'),
+    ('320', 'Airbus A320'),
+    ('77W', 'Boeing 777'),
+    ('388', 'Airbus A380-800'),
+)
+TAXES = (
+    ('US_001', 'US Transportation Tax', 'GOVERNMENT', 'US'),
+    ('ZP_001', 'US Flight Segment Tax', 'GOVERNMENT', 'US'),
+    ('AY_001', 'US September 11th Security Fee', 'GOVERNMENT', 'US'),
+    ('YQ_F', 'Carrier-imposed surcharge', 'CARRIER', None),
+)
+CABINS = 'COACH', 'PREMIUM_COACH', 'BUSINESS', 'FIRST'
+START = datetime.datetime(2017, 9, 30, 6, 0)
+
+
+def _time(value: datetime.datetime) -> str:
+    return value.strftime('%Y-%m-%dT%H:%M-07:00')
+
+
+def _price(cents: int) -> str:
+    return 'USD{}.{:02d}'.format(cents // 100, cents % 100)
+
+
+def _bag_descriptor(rng: random.Random, index: int) -> dict:
+    kilos = rng.choice((20, 23, 32))
+    return {
+        'kind': 'qpxexpress#bagDescriptor',
+        'commercialName': 'UPTO{}LB {}KG BAGGAGE'.format(
+            int(kilos * 2.2), kilos
+        ),
+        'count': index,
+        'description': [
+            'Up to {} lb/{} kg'.format(int(kilos * 2.2), kilos),
+            'Up to 62 li/158 lcm'
+        ],
+        'subcode': '0G{}'.format(index % 10)
+    }
+
+
+def generate_response(trips: int = 10, slices: int = 1, segments: int = 2,
+                      legs: int = 1, pricings: int = 1,
+                      bag_descriptors: int = 1, taxes: int = 2,
+                      seed: int = 0) -> dict:
+    """Generate a synthetic response to a trip search.
+
+    The response follows the structure of a ``qpxExpress#tripsSearch``
+    response, as parsed by :class:`Result`, including the optional fields
+    the API usually returns. The same arguments always produce the same
+    response, so it can be used for reproducible tests and benchmarks.
+
+    Parameters
+    ----------
+        trips : int
+            The amount of trip options.
+        slices : int
+            The amount of slices of each trip.
+        segments : int
+            The amount of segments of each slice.
+        legs : int
+            The amount of legs of each segment.
+        pricings : int
+            The amount of pricing entries of each trip,
+            one per passenger type.
+        bag_descriptors : int
+            The amount of bag descriptors of each free baggage option.
+        taxes : int
+            The amount of tax entries of each pricing entry.
+        seed : int
+            The seed of the random values.
+
+    Returns
+    -------
+    dict
+        The response, as decoded from JSON.
+    """
+
+    rng = random.Random(seed)
+    used_airports = set()
+    used_carriers = set()
+    used_aircraft = set()
+    trip_options = []
+
+    for trip_index in range(trips):
+        departure = START + datetime.timedelta(minutes=rng.randrange(0, 720))
+        trip_slices = []
+        trip_segments = []
+        for slice_index in range(slices):
+            slice_segments = []
+            slice_start = departure
+            for segment_index in range(segments):
+                carrier = rng.choice(CARRIERS)[0]
+                used_carriers.add(carrier)
+                segment_id = 'G{}-{}-{}-{}'.format(
+                    carrier, trip_index, slice_index, segment_index
+                )
+                segment_legs = []
+                for leg_index in range(legs):
+                    origin, destination = rng.sample(AIRPORTS, 2)
+                    aircraft = rng.choice(AIRCRAFT)[0]
+                    used_airports.update((origin, destination))
+                    used_aircraft.add(aircraft)
+                    duration = rng.randrange(45, 600)
+                    arrival = departure + datetime.timedelta(minutes=duration)
+                    leg = {
+                        'kind': 'qpxexpress#legInfo',
+                        'id': 'L{}-{}'.format(segment_id, leg_index),
+                        'aircraft': aircraft,
+                        'arrivalTime': _time(arrival),
+                        'departureTime': _time(departure),
+                        'origin': origin[0],
+                        'destination': destination[0],
+                        'originTerminal': str(rng.randrange(1, 5)),
+                        'destinationTerminal': str(rng.randrange(1, 5)),
+                        'duration': duration,
+                        'mileage': duration * 7,
+                        'meal': rng.choice(('Snack or Brunch', 'Meal', '')),
+                        'secure': True
+                    }
+                    if leg_index + 1 < legs:
+                        leg['changePlane'] = False
+                        leg['connectionDuration'] = 40
+                    segment_legs.append(leg)
+                    departure = arrival + datetime.timedelta(minutes=40)
+
+                segment = {
+                    'kind': 'qpxexpress#segmentInfo',
+                    'duration': sum(leg['duration'] for leg in segment_legs),
+                    'flight': {
+                        'carrier': carrier,
+                        'number': str(rng.randrange(100, 9999))
+                    },
+                    'id': segment_id,
+                    'cabin': rng.choice(CABINS),
+                    'bookingCode': rng.choice('KLMQVY'),
+                    'bookingCodeCount': rng.randrange(1, 10),
+                    'marriedSegmentGroup': str(segment_index),
+                    'leg': segment_legs
+                }
+                if segment_index + 1 < segments:
+                    segment['connectionDuration'] = 75
+                    departure += datetime.timedelta(minutes=35)
+                slice_segments.append(segment)
+                trip_segments.append(segment)
+
+            trip_slices.append({
+                'kind': 'qpxexpress#sliceInfo',
+                'duration': int(
+                    (departure - slice_start).total_seconds() // 60
+                ),
+                'segment': slice_segments
+            })
+            departure += datetime.timedelta(days=3)
+
+        trip_pricing = []
+        trip_total = 0
+        for pricing_index in range(pricings):
+            fares = []
+            segment_pricing = []
+            for segment in trip_segments:
+                fare_id = 'F{}-{}'.format(segment['id'], pricing_index)
+                fares.append({
+                    'kind': 'qpxexpress#fareInfo',
+                    'id': fare_id,
+                    'carrier': segment['flight']['carrier'],
+                    'origin': segment['leg'][0]['origin'],
+                    'destination': segment['leg'][-1]['destination'],
+                    'basisCode': '{}A14NR'.format(segment['bookingCode'])
+                })
+                segment_pricing.append({
+                    'kind': 'qpxexpress#segmentPricing',
+                    'fareId': fare_id,
+                    'segmentId': segment['id'],
+                    'freeBaggageOption': [{
+                        'kind': 'qpxexpress#freeBaggageAllowance',
+                        'bagDescriptor': [
+                            _bag_descriptor(rng, index)
+                            for index in range(bag_descriptors)
+                        ],
+                        'pieces': bag_descriptors
+                    }]
+                })
+
+            fare_cents = rng.randrange(5000, 150000)
+            pricing_taxes = [
+                {
+                    'kind': 'qpxexpress#taxInfo',
+                    'id': tax_id,
+                    'chargeType': charge_type,
+                    'code': tax_id[:2],
+                    'country': country,
+                    'salePrice': _price(rng.randrange(100, 5000))
+                }
+                for tax_id, _, charge_type, country
+                in (TAXES[index % len(TAXES)] for index in range(taxes))
+            ]
+            for tax in pricing_taxes:
+                if tax['country'] is None:
+                    del tax['country']
+            tax_cents = sum(
+                int(tax['salePrice'][3:].replace('.', ''))
+                for tax in pricing_taxes
+            )
+            trip_total += fare_cents + tax_cents
+            trip_pricing.append({
+                'kind': 'qpxexpress#pricingInfo',
+                'fare': fares,
+                'segmentPricing': segment_pricing,
+                'baseFareTotal': _price(fare_cents),
+                'saleFareTotal': _price(fare_cents),
+                'saleTaxTotal': _price(tax_cents),
+                'saleTotal': _price(fare_cents + tax_cents),
+                'passengers': {
+                    'kind': 'qpxexpress#passengerCounts',
+                    ('adultCount', 'childCount', 'seniorCount')[
+                        pricing_index % 3
+                    ]: 1
+                },
+                'tax': pricing_taxes,
+                'fareCalculation': ' '.join(
+                    '{} {} {}'.format(
+                        fare['origin'], fare['carrier'], fare['destination']
+                    ) for fare in fares
+                ) + ' END',
+                'latestTicketingTime': _time(START),
+                'ptc': ('ADT', 'CHD', 'SRC')[pricing_index % 3],
+                'refundable': False
+            })
+
+        trip_options.append({
+            'kind': 'qpxexpress#tripOption',
+            'saleTotal': _price(trip_total),
+            'id': 'trip{}'.format(trip_index),
+            'slice': trip_slices,
+            'pricing': trip_pricing
+        })
+
+    return {
+        'kind': 'qpxExpress#tripsSearch',
+        'trips': {
+            'kind': 'qpxexpress#tripOptions',
+            'requestId': 'synthetic{}'.format(seed),
+            'data': {
+                'kind': 'qpxexpress#data',
+                'airport': [
+                    {
+                        'kind': 'qpxexpress#airportData',
+                        'code': code, 'city': city, 'name': name
+                    }
+                    for code, city, name in sorted(used_airports)
+                ],
+                'city': [
+                    {
+                        'kind': 'qpxexpress#cityData',
+                        'code': city, 'name': CITIES[city]
+                    }
+                    for city in sorted({a[1] for a in used_airports})
+                ],
+                'aircraft': [
+                    {
+                        'kind': 'qpxexpress#aircraftData',
+                        'code': code, 'name': name
+                    }
+                    for code, name in AIRCRAFT if code in used_aircraft
+                ],
+                'tax': [
+                    {'kind': 'qpxexpress#taxData', 'id': tax_id, 'name': name}
+                    for tax_id, name, _, _ in TAXES[:taxes]
+                ],
+                'carrier': [
+                    {
+                        'kind': 'qpxexpress#carrierData',
+                        'code': code, 'name': name
+                    }
+                    for code, name in CARRIERS if code in used_carriers
+                ]
+            },
+            'tripOption': trip_options
+        }
+    }
@@ -0,0 +1,500 @@
+"""
+Contains the transports, which send the
+HTTP requests of a Requester with aiohttp,
+requests, httpx, or not at all when the
+responses are served from memory.
+"""
+import asyncio
+import json
+import threading
+import time
+from typing import (
+    TYPE_CHECKING, Any, Awaitable, Callable, Dict, Sequence, Tuple, Union
+)
+from urllib.parse import parse_qsl, urlsplit
+
+from . import hooks
+from .batch import encode_batch_response, parse_parts
+from .fields import parse_fields, project
+from .mock_server import error_body, synthetic_response
+
+if TYPE_CHECKING:
+    import aiohttp
+
+Payload = Union[dict, bytes]
+Response = Tuple[int, bytes]
+
+
+def _body_arguments(payload: Payload,
+                    content_type: str = 'application/json') -> dict:
+    """Get the keyword arguments to send ``payload`` as JSON with, where
+    ``payload`` is either a dictionary or already serialized JSON, or
+    another body of the given content type."""
+
+    if isinstance(payload, bytes):
+        return {
+            'data': payload,
+            'headers': {'Content-Type': content_type}
+        }
+
+    return {'json': payload}
+
+
+class Transport(object):
+    """Sends the HTTP requests of a :class:`Requester`.
+
+    A transport supports asynchronous requests, used by
+    :meth:`pyflight.send_async`, synchronous requests, used by
+    :meth:`pyflight.send_sync`, or both, as told by its
+    ``asynchronous`` and ``synchronous`` attributes.
+    Select one with :meth:`pyflight.set_transport`.
+
+    Transports only send requests and read responses. Error responses
+    are returned like any other, and emit the ``'first_byte'`` and
+    ``'download'`` events of the :class:`Trace` of the request, if any.
+
+    Attributes
+    ----------
+        name : str
+            The name to select the transport by.
+        asynchronous : bool
+            Whether :meth:`post` is supported.
+        synchronous : bool
+            Whether :meth:`post_sync` is supported.
+    """
+
+    name = None  # type: str
+    asynchronous = False
+    synchronous = False
+
+    async def post(self, url: str, payload: Payload,
+                   request_hooks: hooks.Hooks,
+                   content_type: str = 'application/json') -> Response:
+        """Send a POST request with a JSON body.
+
+        Parameters
+        ----------
+            url : str
+                The URL to send the request to, including the API key.
+            payload : Union[dict, bytes]
+                The body, either as a dictionary or as serialized JSON.
+            request_hooks : :class:`Hooks`
+                The hooks of the requester, to trace the request with.
+            content_type : str
+                The content type of ``payload`` if it is serialized,
+                for example that of a batch.
+
+        Returns
+        -------
+        Tuple[int, bytes]
+            The status code and the body of the response.
+        """
+
+        raise NotImplementedError(
+            '{} does not support asynchronous requests'.format(self.name)
+        )
+
+    def post_sync(self, url: str, payload: Payload,
+                  request_hooks: hooks.Hooks,
+                  content_type: str = 'application/json') -> Response:
+        """Like :meth:`post`, but blocking."""
+
+        raise NotImplementedError(
+            '{} does not support synchronous requests'.format(self.name)
+        )
+
+    async def close(self):
+        """Close the connections opened on the running event loop."""
+
+    def close_sync(self):
+        """Close the connections opened by :meth:`post_sync`."""
+
+
+class _LoopClients(object):
+    """The clients of a transport, one for each running event loop,
+    as they can only be used on the loop they were created on.
+
+    A client is closed when its loop shuts down its asynchronous
+    generators, which :func:`asyncio.run` does before closing the loop.
+    When managing loops by hand, call
+    ``loop.run_until_complete(loop.shutdown_asyncgens())`` before
+    ``loop.close()``, or close the transport on the loop.
+    """
+
+    def __init__(self, create: Callable[[], Any],
+                 is_closed: Callable[[Any], bool],
+                 close: Callable[[Any], Awaitable]):
+        self._create = create
+        self._is_closed = is_closed
+        self._close = close
+        # The client of each loop, with the asynchronous
+        # generator that closes it when the loop shuts down.
+        self._clients = {}  # type: Dict[asyncio.AbstractEventLoop, tuple]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._clients)
+
+    async def get(self):
+        """Get the client of the running loop, creating it if needed."""
+
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is not None and not self._is_closed(entry[0]):
+            return entry[0]
+
+        with self._lock:
+            # Forget the clients of loops that were closed without
+            # shutting down, so that the loops can be freed.
+            for closed in [other for other in self._clients
+                           if other.is_closed()]:
+                del self._clients[closed]
+
+            client = self._create()
+            closer = self._close_on_shutdown(loop, client)
+            self._clients[loop] = client, closer
+
+        # Starting the generator registers it with the loop.
+        await closer.__anext__()
+        return client
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop,
+                                 client):
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._clients.get(loop, (None,))[0] is client:
+                    del self._clients[loop]
+            await self._close(client)
+
+    async def close(self):
+        """Close the client of the running loop, if any."""
+
+        entry = self._clients.get(asyncio.get_running_loop())
+        if entry is not None:
+            await entry[1].aclose()
+
+
+class AiohttpTransport(Transport):
+    """Sends asynchronous requests with :mod:`aiohttp`, the default.
+
+    Each event loop gets its own :class:`aiohttp.ClientSession`, which
+    pools connections. The ``'queued'`` and ``'connect'`` events of
+    traced requests are emitted as well.
+    """
+
+    name = 'aiohttp'
+    asynchronous = True
+
+    def __init__(self):
+        """Create a new AiohttpTransport. Sessions are created on use."""
+
+        self.sessions = _LoopClients(
+            self._new_session, lambda session: session.closed,
+            lambda session: session.close()
+        )
+
+    def _new_session(self) -> 'aiohttp.ClientSession':
+        # Imported on first use, so that importing pyflight to only
+        # parse responses does not pay for loading the transports.
+        import aiohttp
+
+        return aiohttp.ClientSession(
+            trace_configs=[hooks.Hooks.trace_config()]
+        )
+
+    async def session(self) -> 'aiohttp.ClientSession':
+        """Get the session of the running event loop."""
+
+        return await self.sessions.get()
+
+    async def post(self, url: str, payload: Payload,
+                   request_hooks: hooks.Hooks,
+                   content_type: str = 'application/json') -> Response:
+        # pylint: disable=invalid-name
+
+        trace = hooks.current() if request_hooks else None
+        session = await self.session()
+        arguments = _body_arguments(payload, content_type)
+        async with session.post(url, trace_request_ctx=trace,
+                                **arguments) as r:
+            first_byte = time.monotonic()
+            body = await r.read()
+            if trace is not None:
+                trace.emit(hooks.DOWNLOAD, first_byte, size=len(body))
+
+            return r.status, body
+
+    async def close(self):
+        await self.sessions.close()
+
+
+class RequestsTransport(Transport):
+    """Sends synchronous requests with :mod:`requests`, the default.
+
+    Each thread gets its own :class:`requests.Session`,
+    so that connections are reused.
+    """
+
+    name = 'requests'
+    synchronous = True
+
+    def __init__(self):
+        """Create a new RequestsTransport. Sessions are created on use."""
+
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def post_sync(self, url: str, payload: Payload,
+                  request_hooks: hooks.Hooks,
+                  content_type: str = 'application/json') -> Response:
+        # pylint: disable=invalid-name
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+            with self._lock:
+                self._sessions.append(session)
+
+        trace = hooks.current() if request_hooks else None
+        start = time.monotonic()
+        r = session.post(url, stream=trace is not None,
+                         **_body_arguments(payload, content_type))
+        if trace is not None:
+            trace.sent += len(r.request.body or b'')
+            trace.emit(hooks.FIRST_BYTE, start)
+            start = time.monotonic()
+
+        body = r.content
+        if trace is not None:
+            trace.emit(hooks.DOWNLOAD, start, size=len(body))
+        return r.status_code, body
+
+    def close_sync(self):
+        """Close the sessions of all threads.
+        New ones are created for the next requests."""
+
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            # Threads still holding a closed session replace it.
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
+
+
+class HttpxTransport(Transport):
+    """Sends requests with :mod:`httpx`, which must be installed.
+
+    With ``http2``, which needs ``httpx[http2]``, concurrent requests
+    to the same host are multiplexed over a single connection instead
+    of each needing a connection of its own. Servers that do not speak
+    HTTP/2 are talked to with HTTP/1.1.
+
+    Attributes
+    ----------
+        http2 : bool
+            Whether HTTP/2 is used.
+    """
+
+    name = 'httpx'
+    asynchronous = True
+    synchronous = True
+
+    def __init__(self, http2: bool = True, **options):
+        """Create a new HttpxTransport. Clients are created on use.
+
+        Parameters
+        ----------
+            http2 : bool
+                Whether to use HTTP/2.
+            options
+                Passed on to :class:`httpx.AsyncClient`
+                and :class:`httpx.Client`, like ``limits``.
+        """
+
+        self.http2 = http2
+        self._options = options
+        self._client = None
+        self._lock = threading.Lock()
+        self.clients = _LoopClients(
+            self._new_async_client, lambda client: client.is_closed,
+            lambda client: client.aclose()
+        )
+
+    def _new_async_client(self):
+        import httpx
+
+        return httpx.AsyncClient(http2=self.http2, **self._options)
+
+    @staticmethod
+    def _arguments(payload: Payload, content_type: str) -> dict:
+        arguments = _body_arguments(payload, content_type)
+        if 'data' in arguments:
+            arguments['content'] = arguments.pop('data')
+        return arguments
+
+    async def post(self, url: str, payload: Payload,
+                   request_hooks: hooks.Hooks,
+                   content_type: str = 'application/json') -> Response:
+        trace = hooks.current() if request_hooks else None
+        client = await self.clients.get()
+        start = time.monotonic()
+        arguments = self._arguments(payload, content_type)
+        async with client.stream('POST', url, **arguments) as response:
+            if trace is not None:
+                trace.sent += len(response.request.content)
+                trace.emit(hooks.FIRST_BYTE, start)
+                start = time.monotonic()
+            body = await response.aread()
+
+        if trace is not None:
+            trace.emit(hooks.DOWNLOAD, start, size=len(body))
+        return response.status_code, body
+
+    def post_sync(self, url: str, payload: Payload,
+                  request_hooks: hooks.Hooks,
+                  content_type: str = 'application/json') -> Response:
+        # The synchronous client is safe to share between threads.
+        with self._lock:
+            if self._client is None:
+                import httpx
+                self._client = httpx.Client(http2=self.http2, **self._options)
+
+        trace = hooks.current() if request_hooks else None
+        start = time.monotonic()
+        arguments = self._arguments(payload, content_type)
+        with self._client.stream('POST', url, **arguments) as response:
+            if trace is not None:
+                trace.sent += len(response.request.content)
+                trace.emit(hooks.FIRST_BYTE, start)
+                start = time.monotonic()
+            body = response.read()
+
+        if trace is not None:
+            trace.emit(hooks.DOWNLOAD, start, size=len(body))
+        return response.status_code, body
+
+    async def close(self):
+        await self.clients.close()
+
+    def close_sync(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+
+class MemoryTransport(Transport):
+    """Answers requests from memory without any network,
+    for tests and for benchmarking everything but the network.
+
+    Searches are answered like by a :class:`MockServer`, with
+    synthetic responses by default, or with the given responses.
+    Requests without an API key get a ``keyInvalid`` error.
+    Batches are answered part by part, and only the ``fields``
+    selected in the query of a search are sent.
+
+    Attributes
+    ----------
+        responses : Union[Callable[[dict], dict], Sequence[dict]]
+            Either called with each search to get its response,
+            or a sequence of responses that are served in turn.
+        latency : float
+            The seconds to wait before responding.
+        requests : int
+            The amount of searches received, including
+            those in batches.
+    """
+
+    name = 'memory'
+    asynchronous = True
+    synchronous = True
+
+    def __init__(self, responses: Union[Callable[[dict], dict],
+                                        Sequence[dict]] = synthetic_response,
+                 latency: float = 0.0):
+        """Create a new MemoryTransport.
+
+        Parameters
+        ----------
+            responses : Union[Callable[[dict], dict], Sequence[dict]]
+                The responses to serve. Defaults to synthetic responses.
+            latency : float
+                The seconds to wait before responding.
+        """
+
+        self.responses = responses
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, url: str, payload: Payload,
+                 content_type: str) -> Response:
+        if not content_type.startswith('multipart/'):
+            return self._answer(url, payload)
+
+        # A batch, whose parts are answered one by one,
+        # each for the path and query of its request line.
+        responses = []
+        for part_headers, line, _, content in parse_parts(payload):
+            status, body = self._answer(line.split()[1], content)
+            content_id = part_headers.get('content-id', '').strip('<>')
+            responses.append((content_id, status, body))
+        return 200, encode_batch_response(responses)[1]
+
+    def _answer(self, url: str, payload: Payload) -> Response:
+        with self._lock:
+            number = self.requests
+            self.requests += 1
+
+        if url.endswith('key='):
+            body = error_body(400, 'usageLimits', 'keyInvalid', 'Bad Request')
+            return 400, json.dumps(body).encode()
+
+        if isinstance(payload, bytes):
+            payload = json.loads(payload)
+        if callable(self.responses):
+            body = self.responses(payload)
+        else:
+            body = self.responses[number % len(self.responses)]
+
+        fields = dict(parse_qsl(urlsplit(url).query)).get('fields')
+        if fields:
+            body = project(body, parse_fields(fields))
+        return 200, json.dumps(body).encode()
+
+    def _emit(self, request_hooks: hooks.Hooks, start: float, size: int):
+        trace = hooks.current() if request_hooks else None
+        if trace is not None:
+            now = time.monotonic()
+            trace.emit(hooks.FIRST_BYTE, start, now)
+            trace.emit(hooks.DOWNLOAD, now, now, size=size)
+
+    async def post(self, url: str, payload: Payload,
+                   request_hooks: hooks.Hooks,
+                   content_type: str = 'application/json') -> Response:
+        start = time.monotonic()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        status, body = self._respond(url, payload, content_type)
+        self._emit(request_hooks, start, len(body))
+        return status, body
+
+    def post_sync(self, url: str, payload: Payload,
+                  request_hooks: hooks.Hooks,
+                  content_type: str = 'application/json') -> Response:
+        start = time.monotonic()
+        if self.latency:
+            time.sleep(self.latency)
+        status, body = self._respond(url, payload, content_type)
+        self._emit(request_hooks, start, len(body))
+        return status, body
+
+
+TRANSPORTS = {
+    transport.name: transport for transport in (
+        AiohttpTransport, RequestsTransport, HttpxTransport, MemoryTransport
+    )
+}  # type: Dict[str, type]
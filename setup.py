@@ -8,15 +8,21 @@ setup(
     license="MIT",
     author="Volcyy",
     packages=find_packages(exclude=[
-        "build", "dist", "docs", "examples",
+        "benchmarks", "build", "dist", "docs", "examples",
         "pyflight.egg-info", "tests", "venv"
     ]),
     url="https://github.com/Volcyy/pyflight",
+    python_requires='>=3.7',
     install_requires=['aiohttp', 'requests'],
+    extras_require={'uvloop': ['uvloop'], 'httpx': ['httpx[http2]']},
     long_description="",
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
         "Programming Language :: Python",
-        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
+        "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
     ])
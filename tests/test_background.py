@@ -0,0 +1,123 @@
+import asyncio
+import threading
+
+import pytest
+
+from pyflight.api import APIException, Requester
+from pyflight.background import BackgroundLoop
+from pyflight.mock_server import MockServer
+from pyflight.requester import (
+    disable_background_loop, enable_background_loop, send_many_sync,
+    send_sync
+)
+from util import make_request
+
+
+def test_send_sync_on_background_loop():
+    phases = []
+    with MockServer() as server:
+        client = Requester(server.base_url)
+        client.api_key = 'test'
+        client.hooks.add(lambda event: phases.append(event.phase))
+        background = enable_background_loop(client)
+        assert enable_background_loop(client) is background
+
+        results = [send_sync(make_request(2), client=client)
+                   for _ in range(3)]
+        client.api_key = ''
+        with pytest.raises(APIException):
+            send_sync(make_request(), client=client)
+
+        assert len(client.transport.sessions) == 1
+        disable_background_loop(client)
+
+    assert [len(result.trips) for result in results] == [2, 2, 2]
+    assert phases.count('connect') == 4
+    assert not background.running
+    assert len(client.transport.sessions) == 0
+    assert client.background is None
+
+
+def test_send_many_sync(monkeypatch):
+    client = Requester()
+    in_flight = []
+    peak = []
+    threads = set()
+
+    async def post_request(url, payload):
+        threads.add(threading.current_thread().name)
+        in_flight.append(payload)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(payload)
+        if payload['n'] == 3:
+            raise APIException(500, 'Backend Error', 'backendError')
+        return payload
+
+    monkeypatch.setattr(client, 'post_request', post_request)
+    futures = send_many_sync(({'n': n} for n in range(10)), concurrency=3,
+                             use_containers=False, client=client)
+    try:
+        assert [f.result()['n'] for f in futures if f.exception() is None] \
+            == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+        assert isinstance(futures[3].exception(), APIException)
+        assert max(peak) == 3
+        assert threads == {'pyflight-background'}
+    finally:
+        disable_background_loop(client)
+
+
+def test_background_loop_run():
+    background = BackgroundLoop()
+
+    async def thread_name():
+        return threading.current_thread().name
+
+    async def nested():
+        coroutine = thread_name()
+        try:
+            background.run(coroutine)
+        finally:
+            coroutine.close()
+
+    try:
+        assert background.run(thread_name()) == 'pyflight-background'
+        with pytest.raises(RuntimeError):
+            background.run(nested())
+    finally:
+        background.close()
+
+    assert not background.running
+    assert background.run(thread_name()) == 'pyflight-background'
+    background.close()
+
+
+def test_background_loop_semaphore():
+    background = BackgroundLoop()
+    running = []
+    peak = []
+
+    async def hold():
+        running.append(None)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    try:
+        # Created on the loop, the semaphore can be waited for on it
+        # even where semaphores bind the loop they are created on.
+        semaphore = background.semaphore(2)
+        futures = [background.submit(hold(), semaphore) for _ in range(6)]
+        for future in futures:
+            future.result()
+        assert max(peak) == 2
+    finally:
+        background.close()
+
+
+def test_background_loop_close_cancels():
+    background = BackgroundLoop()
+    future = background.submit(asyncio.sleep(5))
+    background.close()
+
+    assert future.cancelled()
@@ -0,0 +1,173 @@
+import asyncio
+import json
+
+import pytest
+
+from pyflight import batch
+from pyflight.api import APIException, Requester
+from pyflight.batch import (
+    Batcher, batch_url, decode_batch, encode_batch, encode_batch_response,
+    parse_parts
+)
+from pyflight.mock_server import MockServer
+from pyflight.requester import (
+    disable_batching, enable_background_loop, disable_background_loop,
+    enable_batching, send_async, send_many_sync, send_sync, set_transport
+)
+from pyflight.transports import MemoryTransport
+from util import make_request, run
+
+
+def test_batch_url():
+    endpoint, path = batch_url(
+        'http://127.0.0.1:80/qpxExpress/v1/trips/search?key=test'
+    )
+    assert endpoint == 'http://127.0.0.1:80/batch/qpxExpress/v1?key=test'
+    assert path == '/qpxExpress/v1/trips/search?key=test'
+
+
+def test_encode_and_parse():
+    bodies = [b'{"a": 1}', b'{"b": 2}\r\n{"c": 3}']
+    content_type, body = encode_batch('/search', bodies, 'frontier')
+    assert content_type == 'multipart/mixed; boundary=frontier'
+
+    for boundary in ('frontier', None):
+        parts = parse_parts(body, boundary)
+        assert [content for _, _, _, content in parts] == bodies
+        part_headers, request_line, headers, _ = parts[0]
+        assert part_headers['content-id'] == '<item0>'
+        assert request_line == 'POST /search HTTP/1.1'
+        assert headers['content-type'] == 'application/json'
+
+
+def test_decode_matches_content_id():
+    _, body = encode_batch_response([
+        ('item1', 400, b'{"error": {}}'), ('item0', 200, b'{}')
+    ])
+    responses = decode_batch(body, 3)
+    assert responses[0] == (200, b'{}')
+    assert responses[1] == (400, b'{"error": {}}')
+
+    status, missing = responses[2]
+    assert status == 502
+    assert json.loads(missing)['error']['errors'][0]['reason'] == \
+        'batchItemMissing'
+
+
+def test_decode_malformed_parts():
+    _, body = encode_batch_response([
+        ('item0', 200, b'{}'), ('item1', 400, b'{}'), ('itemx', 200, b'{}')
+    ])
+    body = body.replace(b'HTTP/1.1 400 Error', b'HTTP/1.1')
+    statuses = [status for status, _ in decode_batch(body, 3)]
+    assert statuses == [200, 502, 502]
+
+
+def test_batching_mock_server():
+    async def search():
+        async with MockServer(error_rate=0.3, error_codes=(500,)) as server:
+            client = Requester(server.base_url)
+            client.api_key = 'test'
+            batcher = enable_batching(max_size=4, window=0.05, client=client)
+            results = await asyncio.gather(*(
+                send_async(make_request(solutions), client=client)
+                for solutions in range(2, 12)
+            ), return_exceptions=True)
+            await client.close()
+            return server, batcher, results
+
+    server, batcher, results = run(search())
+    assert server.stats()['requests'] == 10
+    assert server.batches == 3
+    assert batcher.stats() == {
+        'batches': 3, 'batched': 10, 'mean_size': 10 / 3
+    }
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    assert errors and all(isinstance(error, APIException) for error in errors)
+    assert all(error.reason == 'backendError' for error in errors)
+    assert len(errors) == server.stats()['errors'][500]
+    for solutions, result in enumerate(results, 2):
+        if not isinstance(result, Exception):
+            assert len(result.trips) == solutions
+
+
+def test_batching_invalid_key():
+    async def search():
+        async with MockServer() as server:
+            client = Requester(server.base_url)
+            client.api_key = ''
+            enable_batching(client=client)
+            results = await asyncio.gather(
+                send_async(make_request(2), client=client),
+                send_async(make_request(3), client=client),
+                return_exceptions=True
+            )
+            await client.close()
+            return results
+
+    for error in run(search()):
+        assert isinstance(error, APIException)
+        assert error.reason == 'keyInvalid'
+
+
+def test_batching_background_loop():
+    client = Requester('memory://search?key=')
+    client.api_key = 'test'
+    transport = MemoryTransport()
+    set_transport(transport, client=client)
+    batcher = enable_batching(window=0.02, client=client)
+    enable_background_loop(client)
+    try:
+        futures = send_many_sync([make_request(n) for n in range(2, 7)],
+                                 client=client)
+        results = [future.result() for future in futures]
+        assert [len(result.trips) for result in results] == [2, 3, 4, 5, 6]
+        assert batcher.batches == 1
+        assert transport.requests == 5
+
+        disable_batching(client)
+        assert client.batcher is None
+        assert len(send_sync(make_request(2), client=client).trips) == 2
+        assert batcher.batches == 1
+    finally:
+        disable_background_loop(client)
+
+
+def test_batcher_send_failure():
+    async def send(endpoint, body, content_type):
+        raise ConnectionError('no route')
+
+    async def fetch():
+        batcher = Batcher(window=0.01)
+        return await asyncio.gather(
+            batcher.fetch('http://example.com/search?key=x', b'{}', send),
+            batcher.fetch('http://example.com/search?key=x', b'{}', send),
+            return_exceptions=True
+        )
+
+    errors = run(fetch())
+    assert [type(error) for error in errors] == [ConnectionError] * 2
+
+    with pytest.raises(ValueError):
+        Batcher(max_size=0)
+
+
+def test_batcher_decode_failure(monkeypatch):
+    def decode_batch(body, count):
+        raise ValueError('not a batch')
+
+    async def send(endpoint, body, content_type):
+        return 200, b''
+
+    async def fetch():
+        batcher = Batcher(window=0.01)
+        return await asyncio.wait_for(asyncio.gather(
+            batcher.fetch('http://example.com/search?key=x', b'{}', send),
+            batcher.fetch('http://example.com/search?key=x', b'{}', send),
+            return_exceptions=True
+        ), 5)
+
+    monkeypatch.setattr(batch, 'decode_batch', decode_batch)
+    errors = run(fetch())
+    assert [type(error) for error in errors] == [ValueError] * 2
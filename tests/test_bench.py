@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from pyflight.bench import format_report, main, make_requests, run
+from pyflight.mock_server import MockServer
+
+
+def test_make_requests():
+    requests = list(make_requests(5, distinct=2, solutions=3))
+    dates = [r.as_dict()['request']['slice'][0]['date'] for r in requests]
+    assert dates == ['2018-01-01', '2018-01-02'] * 2 + ['2018-01-01']
+    assert requests[0].as_dict()['request']['solutions'] == 3
+
+
+@pytest.mark.parametrize('mode', ['async', 'sync', 'background'])
+def test_run(mode):
+    with MockServer(error_rate=0.5, error_codes=[500], seed=1) as server:
+        report = run(server.base_url, make_requests(20), concurrency=4,
+                     mode=mode)
+
+    assert report['requests'] == 20
+    assert 0 < report['errors']['500 backendError'] < 20
+    assert report['latency']['count'] == 20
+    assert report['throughput'] > 0
+    assert report['parse_seconds'] > 0
+    if mode != 'sync':
+        connections = report['connections']
+        assert connections['new'] + connections['reused'] == 20
+
+    assert 'errors\n  500 backendError' in format_report(report)
+
+    with pytest.raises(ValueError):
+        run(server.base_url, [], mode='threads')
+
+
+def test_main_cassette(tmpdir, capsys):
+    path = str(tmpdir)
+    main(['--mock', '--requests', '6', '--distinct', '3',
+          '--cassette', path, '--cassette-mode', 'record'])
+    assert '6 requests, async mode' in capsys.readouterr().out
+
+    main(['--requests', '6', '--distinct', '3', '--mode', 'sync',
+          '--cassette', path, '--json'])
+    report = json.loads(capsys.readouterr().out)
+    assert report['requests'] == 6
+    assert report['errors'] == {}
@@ -0,0 +1,106 @@
+import json
+import pickle
+
+import pytest
+
+from pyflight.canonical import FrozenRequest, canonicalize
+from pyflight.requester import Request, Slice, _payload
+
+
+def make_request():
+    request = Request()
+    request.adult_count = 1
+    slice_ = Slice('SFO', 'LAX', '2017-09-19')
+    slice_.max_stops = 0
+    slice_.permitted_carriers = ['VX', 'AA', 'VX']
+    slice_.earliest_departure_time  # creates an empty time range
+    return request.add_slice(slice_)
+
+
+def test_canonicalize():
+    assert canonicalize({
+        'request': {
+            'passengers': {'adult_count': 1, 'childrenCount': 0},
+            'slice': [{
+                'kind': 'qpxexpress#sliceInput',
+                'max_stops': 0,
+                'prohibitedCarrier': ['UA', 'AA'],
+                'permittedDepartureTime': {'kind': 'qpxexpress#timeOfDayRange'}
+            }],
+            'refundable': False,
+            'saleCountry': None
+        }
+    }) == {
+        'request': {
+            'passengers': {'adultCount': 1},
+            'slice': [{'maxStops': 0, 'prohibitedCarrier': ['AA', 'UA']}]
+        }
+    }
+
+
+def test_frozen_request_equivalence():
+    frozen = make_request().freeze()
+    manual = FrozenRequest({
+        'request': {
+            'slice': [{
+                'date': '2017-09-19', 'destination': 'LAX', 'origin': 'SFO',
+                'maxStops': 0, 'permittedCarrier': ['AA', 'VX']
+            }],
+            'passengers': {'adultCount': 1, 'seniorCount': 0},
+        }
+    })
+
+    assert frozen == manual
+    assert hash(frozen) == hash(manual)
+    assert frozen.digest == manual.digest
+    assert len({frozen, manual}) == 1
+    assert frozen.json_bytes is frozen.json_bytes
+    assert json.loads(frozen.json_bytes.decode()) == frozen.as_dict()
+    assert frozen.as_dict()['request']['solutions'] == 1
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+
+
+def test_frozen_request_copies():
+    frozen = make_request().add_slice(
+        Slice('LAX', 'SFO', '2017-09-22')
+    ).freeze()
+
+    later = frozen.with_date('2017-09-20')
+    assert later != frozen
+    assert later.slices[0]['date'] == '2017-09-20'
+    assert later._slices[1] is frozen._slices[1]
+    assert later._options is frozen._options
+
+    assert frozen.with_slice(1, max_stops=2).slices[1]['maxStops'] == 2
+    assert frozen.with_slice(0, max_stops=None).slices[0].get('maxStops') \
+        is None
+
+    two = frozen.with_passengers(adult_count=2)
+    assert two.as_dict()['request']['passengers'] == {'adultCount': 2}
+    assert two.with_passengers(adult_count=1) == frozen
+
+    german = frozen.replace(sale_country='DE')
+    assert german.as_dict()['request']['saleCountry'] == 'DE'
+    assert german.replace(sale_country=None) == frozen
+
+
+def test_frozen_request_nested_values():
+    pairs = FrozenRequest({
+        'request': {'slice': [{'origin': 'SFO', 'extra': [['a', 1]]}]}
+    })
+    mapping = FrozenRequest({
+        'request': {'slice': [{'origin': 'SFO', 'extra': {'a': 1}}]}
+    })
+
+    assert pairs.slices == [{'origin': 'SFO', 'extra': [['a', 1]]}]
+    assert mapping.slices == [{'origin': 'SFO', 'extra': {'a': 1}}]
+    assert pairs != mapping
+    assert pairs.with_date('2017-09-20').slices[0]['extra'] == [['a', 1]]
+
+
+def test_frozen_request_payload():
+    frozen = make_request().freeze()
+
+    assert _payload(frozen) is frozen.json_bytes
+    with pytest.raises(ValueError):
+        _payload('not a request')
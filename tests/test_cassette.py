@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from pyflight.api import APIException, Requester
+from pyflight.cassette import Cassette, CassetteMiss
+from pyflight.mock_server import MockServer
+from pyflight.requester import (
+    enable_metrics, send_async, send_sync, set_transport, use_cassette
+)
+from pyflight.transports import MemoryTransport
+from util import make_request, run
+
+
+def make_client(base_url='http://127.0.0.1:9/search?key='):
+    client = Requester(base_url)
+    client.api_key = 'test'
+    return client
+
+
+def test_cassette_record_and_replay(tmpdir):
+    path = str(tmpdir)
+    with MockServer() as server:
+        client = make_client(server.base_url)
+        cassette = use_cassette(path, mode='record', client=client)
+        recorded = send_sync(make_request(3), client=client)
+        client.api_key = ''
+        with pytest.raises(APIException):
+            send_sync(make_request(2), client=client)
+
+    assert server.stats()['requests'] == 2
+    assert cassette.stats()['recorded'] == 2
+    assert len(cassette) == 2
+
+    # The server is gone, so everything is served from the cassette.
+    client = make_client()
+    metrics = enable_metrics(client=client)
+    cassette = use_cassette(path, mode='replay', client=client)
+    replayed = send_sync(make_request(3), client=client)
+    assert replayed.as_dict() == recorded.as_dict()
+
+    with pytest.raises(APIException) as error:
+        send_sync(make_request(2), client=client)
+    assert error.value.reason == 'keyInvalid'
+
+    with pytest.raises(CassetteMiss):
+        send_sync(make_request(4), client=client)
+
+    assert cassette.stats() == {
+        'hits': 2, 'misses': 1, 'recorded': 0, 'hit_rate': 2 / 3
+    }
+    text = metrics.render()
+    assert 'pyflight_cassette_hits_total 2\n' in text
+    assert 'pyflight_cassette_misses_total 1\n' in text
+
+
+def test_cassette_auto_async(tmpdir):
+    async def search():
+        async with MockServer() as server:
+            client = make_client(server.base_url)
+            use_cassette(str(tmpdir), client=client)
+            first = await send_async(make_request(2), client=client)
+            second = await send_async(make_request(2), client=client)
+            return server, client.cassette, first, second
+
+    server, cassette, first, second = run(search())
+    assert first.as_dict() == second.as_dict()
+    assert server.stats()['requests'] == 1
+    assert cassette.stats()['hits'] == 1
+    assert cassette.stats()['misses'] == 1
+
+
+def test_cassette_simulate_latency(tmpdir):
+    cassette = Cassette(str(tmpdir), mode='replay', simulate_latency=True,
+                        latency_scale=0.5)
+    payload = make_request().as_dict()
+    cassette.save(payload, 200, b'{}', latency=0.2)
+
+    start = time.monotonic()
+    assert cassette.fetch_sync(payload, None) == (200, b'{}')
+    assert time.monotonic() - start >= 0.1
+
+    status, body = run(cassette.fetch(payload, None))
+    assert (status, body) == (200, b'{}')
+
+
+def test_cassette_canonical_key(tmpdir):
+    payload = make_request().as_dict()
+    reordered = {'request': dict(reversed(list(payload['request'].items())))}
+    assert Cassette.key(payload) == Cassette.key(reordered)
+
+    cassette = Cassette(str(tmpdir))
+    cassette.save(payload, 200, b'{"kind": "test"}')
+    entry = cassette.load(reordered)
+    assert entry['status'] == 200
+    assert entry['body'] == '{"kind": "test"}'
+    assert list(cassette.entries()) == [entry]
+
+    with pytest.raises(ValueError):
+        Cassette(str(tmpdir), mode='rewind')
+
+
+def test_cassette_keys_fields(tmpdir):
+    client = make_client()
+    set_transport(MemoryTransport(), client=client)
+    use_cassette(str(tmpdir), mode='record', client=client)
+    full = send_sync(make_request(2), False, client)
+    partial = send_sync(make_request(2), False, client, 'trips/requestId')
+    assert partial != full
+
+    cassette = use_cassette(str(tmpdir), mode='replay', client=client)
+    assert len(cassette) == 2
+    assert send_sync(make_request(2), False, client) == full
+    assert send_sync(make_request(2), False, client,
+                     ['trips/requestId']) == partial
+    with pytest.raises(CassetteMiss):
+        send_sync(make_request(2), False, client, 'trips/data')
+    assert Cassette.key(make_request(2).as_dict()) == \
+        Cassette.key(make_request(2).as_dict(), None)
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import pyflight
+from pyflight.api import APIException
+from pyflight.circuit_breaker import CircuitBreaker, CircuitOpenError
+from pyflight.requester import BASE_URL, requester
+
+
+def fail(breaker, code=500):
+    start = breaker.allow()
+    breaker.record(start, APIException(code, 'Error', 'backendError'))
+
+
+def succeed(breaker):
+    breaker.record(breaker.allow())
+
+
+def test_circuit_breaker_states():
+    changes = []
+    breaker = CircuitBreaker('qpx', min_calls=4, open_duration=0.05,
+                             trial_calls=2)
+    breaker.add_listener(lambda b, old, new: changes.append((old, new)))
+
+    fail(breaker, code=400)
+    succeed(breaker)
+    fail(breaker)
+    assert breaker.state == 'closed'
+
+    fail(breaker)
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError) as err:
+        breaker.allow()
+    assert err.value.endpoint == 'qpx'
+    assert 0 < err.value.retry_after <= 0.05
+
+    breaker._opened_at -= 0.05
+    first, second = breaker.allow(), breaker.allow()
+    assert breaker.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    breaker.record(first)
+    breaker.record(second, asyncio.CancelledError())
+    succeed(breaker)
+    assert breaker.state == 'closed'
+    assert breaker.stats()['calls'] == 0
+
+    assert changes == [
+        ('closed', 'open'), ('open', 'half_open'), ('half_open', 'closed')
+    ]
+
+
+def test_circuit_breaker_slow_calls():
+    breaker = CircuitBreaker('qpx', slow_call=0.01, min_calls=2)
+    for _ in range(2):
+        breaker.record(breaker.allow() - 1)
+
+    assert breaker.state == 'open'
+
+
+def test_requester_circuit_breakers(monkeypatch):
+    calls = []
+
+    def post_sync(url, payload):
+        calls.append(url)
+        raise APIException(503, 'Backend Error', 'backendError')
+
+    monkeypatch.setattr(requester, '_post_sync', post_sync)
+    changes = []
+    pyflight.enable_circuit_breakers(
+        lambda b, old, new: changes.append(new), min_calls=2
+    )
+    try:
+        for _ in range(2):
+            with pytest.raises(APIException):
+                pyflight.send_sync({}, use_containers=False)
+        with pytest.raises(CircuitOpenError):
+            pyflight.send_sync({}, use_containers=False)
+
+        assert len(calls) == 2
+        assert changes == ['open']
+        assert list(requester.circuit_breakers) == [BASE_URL.split('?')[0]]
+    finally:
+        pyflight.disable_circuit_breakers()
+
+    assert requester.circuit_breaker(BASE_URL) is None
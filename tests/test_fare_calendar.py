@@ -0,0 +1,133 @@
+import asyncio
+
+from pyflight.api import APIException, Requester
+from pyflight.fare_calendar import FareCalendar
+from pyflight.requester import Request, Slice, requester
+from pyflight.result import Result
+from util import make_response, payload_date
+
+
+def test_fare_calendar_layout():
+    calendar = FareCalendar(['SFO', 'OAK'], ['LAX', 'SFO'], '2017-09-30', 3)
+
+    assert calendar.routes == [('SFO', 'LAX'), ('OAK', 'LAX'), ('OAK', 'SFO')]
+    assert calendar.dates == ['2017-09-30', '2017-10-01', '2017-10-02']
+    assert len(calendar) == 9
+    assert len(list(calendar.stale_cells())) == 9
+    assert calendar.price('SFO', 'LAX', '2017-10-01') is None
+
+    cell, request = next(calendar.requests())
+    assert cell == ('SFO', 'LAX', '2017-09-30')
+    assert request.adult_count == 1
+    assert request.raw_data['request']['slice'][0]['origin'] == 'SFO'
+
+
+def test_fare_calendar_record():
+    calendar = FareCalendar(['SFO'], ['LAX'], '2017-09-30', 2, max_age=60)
+    calendar.record('SFO', 'LAX', '2017-09-30',
+                    Result(make_response('USD80.00', 'USD69.50', 'USD70.00')),
+                    now=1000)
+
+    assert calendar.price('SFO', 'LAX', '2017-09-30') == 69.5
+    assert calendar.cheapest_trip('SFO', 'LAX', '2017-09-30') == 'trip1'
+    assert calendar.currency == 'USD'
+    assert not calendar.is_stale('SFO', 'LAX', '2017-09-30', now=1030)
+    assert calendar.is_stale('SFO', 'LAX', '2017-09-30', now=1061)
+    assert list(calendar.stale_cells(now=1030)) == [
+        ('SFO', 'LAX', '2017-10-01')
+    ]
+
+
+def test_fare_calendar_run(monkeypatch):
+    calls = []
+
+    async def post_request(url, payload):
+        date = payload_date(payload)
+        calls.append(date)
+        if date == '2017-10-01':
+            raise APIException(403, 'Limit Exceeded', 'dailyLimitExceeded')
+        return make_response('USD{}.00'.format(len(calls) * 10))
+
+    monkeypatch.setattr(requester, 'post_request', post_request)
+
+    calendar = FareCalendar(['SFO'], ['LAX'], '2017-09-30', 3)
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(calendar.run(concurrency=2)) == 2
+        assert len(calls) == 3
+        assert list(calendar.errors) == [('SFO', 'LAX', '2017-10-01')]
+
+        # Only the cell that failed is refreshed on the next run.
+        assert loop.run_until_complete(calendar.run()) == 0
+        assert calls[3:] == ['2017-10-01']
+    finally:
+        loop.close()
+
+
+def test_fare_calendar_run_equal_requests(monkeypatch):
+    async def post_request(url, payload):
+        await asyncio.sleep(0)
+        return make_response('USD50.00')
+
+    monkeypatch.setattr(requester, 'post_request', post_request)
+
+    # One request, sent for every date, is recorded for each of them.
+    request = Request().add_slice(Slice('SFO', 'LAX', '2017-09-30'))
+    calendar = FareCalendar(['SFO'], ['LAX'], '2017-09-30', 3,
+                            request_factory=lambda *cell: request)
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(calendar.run(concurrency=3)) == 3
+    finally:
+        loop.close()
+
+    assert calendar.errors == {}
+    assert [calendar.price('SFO', 'LAX', date) for date in calendar.dates] \
+        == [50.0] * 3
+
+
+def test_fare_calendar_run_shared_request(monkeypatch):
+    async def post_request(url, payload):
+        await asyncio.sleep(0)
+        return make_response('USD{}.00'.format(payload_date(payload)[-2:]))
+
+    monkeypatch.setattr(requester, 'post_request', post_request)
+
+    # A factory that reuses a single request, changing it for each cell.
+    request = Request().add_slice(Slice('SFO', 'LAX', '2017-09-30'))
+
+    def request_factory(origin, destination, date):
+        request.raw_data['request']['slice'][0]['date'] = date
+        return request
+
+    calendar = FareCalendar(['SFO'], ['LAX'], '2017-09-30', 3,
+                            request_factory=request_factory)
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(calendar.run(concurrency=3)) == 3
+    finally:
+        loop.close()
+
+    assert calendar.errors == {}
+    assert [calendar.price('SFO', 'LAX', date) for date in calendar.dates] \
+        == [30.0, 1.0, 2.0]
+
+
+def test_fare_calendar_run_client(monkeypatch):
+    client = Requester()
+    dates = []
+
+    async def post_request(url, payload):
+        dates.append(payload_date(payload))
+        return make_response('USD20.00')
+
+    monkeypatch.setattr(client, 'post_request', post_request)
+
+    calendar = FareCalendar(['SFO'], ['LAX'], '2017-09-30', 2)
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(calendar.run(client=client)) == 2
+    finally:
+        loop.close()
+
+    assert sorted(dates) == ['2017-09-30', '2017-10-01']
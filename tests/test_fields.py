@@ -0,0 +1,169 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pyflight.api import Requester
+from pyflight.fields import (
+    SUMMARY, fields_selector, fields_url, format_fields, parse_fields, project
+)
+from pyflight.models.pricing import Pricing
+from pyflight.models.segment import Segment
+from pyflight.mock_server import MockServer
+from pyflight.requester import (
+    enable_batching, send_async, send_sync, set_transport
+)
+from pyflight.result import Result
+from pyflight.synthetic import generate_response
+from pyflight.transports import MemoryTransport
+from util import make_request, run
+
+PRICES = 'trips(requestId,tripOption(id,saleTotal))'
+
+
+def test_parse_and_format():
+    tree = parse_fields('trips(requestId,tripOption/slice(duration)),'
+                        'trips/tripOption/slice/segment/cabin')
+    assert tree == {'trips': {
+        'requestId': None,
+        'tripOption': {'slice': {'duration': None, 'segment': {
+            'cabin': None
+        }}}
+    }}
+    assert format_fields(tree) == \
+        'trips(requestId,tripOption/slice(duration,segment/cabin))'
+
+    # Selecting a whole field includes any selection within it.
+    assert parse_fields('a/b,a') == {'a': None}
+
+    for selector in ('', 'a(b', 'a)', 'a(b)c', 'a,,b', 'a//b'):
+        with pytest.raises(ValueError):
+            parse_fields(selector)
+
+
+def test_fields_selector():
+    assert fields_selector(PRICES) == PRICES
+    assert fields_selector([
+        'trips/requestId', 'trips/tripOption/id', 'trips/tripOption/saleTotal'
+    ]) == PRICES
+    assert fields_url('http://localhost/search?key=', 'a(b,c)') == \
+        'http://localhost/search?fields=a(b,c)&key='
+
+
+def test_project():
+    data = {'a': [{'b': 1, 'c': 2}, {'b': 3}], 'd': {'e': 4, 'f': 5}}
+    assert project(data, parse_fields('a/b,d/f')) == {
+        'a': [{'b': 1}, {'b': 3}], 'd': {'f': 5}
+    }
+    assert project(data, parse_fields('*/e,a')) == {
+        'a': data['a'], 'd': {'e': 4}
+    }
+    assert project(data, parse_fields('x')) == {}
+
+
+def test_models_tolerate_omitted_keys():
+    result = Result({})
+    assert result.request_id is None and result.trips == []
+
+    pricing = Pricing({'saleTotal': 'USD10.00'})
+    assert pricing.sale_total == 'USD10.00'
+    assert pricing.fare_calculation is None
+    assert pricing.fares == [] and pricing.adults == 0
+
+    segment = Segment({'flight': {'carrier': 'UA'}})
+    assert segment.flight_carrier == 'UA' and segment.flight_number is None
+    assert segment.flights == []
+
+
+def test_send_with_fields():
+    async def search():
+        async with MockServer() as server:
+            client = Requester(server.base_url)
+            client.api_key = 'test'
+            sizes = []
+            client.hooks.add(lambda event: sizes.append(event.size)
+                             if event.phase == 'download' else None)
+            full = await send_async(make_request(5), client=client)
+            partial = await send_async(make_request(5), client=client,
+                                       fields=PRICES)
+            await client.close()
+            return full, partial, sizes
+
+    full, partial, sizes = run(search())
+    assert sizes[1] < sizes[0] / 5
+    assert partial.request_id == full.request_id
+    assert [(t.id, t.total_price) for t in partial.trips] == \
+        [(t.id, t.total_price) for t in full.trips]
+    assert partial.airports == [] and partial.trips[0].routes == []
+
+
+def test_send_sync_with_fields():
+    client = Requester()
+    client.api_key = 'test'
+    set_transport(MemoryTransport(), client=client)
+    raw = send_sync(make_request(2), False, client, ['trips/tripOption/id'])
+    assert raw == {'trips': {'tripOption': [
+        {'id': trip.id} for trip in send_sync(make_request(2), client=client)
+    ]}}
+
+
+def test_batch_with_fields():
+    async def search():
+        client = Requester()
+        client.api_key = 'test'
+        set_transport(MemoryTransport(), client=client)
+        batcher = enable_batching(client=client)
+        results = await asyncio.gather(
+            send_async(make_request(2), client=client, fields=PRICES),
+            send_async(make_request(3), client=client)
+        )
+        return batcher, results
+
+    batcher, (partial, full) = run(search())
+    assert batcher.batches == 2
+    assert partial.trips[0].routes == []
+    assert full.trips[0].routes
+
+
+@pytest.mark.parametrize('selector', [
+    SUMMARY, PRICES, 'trips/data(airport/name,carrier)',
+    'trips/tripOption/pricing(saleTotal,passengers/adultCount)',
+    'trips/tripOption/pricing/segmentPricing/freeBaggageOption/*',
+    'trips/tripOption/slice/*/leg(origin,destination)', '*'
+])
+def test_result_fields(selector):
+    data = generate_response(trips=5, slices=2, pricings=2, bag_descriptors=2)
+    # Building only some fields is the same as building a partial response.
+    partial = Result(project(data, parse_fields(selector)))
+    assert Result(data, selector).as_dict() == partial.as_dict()
+
+
+def test_result_fields_skip_subtrees():
+    data = generate_response(trips=3)
+    result = Result(data, SUMMARY)
+    full = Result(data)
+    assert result.request_id == full.request_id
+    assert [c.as_dict() for c in result.carriers] == \
+        [c.as_dict() for c in full.carriers]
+    assert result.airports == [] and result.trips[0].pricing == []
+
+    segment = result.trips[0].routes[0].segments[0]
+    assert segment.flight_carrier == \
+        full.trips[0].routes[0].segments[0].flight_carrier
+    assert segment.booking_code is None
+    assert segment.flights[0].departure_time is not None
+    assert segment.flights[0].mileage is None
+
+
+def test_send_with_result_fields():
+    client = Requester()
+    client.api_key = 'test'
+    set_transport(MemoryTransport(), client=client)
+    result = send_sync(make_request(2), client=client, result_fields=PRICES)
+    assert result.trips[0].total_price and result.trips[0].routes == []
+
+    with ThreadPoolExecutor(1) as executor:
+        client.parse_executor = executor
+        result = run(send_async(make_request(2), client=client,
+                                result_fields=['trips/tripOption/id']))
+    assert result.trips[0].id and result.trips[0].total_price is None
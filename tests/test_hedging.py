@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from pyflight.api import APIException
+from pyflight.hedging import Hedger
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def make_send(*delays):
+    calls = []
+
+    async def send():
+        delay = delays[len(calls)]
+        calls.append(delay)
+        await asyncio.sleep(delay)
+        if delay < 0:
+            raise APIException(500, 'Backend Error', 'backendError')
+        return delay
+
+    return send, calls
+
+
+def warm_up(hedger, latency=0.01):
+    for _ in range(hedger.min_samples):
+        hedger._record(latency)
+    hedger.requests += 100
+
+
+def test_hedger_cold():
+    hedger = Hedger()
+    send, calls = make_send(0.02)
+
+    assert hedger.delay() is None
+    assert run(hedger.run(send)) == 0.02
+    assert calls == [0.02]
+    assert hedger.stats()['hedges_fired'] == 0
+
+
+def test_hedger_hedges_slow_requests():
+    hedger = Hedger(percentile=90, budget_percent=5)
+    warm_up(hedger)
+    assert abs(hedger.delay() - 0.01) < 0.001
+
+    send, calls = make_send(1.0, 0.001)
+    assert run(hedger.run(send)) == 0.001
+    assert calls == [1.0, 0.001]
+    assert hedger.hedges_fired == 1
+    assert hedger.hedges_won == 1
+
+    send, calls = make_send(0.001)
+    assert run(hedger.run(send)) == 0.001
+    assert hedger.hedges_fired == 1
+
+
+def test_hedger_records_request_latency():
+    hedger = Hedger(percentile=90)
+    warm_up(hedger, latency=0.02)
+
+    send, calls = make_send(1.0, 0.001)
+    assert run(hedger.run(send)) == 0.001
+    # The request took as long as the delay plus the duplicate,
+    # not just as long as the duplicate.
+    latencies = hedger._latencies
+    assert latencies.count == hedger.min_samples + 1
+    assert latencies.min >= 0.02
+
+
+def test_hedger_budget():
+    hedger = Hedger(budget_percent=1)
+    warm_up(hedger)
+
+    send, calls = make_send(0.05, 0.001)
+    assert run(hedger.run(send)) == 0.001
+    assert hedger.hedges_fired == 1
+
+    send, calls = make_send(0.05, 0.001)
+    assert run(hedger.run(send)) == 0.05
+    assert calls == [0.05]
+    assert hedger.hedges_fired == 1
+
+
+def test_hedger_errors():
+    hedger = Hedger()
+    warm_up(hedger)
+
+    send, calls = make_send(0.02, -0.001)
+    assert run(hedger.run(send)) == 0.02
+    assert hedger.hedges_won == 0
+
+    send, calls = make_send(-0.02)
+    with pytest.raises(APIException):
+        run(hedger.run(send))
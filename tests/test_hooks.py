@@ -0,0 +1,65 @@
+import pytest
+
+from pyflight import hooks
+from pyflight.api import APIException, Requester
+from pyflight.mock_server import MockServer
+from pyflight.requester import send_async, send_sync
+from util import make_request, run
+
+
+def test_hooks_async():
+    events = []
+
+    async def search():
+        async with MockServer() as server:
+            client = Requester(server.base_url)
+            client.api_key = 'test'
+            client.hooks.add(events.append)
+            await send_async(make_request(2), client=client)
+            await send_async(make_request(2), client=client)
+            client.hooks.remove(events.append)
+            await send_async(make_request(2), client=client)
+            assert hooks.current() is None
+
+    run(search())
+
+    first = [event.phase for event in events if event.request_id == 1]
+    assert first == ['queued', 'connect', 'first_byte', 'download',
+                     'decode', 'parse', 'request']
+    assert len(events) == 14
+    assert all(event.url.endswith('/trips/search') for event in events)
+
+    download, decode, request = events[3], events[4], events[6]
+    assert download.size == decode.size == request.size > 0
+    assert request.error is None
+    assert request.start <= events[0].end <= download.start
+    assert request.duration >= sum(e.duration for e in events[2:6])
+    assert events[1].reused is False
+    assert all(event.duration >= 0 for event in events)
+
+
+def test_hooks_sync_error():
+    events = []
+    with MockServer(error_rate=1.0, error_codes=[500]) as server:
+        client = Requester(server.base_url)
+        client.api_key = 'test'
+        client.hooks.add(events.append)
+        with pytest.raises(APIException):
+            send_sync(make_request(), client=client)
+
+    assert [event.phase for event in events] == \
+        ['first_byte', 'download', 'request']
+    assert isinstance(events[-1].error, APIException)
+    assert events[-1].as_dict()['error'].startswith('APIException')
+
+
+def test_hooks_untraced(monkeypatch):
+    client = Requester()
+    assert not client.hooks
+
+    async def post(url, payload):
+        assert hooks.current() is None
+        return b'{"ok": true}'
+
+    monkeypatch.setattr(client, '_post', post)
+    assert run(send_async({}, False, client=client)) == {'ok': True}
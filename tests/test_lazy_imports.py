@@ -0,0 +1,14 @@
+import subprocess
+import sys
+
+
+def test_import_does_not_load_transports():
+    script = (
+        'import asyncio, sys, pyflight\n'
+        'pyflight.Result, pyflight.MockServer, pyflight.requester.requester\n'
+        'loaded = [m for m in ("aiohttp", "requests") if m in sys.modules]\n'
+        'assert not loaded, loaded\n'
+        'policy = asyncio.get_event_loop_policy()\n'
+        'assert policy._local._loop is None, "event loop was created"\n'
+    )
+    subprocess.check_call([sys.executable, '-c', script])
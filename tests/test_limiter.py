@@ -0,0 +1,88 @@
+import asyncio
+
+from pyflight.api import APIException
+from pyflight.limiter import AdaptiveLimiter, is_throttling
+from pyflight.requester import requester, send_many_async
+
+
+def throttled():
+    return APIException(403, 'Rate Limit Exceeded', 'rateLimitExceeded')
+
+
+def test_is_throttling():
+    assert is_throttling(throttled())
+    assert is_throttling(APIException(429, 'Too Many Requests', 'x'))
+    assert not is_throttling(APIException(400, 'Bad Request', 'badRequest'))
+
+
+def test_limiter_aimd():
+    limiter = AdaptiveLimiter(initial=4, max_limit=5, cooldown=1.0)
+
+    for now in range(40):
+        limiter.record(0.1, now=now)
+    assert limiter.limit == 5
+    assert limiter.baseline == 0.1
+
+    limiter.record(0.1, throttled(), now=100.0)
+    assert limiter.limit == 2.5
+    limiter.record(0.1, throttled(), now=100.5)
+    assert limiter.limit == 2.5
+
+    limiter.record(0.5, now=101.0)
+    assert limiter.limit == 1.25
+    assert limiter.decreases == 2
+
+    limiter.record(0.1, APIException(400, 'Bad Request', 'badRequest'),
+                   now=103.0)
+    limiter.record(0.1, asyncio.CancelledError(), now=103.0)
+    assert limiter.limit == 1.25
+
+    limiter.record(0.1, APIException(500, 'Backend Error', 'backendError'),
+                   now=103.0)
+    assert limiter.limit == 1
+    assert int(limiter) == 1
+
+
+def test_limiter_ignores_cancelled():
+    limiter = AdaptiveLimiter(initial=4, cooldown=1.0)
+
+    for now in range(3):
+        limiter.record(0.1, asyncio.CancelledError(), now=100.0 + now * 2)
+    assert limiter.limit == 4
+    assert limiter.decreases == 0
+
+
+def test_send_many_async_adaptive(monkeypatch):
+    in_flight = []
+    peak = []
+
+    async def post_request(url, payload):
+        in_flight.append(payload)
+        peak.append(len(in_flight))
+        call = len(peak)
+        await asyncio.sleep(0.001)
+        in_flight.remove(payload)
+        if call == 30:
+            raise throttled()
+        return payload
+
+    monkeypatch.setattr(requester, 'post_request', post_request)
+    limiter = AdaptiveLimiter(initial=2, max_limit=8)
+
+    async def main():
+        return [
+            response async for _, response in send_many_async(
+                ({'n': n} for n in range(60)), limiter, use_containers=False
+            )
+        ]
+
+    loop = asyncio.new_event_loop()
+    try:
+        responses = loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+    assert len(responses) == 60
+    assert sum(isinstance(r, APIException) for r in responses) == 1
+    assert peak[0] == 1 and max(peak) > 2
+    assert limiter.increases > 0 and limiter.decreases >= 1
@@ -0,0 +1,123 @@
+import asyncio
+
+from pyflight.api import APIException, Requester
+from pyflight.circuit_breaker import CircuitOpenError
+from pyflight.hooks import RequestEvent
+from pyflight.limiter import AdaptiveLimiter
+from pyflight.metrics import Metrics, outcome
+from pyflight.mock_server import MockServer
+from pyflight.requester import (
+    disable_metrics, enable_metrics, enable_hedging, disable_hedging,
+    requester, send_many_async, send_sync, set_transport
+)
+from pyflight.transports import MemoryTransport
+from util import make_request, run
+
+
+def test_outcome():
+    assert outcome(None) == ('200', '')
+    assert outcome(APIException(403, 'Limit', 'dailyLimitExceeded')) == \
+        ('403', 'dailyLimitExceeded')
+    assert outcome(CircuitOpenError('x', 1.0)) == ('circuit_open', '')
+    assert outcome(asyncio.CancelledError()) == ('cancelled', '')
+    assert outcome(OSError()) == ('error', 'OSError')
+
+
+def test_metrics_render():
+    metrics = Metrics()
+    metrics(RequestEvent('request', 1, 'u', 0.0, 0.02, size=100, sent=10))
+    metrics(RequestEvent('request', 2, 'u', 0.0, 0.3,
+                         error=APIException(500, 'Error', 'backend"Error')))
+    metrics(RequestEvent('connect', 1, 'u', 0.0, 0.0, reused=True))
+    metrics.increment('cache_requests_total', cache='cassette', result='hit')
+
+    assert metrics.counter('requests_total', status='200', reason='') == 1
+    assert metrics.counter('bytes_received_total') == 100
+    assert metrics.histogram('request_duration_seconds').count == 2
+    assert metrics.histogram('phase_duration_seconds', phase='x') is None
+
+    text = metrics.render(buckets=(0.01, 0.1, 1.0))
+    assert '# TYPE pyflight_requests_total counter' in text
+    assert 'pyflight_requests_total{reason="",status="200"} 1' in text
+    assert 'pyflight_requests_total{reason="backend\\"Error",status="500"} 1' \
+        in text
+    assert 'pyflight_connections_total{reused="true"} 1' in text
+    assert 'pyflight_cache_requests_total{cache="cassette",result="hit"} 1' \
+        in text
+    for line in ('pyflight_request_duration_seconds_bucket{le="0.01"} 0',
+                 'pyflight_request_duration_seconds_bucket{le="0.1"} 1',
+                 'pyflight_request_duration_seconds_bucket{le="1.0"} 2',
+                 'pyflight_request_duration_seconds_bucket{le="+Inf"} 2',
+                 'pyflight_request_duration_seconds_count 2'):
+        assert line in text
+
+    metrics.reset()
+    assert metrics.snapshot() == {
+        'counters': {}, 'gauges': {}, 'histograms': {}
+    }
+
+
+def test_enable_metrics():
+    with MockServer(error_rate=0.5, error_codes=[403], seed=3) as server:
+        client = Requester(server.base_url)
+        client.api_key = 'test'
+        metrics = enable_metrics(client=client)
+        for _ in range(6):
+            try:
+                send_sync(make_request(), client=client)
+            except APIException:
+                pass
+        errors = server.stats()['errors'].get(403, 0)
+
+    snapshot = metrics.snapshot()
+    requests = {
+        (s['labels']['status'], s['labels']['reason']): s['value']
+        for s in snapshot['counters']['requests_total']
+    }
+    assert requests.get(('200', ''), 0) == 6 - errors
+    assert requests.get(('403', 'dailyLimitExceeded'), 0) == errors
+    phases = {
+        s['labels']['phase']
+        for s in snapshot['histograms']['phase_duration_seconds']
+    }
+    assert phases == {'first_byte', 'download', 'decode', 'parse'}
+    assert metrics.counter('bytes_sent_total') > 0
+
+    disable_metrics(client)
+    assert client.metrics is None and not client.hooks
+
+
+def test_metrics_hedging():
+    metrics = enable_metrics()
+    try:
+        assert 'hedges_fired_total' not in metrics.snapshot()['counters']
+        enable_hedging()
+        assert metrics.snapshot()['counters']['hedges_fired_total'] == \
+            [{'labels': {}, 'value': 0}]
+    finally:
+        disable_hedging()
+        disable_metrics()
+    assert requester.metrics is None
+
+
+def test_metrics_concurrency_limit():
+    client = Requester()
+    client.api_key = 'test'
+    set_transport(MemoryTransport(), client=client)
+    metrics = enable_metrics(client=client)
+    assert metrics.snapshot()['gauges'] == {}
+
+    limiter = AdaptiveLimiter(initial=4, increase=1)
+
+    async def send_all():
+        requests = [make_request(2) for _ in range(8)]
+        async for _ in send_many_async(requests, limiter, client=client):
+            pass
+
+    run(send_all())
+    assert client.limiter is limiter
+    assert metrics.snapshot()['gauges']['concurrency_limit'] == \
+        [{'labels': {}, 'value': limiter.limit}]
+    text = metrics.render()
+    assert '# TYPE pyflight_concurrency_limit gauge' in text
+    assert '\npyflight_concurrency_limit ' in text
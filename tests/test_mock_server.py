@@ -0,0 +1,78 @@
+import pytest
+
+from pyflight.api import BASE_URL, APIException, Requester
+from pyflight.limiter import is_throttling
+from pyflight.mock_server import MockServer
+from pyflight.requester import requester, send_async, send_sync, set_base_url
+from util import make_request, make_response, run
+
+
+def test_set_base_url():
+    set_base_url('http://localhost:8080/search?key=')
+    assert requester.base_url == 'http://localhost:8080/search?key='
+    set_base_url()
+    assert requester.base_url == BASE_URL
+
+
+def test_mock_server_synthetic():
+    async def search():
+        async with MockServer() as server:
+            client = Requester(server.base_url)
+            client.api_key = 'test'
+            result = await send_async(make_request(3), client=client)
+            raw = await send_async(make_request(2), False, client=client)
+
+            client.api_key = ''
+            with pytest.raises(APIException) as error:
+                await send_async(make_request(), client=client)
+            assert error.value.reason == 'keyInvalid'
+            return server, result, raw
+
+    server, result, raw = run(search())
+    assert len(result.trips) == 3
+    assert len(raw['trips']['tripOption']) == 2
+    assert server.stats() == {'requests': 3, 'errors': {400: 1}}
+
+
+def test_mock_server_faults():
+    async def search(server):
+        async with server:
+            client = Requester(server.base_url)
+            client.api_key = 'test'
+            outcomes = []
+            for _ in range(2):
+                try:
+                    await send_async(make_request(), client=client)
+                except APIException as error:
+                    outcomes.append(error)
+            return outcomes
+
+    errors = run(search(MockServer(error_rate=1.0, error_codes=[500])))
+    assert [(e.code, e.reason) for e in errors] == [(500, 'backendError')] * 2
+
+    errors = run(search(MockServer(rate_limit=0.01, burst=1, latency=0.01)))
+    assert len(errors) == 1
+    assert is_throttling(errors[0])
+
+    with pytest.raises(ValueError):
+        MockServer(error_codes=[418])
+
+
+def test_mock_server_thread_recorded_drip():
+    responses = [make_response('USD10.00'), make_response('USD20.00')]
+    with MockServer(responses, drip=(64, 0.001)) as server:
+        client = Requester(server.base_url)
+        client.api_key = 'test'
+        prices = [
+            send_sync(make_request(), client=client).trips[0].total_price
+            for _ in range(3)
+        ]
+
+    assert prices == ['USD10.00', 'USD20.00', 'USD10.00']
+
+
+def test_mock_server_thread_port_in_use():
+    with MockServer() as server:
+        taken = MockServer(port=server.port)
+        with pytest.raises(OSError):
+            taken.start_thread()
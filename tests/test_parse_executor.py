@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pyflight.api import Requester
+from pyflight.requester import requester, send_async, set_parse_executor
+from pyflight.result import Result
+from util import make_response
+
+
+@pytest.fixture
+def post(monkeypatch):
+    monkeypatch.setattr(requester, 'parse_executor', None)
+    monkeypatch.setattr(requester, 'parse_threshold', 0)
+
+    async def _post(url, payload):
+        prices = payload['request']['prices']
+        return json.dumps(make_response(*prices)).encode()
+
+    monkeypatch.setattr(requester, '_post', _post)
+
+
+def send(*prices, use_containers=True):
+    body = {'request': {'prices': list(prices)}}
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(send_async(body, use_containers))
+    finally:
+        loop.close()
+
+
+def test_parse_inline(post):
+    result = send('USD10.00')
+    assert isinstance(result, Result)
+    assert result.trips[0].total_price == 'USD10.00'
+    assert send('USD10.00', use_containers=False)['trips']['requestId'] == \
+        'calendar'
+
+
+def test_parse_executor_threshold(post):
+    threads = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return super().submit(*args, **kwargs)
+
+    executor = RecordingExecutor(1)
+    try:
+        assert set_parse_executor(executor, threshold=500) is executor
+
+        assert send('USD10.00').trips[0].total_price == 'USD10.00'
+        assert not threads
+
+        prices = ['USD{}.00'.format(n) for n in range(20)]
+        result = send(*prices)
+        assert len(threads) == 1
+        assert [trip.total_price for trip in result.trips] == prices
+
+        assert len(send(*prices, use_containers=False)
+                   ['trips']['tripOption']) == 20
+        assert len(threads) == 2
+    finally:
+        set_parse_executor(None)
+        executor.shutdown()
+
+    assert requester.parse_executor is None
+
+
+def test_parse_process_pool(post):
+    executor = set_parse_executor('process', threshold=0, workers=1)
+    try:
+        assert send('USD10.00', 'USD12.00').trips[1].total_price == 'USD12.00'
+    finally:
+        set_parse_executor(None)
+        executor.shutdown()
+
+    with pytest.raises(ValueError):
+        set_parse_executor('fibers')
+
+
+def test_parse_executor_replaced():
+    client = Requester()
+    created = set_parse_executor('thread', workers=1, client=client)
+    assert client.parse_executor is created
+    assert requester.parse_executor is not created
+
+    given = ThreadPoolExecutor(1)
+    try:
+        # Pools created from 'thread' or 'process' are shut down
+        # when replaced, executors passed in are left alone.
+        set_parse_executor(given, client=client)
+        with pytest.raises(RuntimeError):
+            created.submit(abs, -1)
+        set_parse_executor(None, client=client)
+        assert given.submit(abs, -1).result() == 1
+    finally:
+        given.shutdown()
@@ -0,0 +1,177 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pyflight.pipeline import Pipeline
+
+
+def test_pipeline_stages():
+    stored = []
+
+    async def search(number):
+        await asyncio.sleep(0)
+        return number * 2
+
+    async def store(number):
+        await asyncio.sleep(0.001)
+        stored.append(number)
+
+    pool = ThreadPoolExecutor(2)
+    pipeline = (
+        Pipeline(queue_size=4)
+        .map(search, concurrency=3)
+        .map(str, executor=pool, concurrency=2, name='parse')
+        .filter(lambda text: text.endswith('0'))
+        .sink(store)
+    )
+
+    loop = asyncio.new_event_loop()
+    stats = loop.run_until_complete(pipeline.run(range(100)))
+    loop.close()
+    pool.shutdown()
+
+    assert sorted(stored, key=int) == [str(n * 2) for n in range(0, 100, 5)]
+    names = [stage['name'] for stage in stats['stages']]
+    assert names == ['search', 'parse', '<lambda>', 'store']
+    assert [stage['processed'] for stage in stats['stages']] == \
+        [100, 100, 100, 20]
+    assert stats['stages'][2]['dropped'] == 80
+    for stage in stats['stages']:
+        assert stage['max_queue_depth'] <= 4
+        assert stage['queue_depth'] == 0
+        assert stage['throughput'] > 0
+
+
+def test_pipeline_callable_returning_coroutine():
+    stored = []
+
+    async def search(number):
+        await asyncio.sleep(0)
+        return number + 1
+
+    pipeline = (
+        Pipeline(queue_size=2)
+        .map(lambda number: search(number), name='search')
+        .sink(lambda number: stored.append(number))
+    )
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(pipeline.run(range(5)))
+    loop.close()
+
+    assert sorted(stored) == [1, 2, 3, 4, 5]
+
+
+def test_pipeline_backpressure():
+    read = []
+
+    def source():
+        for number in range(1000):
+            read.append(number)
+            yield number
+
+    async def slow_sink(_):
+        await asyncio.sleep(0.01)
+
+    async def run():
+        pipeline = Pipeline(queue_size=2).map(abs).sink(slow_sink)
+        task = asyncio.ensure_future(pipeline.run(source()))
+        await asyncio.sleep(0.05)
+        # At most one queue per stage, one item per worker
+        # and the one item being fed can be held at once.
+        assert len(read) <= 2 * 2 + 2 + 1 + 5
+        pipeline.stop()
+        stats = await task
+        assert stats['stages'][1]['processed'] == len(read)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(run())
+    loop.close()
+    assert len(read) < 1000
+
+
+def test_pipeline_errors():
+    def check(number):
+        if number == 3:
+            raise ValueError(number)
+        return number
+
+    errors = []
+    pipeline = Pipeline(on_error=lambda stage, item, error: errors.append(
+        (stage.name, item)
+    )).map(check)
+
+    loop = asyncio.new_event_loop()
+    stats = loop.run_until_complete(pipeline.run(range(5)))
+    assert errors == [('check', 3)]
+    assert stats['stages'][0]['errors'] == 1
+    assert stats['stages'][0]['processed'] == 4
+
+    stored = []
+    pipeline = Pipeline().map(check).sink(stored.append)
+    with pytest.raises(ValueError):
+        loop.run_until_complete(pipeline.run(range(5)))
+    with pytest.raises(ValueError):
+        pipeline.map(abs)
+    loop.close()
+
+
+def test_pipeline_errors_with_full_queues():
+    def check(number):
+        if number == 3:
+            raise ValueError(number)
+        return number
+
+    async def slow_sink(_):
+        await asyncio.sleep(0.01)
+
+    async def run():
+        pipeline = Pipeline(queue_size=2).map(check).sink(slow_sink)
+        # The source fills the queues, so the error must not wait for room.
+        await asyncio.wait_for(pipeline.run(range(1000)), 5)
+
+    loop = asyncio.new_event_loop()
+    with pytest.raises(ValueError):
+        loop.run_until_complete(run())
+    loop.close()
+
+
+def test_pipeline_cancel_with_full_queues():
+    async def slow_sink(_):
+        await asyncio.sleep(0.01)
+
+    async def run():
+        pipeline = Pipeline(queue_size=2).map(abs).sink(slow_sink)
+        task = asyncio.ensure_future(pipeline.run(range(1000)))
+        await asyncio.sleep(0.03)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, 5)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(run())
+    loop.close()
+
+
+def test_pipeline_cancel():
+    started = []
+
+    async def hang(number):
+        started.append(number)
+        await asyncio.sleep(10)
+
+    async def run():
+        pipeline = Pipeline().map(hang, concurrency=2)
+        task = asyncio.ensure_future(pipeline.run(range(10)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return [t for t in asyncio.all_tasks() if t is not
+                asyncio.current_task()]
+
+    loop = asyncio.new_event_loop()
+    assert loop.run_until_complete(run()) == []
+    loop.close()
+    assert started == [0, 1]
@@ -0,0 +1,54 @@
+import tracemalloc
+
+import pytest
+
+from pyflight.models.flight_data import Aircraft, FlightData
+from pyflight.models.trip import Trip
+from pyflight.profiling import ParseProfiler
+from pyflight.result import Result
+from pyflight.synthetic import generate_response
+
+
+def test_parse_profiler():
+    data = generate_response(trips=4, slices=2, segments=2, pricings=1)
+    init, aircraft_init = Trip.__init__, Aircraft.__init__
+    was_tracing = tracemalloc.is_tracing()
+
+    with ParseProfiler() as profiler:
+        assert profiler.enabled
+        assert Trip.__init__ is not init
+        with pytest.raises(RuntimeError):
+            ParseProfiler().enable()
+        Result(data)
+
+    assert Trip.__init__ is init
+    assert Aircraft.__init__ is aircraft_init
+    assert '__init__' not in vars(Aircraft)
+    assert '__init__' in vars(FlightData)
+    assert tracemalloc.is_tracing() == was_tracing
+
+    stats = profiler.stats()
+    assert stats['Result']['count'] == 1
+    assert stats['Trip']['count'] == 4
+    assert stats['Segment']['count'] == 16
+    assert stats['Aircraft']['count'] == len(data['trips']['data']['aircraft'])
+    assert 'TaxPricing' not in stats
+
+    trip = stats['Trip']
+    assert 0 < trip['own'] < trip['total'] <= stats['Result']['total']
+    assert trip['allocated'] > trip['own_allocated'] > 0
+    assert profiler.report().splitlines()[0].split()[0] == 'model'
+
+    Result(data)
+    assert profiler.stats()['Trip']['count'] == 4
+
+    profiler.reset()
+    assert profiler.stats() == {}
+
+
+def test_parse_profiler_without_memory():
+    with ParseProfiler(models=[Trip], memory=False) as profiler:
+        Result(generate_response(trips=2))
+
+    assert list(profiler.stats()) == ['Trip']
+    assert profiler.stats()['Trip']['allocated'] == 0
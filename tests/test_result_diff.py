@@ -0,0 +1,105 @@
+import json
+
+from pyflight.result import Result, ResultSnapshot
+
+
+def make_trip(trip_id, price, flight_number, departure='2017-09-19T07:00-07:00',
+              booking_code='Y'):
+    return {
+        'id': trip_id,
+        'saleTotal': price,
+        'pricing': [],
+        'slice': [{
+            'duration': 75,
+            'segment': [{
+                'id': 'S' + trip_id, 'duration': 75, 'cabin': 'COACH',
+                'bookingCode': booking_code, 'bookingCodeCount': 7,
+                'marriedSegmentGroup': '0',
+                'flight': {'carrier': 'VX', 'number': flight_number},
+                'leg': [{
+                    'id': 'L' + trip_id, 'aircraft': '320',
+                    'departureTime': departure,
+                    'arrivalTime': '2017-09-19T08:15-07:00',
+                    'duration': 75, 'origin': 'SFO', 'destination': 'LAX',
+                    'mileage': 337
+                }]
+            }]
+        }]
+    }
+
+
+def make_result(request_id, *trips):
+    return Result({
+        'trips': {
+            'requestId': request_id,
+            'data': {
+                'airport': [], 'aircraft': [], 'carrier': [],
+                'city': [], 'tax': []
+            },
+            'tripOption': list(trips)
+        }
+    })
+
+
+old = make_result(
+    'first',
+    make_trip('001', 'USD69.00', '920'),
+    make_trip('002', 'USD79.00', '922'),
+    make_trip('003', 'USD89.00', '924'),
+)
+new = make_result(
+    'second',
+    make_trip('001', 'USD69.00', '922'),
+    make_trip('002', 'USD75.00', '924'),
+    make_trip('003', 'USD99.00', '926'),
+    make_trip('004', 'USD99.00', '926'),
+)
+
+
+def test_trip_fingerprint():
+    assert old.trips[1].fingerprint() == new.trips[0].fingerprint()
+    assert old.trips[0].fingerprint() != old.trips[1].fingerprint()
+
+    moved = make_trip('002', 'USD79.00', '922', '2017-09-20T07:00-07:00')
+    assert make_result('x', moved).trips[0].fingerprint() \
+        != old.trips[1].fingerprint()
+
+
+def test_result_diff():
+    diff = new.diff(old)
+
+    assert diff
+    assert [t.id for t in diff.added] == ['003']
+    assert diff.removed == [old.trips[0].fingerprint()]
+    assert [(t.id, price) for t, price, _ in diff.repriced] == [
+        ('001', 'USD79.00'), ('002', 'USD89.00')
+    ]
+    assert not new.diff(new)
+
+
+def test_result_diff_booking_classes():
+    # A move to another fare bucket reprices the same itinerary.
+    bucket = make_result('third', make_trip('001', 'USD59.00', '920',
+                                            booking_code='Q'))
+    assert bucket.trips[0].fingerprint() == old.trips[0].fingerprint()
+
+    diff = bucket.diff(old)
+    assert not diff.added
+    assert diff.as_dict()['repriced'] == [{
+        'id': '001', 'old_price': 'USD69.00', 'new_price': 'USD59.00',
+        'old_booking_classes': 'COACH Y', 'new_booking_classes': 'COACH Q'
+    }]
+
+    same_price = make_result('fourth', make_trip('001', 'USD69.00', '920',
+                                                 booking_code='Q'))
+    assert [t.id for t, _, _ in same_price.diff(old).repriced] == ['001']
+
+
+def test_result_diff_snapshot():
+    snapshot = ResultSnapshot.from_dict(
+        json.loads(json.dumps(old.snapshot().as_dict()))
+    )
+
+    assert len(snapshot) == 3
+    assert snapshot.request_id == 'first'
+    assert new.diff(snapshot).as_dict() == new.diff(old).as_dict()
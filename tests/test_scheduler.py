@@ -0,0 +1,184 @@
+import asyncio
+
+import pytest
+
+from pyflight.api import Requester
+from pyflight.requester import requester
+from pyflight.scheduler import (
+    DeadlineExceeded, JobPreempted, Priority, Scheduler
+)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+
+    async def post_request(url, payload):
+        sent.append(payload['name'])
+        await asyncio.sleep(0.01)
+        return payload
+
+    monkeypatch.setattr(requester, 'post_request', post_request)
+    return sent
+
+
+def test_scheduler_priority(sent):
+    async def main():
+        scheduler = Scheduler(concurrency=1, use_containers=False)
+        jobs = [
+            scheduler.submit({'name': 'first'}, Priority.BACKGROUND),
+            scheduler.submit({'name': 'crawl'}, Priority.BACKGROUND),
+            scheduler.submit({'name': 'other'}),
+            scheduler.submit({'name': 'user'}, Priority.INTERACTIVE),
+        ]
+        responses = await asyncio.gather(*jobs)
+        return scheduler, responses
+
+    scheduler, responses = run(main())
+
+    assert sent == ['first', 'user', 'other', 'crawl']
+    assert [r['name'] for r in responses] == ['first', 'crawl', 'other', 'user']
+
+    stats = scheduler.stats()
+    assert stats['queue_depth'] == 0
+    assert stats['dispatched'] == 4
+    assert stats['wait_time']['BACKGROUND']['count'] == 2
+    assert stats['wait_time']['INTERACTIVE']['max'] > 0
+
+
+def test_scheduler_deadline_and_preemption(sent):
+    async def main():
+        scheduler = Scheduler(concurrency=1, max_queue=2,
+                              use_containers=False)
+        running = asyncio.ensure_future(scheduler.submit({'name': 'running'}))
+        expiring = asyncio.ensure_future(
+            scheduler.submit({'name': 'expiring'}, deadline=0.001)
+        )
+        crawl = asyncio.ensure_future(
+            scheduler.submit({'name': 'crawl'}, Priority.BACKGROUND)
+        )
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 2
+
+        user = asyncio.ensure_future(
+            scheduler.submit({'name': 'user'}, Priority.INTERACTIVE)
+        )
+        await asyncio.sleep(0)
+        with pytest.raises(JobPreempted):
+            await scheduler.submit({'name': 'late'}, Priority.BACKGROUND)
+
+        await asyncio.gather(running, user)
+        with pytest.raises(DeadlineExceeded):
+            await expiring
+        with pytest.raises(JobPreempted):
+            await crawl
+        return scheduler.stats()
+
+    stats = run(main())
+
+    assert sent == ['running', 'user']
+    assert stats['expired'] == 1
+    assert stats['preempted'] == 2
+    assert stats['queue_depth'] == 0
+
+
+def test_scheduler_rate(sent):
+    async def main():
+        scheduler = Scheduler(concurrency=10, rate=100,
+                              use_containers=False)
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        await asyncio.gather(*(
+            scheduler.submit({'name': str(i)}) for i in range(4)
+        ))
+        return loop.time() - start
+
+    assert run(main()) >= 0.03
+    assert len(sent) == 4
+
+
+def test_scheduler_cancel_dispatched(monkeypatch):
+    cancelled = []
+
+    async def post_request(url, payload):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(payload['name'])
+            raise
+
+    monkeypatch.setattr(requester, 'post_request', post_request)
+
+    async def main():
+        scheduler = Scheduler(concurrency=1, use_containers=False)
+        job = asyncio.ensure_future(scheduler.submit({'name': 'slow'}))
+        await asyncio.sleep(0.01)
+        assert scheduler.in_flight == 1
+
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+        await asyncio.sleep(0.01)
+        return scheduler
+
+    scheduler = run(main())
+
+    assert cancelled == ['slow']
+    assert scheduler.in_flight == 0
+
+
+def test_scheduler_prunes_dropped_jobs(sent):
+    async def main():
+        scheduler = Scheduler(concurrency=1, max_queue=10,
+                              use_containers=False)
+        running = asyncio.ensure_future(scheduler.submit({'name': 'running'}))
+        await asyncio.sleep(0)
+
+        for _ in range(100):
+            crawl = asyncio.ensure_future(
+                scheduler.submit({'name': 'crawl'}, Priority.BACKGROUND)
+            )
+            await asyncio.sleep(0)
+            crawl.cancel()
+            await asyncio.sleep(0)
+        size = len(scheduler._queue)  # pylint: disable=protected-access
+
+        await running
+        return size
+
+    assert run(main()) <= 2
+    assert sent == ['running']
+
+
+def test_scheduler_client(monkeypatch):
+    client = Requester()
+    sent = []
+
+    async def post_request(url, payload):
+        sent.append(payload['name'])
+        if payload['name'] == 'cancelled':
+            raise asyncio.CancelledError()
+        return payload
+
+    monkeypatch.setattr(client, 'post_request', post_request)
+
+    async def main():
+        scheduler = Scheduler(use_containers=False, client=client)
+        with pytest.raises(asyncio.CancelledError):
+            await scheduler.submit({'name': 'cancelled'})
+        response = await scheduler.submit({'name': 'sent'})
+        return scheduler, response
+
+    scheduler, response = run(main())
+
+    assert response == {'name': 'sent'}
+    assert sent == ['cancelled', 'sent']
+    assert scheduler.in_flight == 0
@@ -0,0 +1,97 @@
+import pytest
+
+from pyflight.fields import parse_fields
+from pyflight.models.bag_descriptor import BagDescriptor
+from pyflight.models.schema import Field, model
+from pyflight.models.segment import Segment
+from pyflight.result import Result
+from pyflight.synthetic import generate_response
+
+
+@model
+class Box(object):
+    FIELDS = (
+        Field('name', 'name', ''),
+        Field('size/width', 'width', 0),
+        Field('size/height', 'height', 0),
+        Field('tags', 'tags', []),
+        Field('items', 'items', model=BagDescriptor),
+    )
+
+
+def test_generated_constructor():
+    box = Box({
+        'name': 'crate', 'size': {'width': 2, 'height': 3},
+        'items': [{'count': 1, 'subcode': '0GO'}]
+    })
+    assert (box.name, box.width, box.height) == ('crate', 2, 3)
+    assert box.items[0].count == 1 and box.items[0].subcode == '0GO'
+    assert box.as_dict() == {
+        'name': 'crate', 'width': 2, 'height': 3, 'tags': [],
+        'items': [box.items[0].as_dict()]
+    }
+
+    # Defaults are fresh for each instance.
+    empty = Box({})
+    empty.tags.append('fragile')
+    assert Box({}).tags == [] and Box({}).items == []
+    assert (empty.name, empty.width) == ('', 0)
+
+    assert Box.__init__.__qualname__ == 'Box.__init__'
+    assert Box.as_dict.__qualname__ == 'Box.as_dict'
+
+
+def test_generated_constructor_replaced_leaf(monkeypatch):
+    data = {'items': [{'count': 1}, {'count': 2}]}
+    built = Box(data)
+    assert type(built.items[0]) is BagDescriptor
+    assert [item.as_dict() for item in built.items] == [
+        BagDescriptor(item).as_dict() for item in data['items']
+    ]
+
+    # Models without nested models are built in place, unless their
+    # constructor is replaced, as by a ParseProfiler.
+    calls = []
+    init = BagDescriptor.__init__
+
+    def counted(self, item, fields=None):
+        calls.append(item)
+        init(self, item, fields)
+
+    monkeypatch.setattr(BagDescriptor, '__init__', counted)
+    assert [item.count for item in Box(data).items] == [1, 2]
+    assert calls == data['items']
+
+
+def test_generated_constructor_fields():
+    data = {'name': 'crate', 'size': {'width': 2, 'height': 3},
+            'items': [{'count': 1, 'subcode': '0GO'}]}
+    box = Box(data, parse_fields('size/height,items/count'))
+    assert (box.name, box.width, box.height) == ('', 0, 3)
+    assert box.items[0].count == 1 and box.items[0].subcode is None
+
+    box = Box(data, parse_fields('name'))
+    assert box.name == 'crate' and box.height == 0 and box.items == []
+
+    box = Box(data, parse_fields('*,items/subcode'))
+    assert (box.name, box.width, box.height) == ('crate', 2, 3)
+    assert box.items[0].count is None and box.items[0].subcode == '0GO'
+
+
+def test_field_defaults():
+    with pytest.raises(ValueError):
+        Field('tags', 'tags', object())
+    with pytest.raises(ValueError):
+        Field('items', 'items', [], model=BagDescriptor)
+
+
+def test_connection_duration():
+    result = Result(generate_response(trips=2, segments=2, legs=2))
+    segments = result.trips[0].routes[0].segments
+    assert segments[0].connection_duration == 75
+    assert segments[-1].connection_duration is None
+    assert segments[0].flights[0].connection_duration == 40
+    assert segments[0].as_dict()['connection_duration'] == 75
+
+    segment = Segment({'connectionDuration': 30})
+    assert segment.connection_duration == 30 and segment.flights == []
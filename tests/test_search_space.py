@@ -0,0 +1,79 @@
+import pytest
+
+from pyflight.search_space import SearchSpace, flexible_dates
+
+
+def test_flexible_dates():
+    assert flexible_dates('2017-09-30', 2) == [
+        '2017-09-30', '2017-09-29', '2017-10-01', '2017-09-28', '2017-10-02'
+    ]
+
+
+def test_search_space_product():
+    space = SearchSpace(
+        origin=['SFO', 'OAK', 'SFO'],
+        destination=['LAX', 'OAK'],
+        date=flexible_dates('2017-09-19', 1),
+        adult_count=[1, 2],
+        max_stops=0,
+    )
+
+    assert space.axes['origin'] == ('SFO', 'OAK')
+    assert len(space) == 2 * 2 * 3 * 2 * 1
+
+    requests = list(space)
+    # OAK -> OAK is skipped
+    assert len(requests) == 3 * 3 * 2
+    bodies = [r.as_dict() for r in requests]
+    assert all(b not in bodies[i + 1:] for i, b in enumerate(bodies))
+
+    first = requests[0]
+    assert first.adult_count == 1
+    assert first.raw_data['request']['slice'] == [{
+        'kind': 'qpxexpress#sliceInput', 'origin': 'SFO',
+        'destination': 'LAX', 'date': '2017-09-19', 'maxStops': 0
+    }]
+
+
+def test_search_space_round_trip():
+    space = SearchSpace(['SFO'], ['LAX'],
+                        date=['2017-09-19', '2017-09-21'],
+                        return_date=['2017-09-20', '2017-09-22'],
+                        senior_count=[0, 1],
+                        where=lambda v: v['date'] != '2017-09-21')
+
+    requests = list(space)
+    assert [
+        [s['date'] for s in r.raw_data['request']['slice']] for r in requests
+    ] == [['2017-09-19', '2017-09-20'], ['2017-09-19', '2017-09-22']]
+    assert requests[0].raw_data['request']['slice'][1]['origin'] == 'LAX'
+    assert requests[0].senior_count == 1
+
+
+def test_search_space_priority():
+    space = SearchSpace(['SFO', 'OAK', 'SJC'], ['LAX', 'BUR'],
+                        date=['2017-09-19', '2017-09-20'], priority=True)
+
+    combinations = [
+        (r.raw_data['request']['slice'][0]['origin'],
+         r.raw_data['request']['slice'][0]['destination'],
+         r.raw_data['request']['slice'][0]['date'])
+        for r in space
+    ]
+    assert len(combinations) == len(set(combinations)) == 12
+    assert combinations[:4] == [
+        ('SFO', 'LAX', '2017-09-19'),
+        ('SFO', 'LAX', '2017-09-20'),
+        ('SFO', 'BUR', '2017-09-19'),
+        ('OAK', 'LAX', '2017-09-19'),
+    ]
+    assert combinations[-1] == ('SJC', 'BUR', '2017-09-20')
+
+
+def test_search_space_invalid_options():
+    with pytest.raises(ValueError):
+        SearchSpace(['SFO'], ['LAX'], ['2017-09-19'], cabin='FIRST')
+
+    with pytest.raises(ValueError):
+        SearchSpace(['SFO'], ['LAX'], ['2017-09-19'],
+                    preferred_cabin=['FIRST', 'ECONOMY'])
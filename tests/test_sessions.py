@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+import pytest
+
+from pyflight.api import Requester
+from pyflight.metrics import Metrics
+from pyflight.mock_server import MockServer
+from pyflight.requester import send_async
+from util import make_request
+
+
+def make_client(server):
+    client = Requester(server.base_url)
+    client.api_key = 'test'
+    return client
+
+
+def test_session_reused_and_closed_with_loop():
+    async def search():
+        async with MockServer() as server:
+            client = make_client(server)
+            metrics = Metrics()
+            client.hooks.add(metrics)
+            for _ in range(3):
+                await send_async(make_request(), client=client)
+            session = await client.transport.session()
+            assert session is await client.transport.session()
+            return client, session, metrics
+
+    client, session, metrics = asyncio.run(search())
+    assert session.closed
+    assert len(client.transport.sessions) == 0
+    assert metrics.counter('connections_total', reused='false') == 1
+    assert metrics.counter('connections_total', reused='true') == 2
+
+
+def test_close_session():
+    async def search():
+        async with MockServer() as server:
+            client = make_client(server)
+            await send_async(make_request(), client=client)
+            first = await client.transport.session()
+            await client.close()
+            assert first.closed
+            await send_async(make_request(), client=client)
+            return first, await client.transport.session()
+
+    first, second = asyncio.run(search())
+    assert first is not second
+    assert second.closed
+
+
+def test_loop_per_thread():
+    sessions = []
+    errors = []
+
+    with MockServer() as server:
+        client = make_client(server)
+
+        async def search():
+            for _ in range(3):
+                await send_async(make_request(), client=client)
+            sessions.append(await client.transport.session())
+
+        def worker():
+            try:
+                asyncio.run(search())
+            except Exception as error:  # pylint: disable=broad-except
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert len(set(map(id, sessions))) == 4
+    assert all(session.closed for session in sessions)
+    assert len(client.transport.sessions) == 0
+
+
+def test_uvloop():
+    uvloop = pytest.importorskip('uvloop')
+
+    async def search():
+        async with MockServer() as server:
+            result = await send_async(make_request(2),
+                                      client=make_client(server))
+            return len(result.trips)
+
+    loop = uvloop.new_event_loop()
+    try:
+        assert loop.run_until_complete(search()) == 2
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
@@ -0,0 +1,27 @@
+from pyflight.stats import Histogram
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert histogram.percentile(50) is None
+    assert histogram.mean is None
+
+    for value in range(1, 1001):
+        histogram.record(value / 1000)
+
+    assert histogram.count == 1000
+    assert histogram.min == 0.001
+    assert histogram.max == 1.0
+    assert abs(histogram.mean - 0.5005) < 1e-9
+    assert abs(histogram.percentile(50) - 0.5) / 0.5 < 0.05
+    assert abs(histogram.percentile(99) - 0.99) / 0.99 < 0.05
+    assert histogram.percentile(100) == 1.0
+    assert 0.001 <= histogram.percentile(0) < 0.00105
+    assert sum(count for _, count in histogram.buckets()) == 1000
+
+    other = Histogram()
+    other.record(5.0, count=1000)
+    histogram.merge(other)
+    assert histogram.count == 2000
+    assert histogram.max == 5.0
+    assert histogram.percentile(75) == 5.0
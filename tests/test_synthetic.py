@@ -0,0 +1,68 @@
+import json
+
+from pyflight.result import Result
+from pyflight.synthetic import generate_response
+
+
+def test_generate_response_shape():
+    data = generate_response(trips=3, slices=2, segments=2, legs=2,
+                             pricings=2, bag_descriptors=3, seed=1)
+
+    assert data == generate_response(3, 2, 2, 2, 2, 3, seed=1)
+    assert data != generate_response(3, 2, 2, 2, 2, 3, seed=2)
+    assert json.loads(json.dumps(data)) == data
+
+    result = Result(data)
+    assert result.request_id == 'synthetic1'
+    assert len(result.trips) == 3
+
+    trip = result.trips[0]
+    assert len(trip.routes) == 2
+    assert all(len(route.segments) == 2 for route in trip.routes)
+    assert all(len(segment.flights) == 2
+               for route in trip.routes for segment in route.segments)
+    assert len(trip.pricing) == 2
+    pricing = trip.pricing[0]
+    assert len(pricing.fares) == len(pricing.segment_pricing) == 4
+    assert len(pricing.segment_pricing[0].free_baggage[0]
+               .bag_descriptors) == 3
+    assert trip.as_dict()['pricing'][1]['for_passenger_type'] == 'CHD'
+
+
+def test_generate_response_references():
+    data = generate_response(trips=20, slices=2)['trips']
+    airports = {airport['code'] for airport in data['data']['airport']}
+    cities = {city['code'] for city in data['data']['city']}
+    carriers = {carrier['code'] for carrier in data['data']['carrier']}
+
+    for trip in data['tripOption']:
+        cents = sum(
+            int(pricing['saleTotal'][3:].replace('.', ''))
+            for pricing in trip['pricing']
+        )
+        assert trip['saleTotal'] == 'USD{}.{:02d}'.format(
+            cents // 100, cents % 100
+        )
+        for trip_slice in trip['slice']:
+            for segment in trip_slice['segment']:
+                assert segment['flight']['carrier'] in carriers
+                for leg in segment['leg']:
+                    assert {leg['origin'], leg['destination']} <= airports
+
+    assert {a['city'] for a in data['data']['airport']} == cities
+
+
+def test_generate_response_unique_ids():
+    # Indices of 10 and more must not run into each other.
+    data = generate_response(trips=12, slices=12, legs=2, pricings=2)
+    segments, legs, fares = [], [], []
+    for trip in data['trips']['tripOption']:
+        for trip_slice in trip['slice']:
+            for segment in trip_slice['segment']:
+                segments.append(segment['id'])
+                legs.extend(leg['id'] for leg in segment['leg'])
+        for pricing in trip['pricing']:
+            fares.extend(fare['id'] for fare in pricing['fare'])
+
+    for ids in (segments, legs, fares):
+        assert len(set(ids)) == len(ids)
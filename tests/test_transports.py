@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from pyflight.api import APIException, Requester
+from pyflight.mock_server import MockServer
+from pyflight.requester import send_async, send_sync, set_transport
+from pyflight.transports import (
+    AiohttpTransport, MemoryTransport, RequestsTransport
+)
+from util import make_request, make_response
+
+
+def test_set_transport():
+    client = Requester()
+    aiohttp_transport = client.transport
+    requests_transport = client.sync_transport
+    assert isinstance(aiohttp_transport, AiohttpTransport)
+    assert isinstance(requests_transport, RequestsTransport)
+
+    memory = set_transport('memory', client=client)
+    assert client.transport is memory and client.sync_transport is memory
+
+    set_transport('aiohttp', client=client)
+    assert isinstance(client.transport, AiohttpTransport)
+    assert client.sync_transport is memory
+
+    with pytest.raises(ValueError):
+        set_transport('carrier pigeon', client=client)
+
+
+def test_memory_transport():
+    client = Requester()
+    client.api_key = 'test'
+    transport = set_transport(MemoryTransport(
+        [make_response('USD10.00'), make_response('USD20.00')]
+    ), client=client)
+    phases = []
+    client.hooks.add(lambda event: phases.append(event.phase))
+
+    prices = [send_sync(make_request(), client=client).trips[0].total_price]
+    prices.append(asyncio.run(
+        send_async(make_request(), client=client)
+    ).trips[0].total_price)
+    assert prices == ['USD10.00', 'USD20.00']
+    assert transport.requests == 2
+    assert phases.count('download') == 2
+
+    client.api_key = ''
+    with pytest.raises(APIException) as error:
+        send_sync(make_request(), client=client)
+    assert error.value.reason == 'keyInvalid'
+
+
+def test_single_direction_transports():
+    with pytest.raises(NotImplementedError):
+        asyncio.run(RequestsTransport().post('http://localhost/', {}, None))
+    with pytest.raises(NotImplementedError):
+        AiohttpTransport().post_sync('http://localhost/', {}, None)
+
+
+def test_requests_transport_session_per_thread():
+    with MockServer() as server:
+        client = Requester(server.base_url)
+        client.api_key = 'test'
+        transport = client.sync_transport
+        send_sync(make_request(), client=client)
+        session = transport._local.session
+        send_sync(make_request(), client=client)
+        assert transport._local.session is session
+
+        transport.close_sync()
+        send_sync(make_request(), client=client)
+        assert transport._local.session is not session
+        transport.close_sync()
+
+
+@pytest.mark.parametrize('http2', [False, True])
+def test_httpx_transport(http2):
+    pytest.importorskip('httpx')
+    if http2:
+        pytest.importorskip('h2')
+
+    from pyflight.transports import HttpxTransport
+
+    with MockServer() as server:
+        client = Requester(server.base_url)
+        client.api_key = 'test'
+        transport = set_transport(HttpxTransport(http2=http2), client=client)
+        assert len(send_sync(make_request(2), client=client).trips) == 2
+        transport.close_sync()
+
+        async def search():
+            return await send_async(make_request(3), client=client)
+
+        assert len(asyncio.run(search()).trips) == 3
+        assert len(client.transport.clients) == 0
@@ -1,7 +1,10 @@
+import asyncio
 import os
 import requests
 import json
 
+from pyflight.requester import Request, Slice
+
 
 # Downloads the file at the specified URL if it is not found under the specified filename.
 def download_file_if_not_exists(url: str, filename: str) -> dict:
@@ -14,3 +17,43 @@ def download_file_if_not_exists(url: str, filename: str) -> dict:
 
     with open(path, 'r') as f:
         return json.load(f)
+
+
+# Creates a search from SFO to LAX asking for the given amount of solutions.
+def make_request(solutions=3):
+    request = Request()
+    request.adult_count = 1
+    request.solution_count = solutions
+    request.add_slice(Slice('SFO', 'LAX', '2017-09-30'))
+    return request
+
+
+# Creates a minimal response with one trip for each of the given prices.
+def make_response(*prices):
+    return {
+        'trips': {
+            'requestId': 'calendar',
+            'data': {
+                'airport': [], 'aircraft': [], 'carrier': [],
+                'city': [], 'tax': []
+            },
+            'tripOption': [
+                {'saleTotal': price, 'id': 'trip{}'.format(i),
+                 'slice': [], 'pricing': []}
+                for i, price in enumerate(prices)
+            ]
+        }
+    }
+
+
+# Gets the date of the first slice of a request payload,
+# which is sent as JSON bytes for frozen requests.
+def payload_date(payload):
+    if isinstance(payload, bytes):
+        payload = json.loads(payload.decode())
+    return payload['request']['slice'][0]['date']
+
+
+# Runs a coroutine on a new event loop until it is done.
+def run(coroutine):
+    return asyncio.run(coroutine)